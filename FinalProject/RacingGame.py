@@ -1,357 +1,413 @@
 """
 Racing Game
+
+Run it from the top of the repository with:
+
+    python -m FinalProject.RacingGame
+
+This is the window: drawing, sprites, screens and the HUD. The rules of
+the game are in rules.py, which doesn't import arcade.
 """
+import argparse
+import time
+
+# Time-to-first-frame is counted from here, before arcade is imported
+LAUNCH_TIME = time.perf_counter()
+
 import arcade
-import os
-import math
-import random
+
+from . import textures
+from .hud import Hud
+from .screens import StaticScreen, FrozenFrame
+from .scores import HighScores, SCORES_FILE, SHOWN, format_run
+from .particles import ParticleStore, ParticleBatch
+from .governor import FrameGovernor, BUDGET_MS
+from .rules import (GameLogic, VehicleRules, PooledRules,
+                    SCREEN_WIDTH, SCREEN_HEIGHT, INSTRUCTIONS_PAGE, GAME_RUNNING, GAME_OVER,
+                    CAR_IMAGES, CHARACTER_SCALING, SPRITE_SCALING_COIN, FIXED_TIME_STEP,
+                    MAX_INTERPOLATE_DISTANCE)
 
 # Constants
-SCREEN_WIDTH = 1280
-SCREEN_HEIGHT = 720
 SCREEN_TITLE = "Racing Game"
-MOVEMENT_SPEED = 5
-SCALE = 0.25
-
-INSTRUCTIONS_PAGE = 0
-GAME_RUNNING = 1
-GAME_OVER = 2
 
-OFFSCREEN_SPACE = 50
-LEFT_LIMIT = -OFFSCREEN_SPACE
-RIGHT_LIMIT = SCREEN_WIDTH + OFFSCREEN_SPACE
-BOTTOM_LIMIT = -OFFSCREEN_SPACE
-TOP_LIMIT = SCREEN_HEIGHT + OFFSCREEN_SPACE
+# Every image a race needs. The window loads these first and waits for them
+# before the race starts.
+GAME_IMAGES = ("background-1_0 (1).png", "bugatti.png", "coin_01.png") + CAR_IMAGES
 
-STARTING_OBJECTS_COUNT = 7
-OBJECTS_SPEED = 3
+# Where the loading bar goes on the instructions page
+LOADING_BAR_X = 340
+LOADING_BAR_Y = 40
+LOADING_BAR_WIDTH = 600
 
-SPRITE_SCALING_COIN = 0.2
-COIN_COUNT = 6
+# Top left of the high score table on the game over box
+SCORES_X = 570
+SCORES_Y = 575
 
-# Constants used to scale our sprites from their original size
-CHARACTER_SCALING = 0.25
-TILE_SCALING = 1.6
-COIN_SCALING = 0.5
+# Key that shows the frame profile, and how often its numbers change
+PROFILE_KEY = arcade.key.F3
+PROFILE_REFRESH_FRAMES = 15
 
-# Movement speed of player, in pixels per frame
-PLAYER_MOVEMENT_SPEED = 5
 
-
-class VehicleSprite(arcade.Sprite):
+class VehicleSprite(VehicleRules, arcade.Sprite):
     """
     Vehicle class
     Sprite that represents our Vehicle.
     """
 
-    def __init__(self, image, scale):
-        """ Set up the Vehicle """
-
-        # Call the parent init
-        super().__init__(image, scale)
 
-        # Create a variable to hold our speed. 'angle' is created by the parent
-        # The put vehicle to init position
-        self.speed = 0
-        self.max_speed = 5
-        self.respawning = 0
+class PooledSprite(PooledRules, arcade.Sprite):
+    """
+    A sprite that is made once and then reused, see PooledRules.
+    """
 
-        # Mark that we are respawning.
-        self.respawn()
 
-    def respawn(self):
-        """
-        Called when we die and need to make a new vehicle.
-        'respawning' is an invulnerability timer.
-        """
-        # If we are in the middle of respawning, this is non-zero.
-        self.respawning = 1
-        self.center_x = SCREEN_WIDTH / 2
-        self.center_y = 600
-
-    def update(self):
-
-        # Acceleration
-        if self.speed > self.max_speed:
-            self.speed = self.max_speed
-        self.change_y = self.change_y + self.speed
-
-        # print("X: %s" % self.change_x)
-        # print("Y: %s" % self.change_y)
-        self.center_x += self.change_x
-        self.center_y += self.change_y
-
-        # DEBUG:
-        # See if the obj hit the edge of the screen.
-        # If so, change direction
-        if self.center_x < 250:
-            self.center_x = 250
-        if self.center_x > SCREEN_WIDTH - 250:
-            self.center_x = SCREEN_WIDTH - 250
-        if self.center_y < 1:
-            self.center_y = 1
-        if self.center_y > SCREEN_HEIGHT - 1:
-            self.center_y = SCREEN_HEIGHT - 1
-
-        """ Call the parent class. """
-        super().update()
-
-
-class OthersSprite(arcade.Sprite):
-    """ Sprite that represents a competitors"""
+class OthersSprite(PooledSprite):
+    """
+    Sprite that represents a competitors.
+    TrafficStore drives them.
+    """
 
     def __init__(self, image, scale):
         super().__init__(image, scale=scale)
         self.size = 0
 
-    def update(self):
-        """ Move the object around. """
-        super().update()
-        if self.center_y > TOP_LIMIT:
-            self.center_y = BOTTOM_LIMIT
-        if self.center_y < BOTTOM_LIMIT:
-            self.center_y = TOP_LIMIT
-
-        if self.center_x < 250:
-            self.change_x = (0.2) * OBJECTS_SPEED
-        elif self.center_x > SCREEN_WIDTH - 250:
-            self.change_x = (-0.2) * OBJECTS_SPEED
 
-
-class Coin(arcade.Sprite):
+class Coin(PooledSprite):
     """
     This class represents the coins on our screen.
+    CoinStore moves them.
     """
 
-    def reset_pos(self):
-        # Reset the coin to a random spot above the screen
-        self.center_y = random.randrange(BOTTOM_LIMIT,
-                                         TOP_LIMIT)
-        self.center_x = random.randrange(250, SCREEN_WIDTH - 250)
-
-    def update(self):
-        # Move the coin
-        self.center_y -= 1
-
-        # See if the coin has fallen off the bottom of the screen.
-        # If so, reset it.
-        if self.top < 0:
-            self.reset_pos()
 
-
-class MyGame(arcade.Window):
+def make_sprite(sprite_class, images, scale):
     """
-    Main application class.
+    A sprite wearing textures from the registry, so they come out of the
+    sprite atlas when there is one, instead of arcade loading the files
     """
+    sprite = sprite_class(None, scale)
+    for image in images:
+        texture = textures.get_texture(image)
+        texture.scale = scale
+        sprite.append_texture(texture)
+    sprite.set_texture(0)
+    return sprite
 
-    def __init__(self):
 
-        # Call the parent class and set up the window
-        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
+def make_hud():
+    """ Timer, score and lives. The timer has a drop shadow underneath. """
+    hud = Hud()
+    hud.add_label("time_shadow", 10, 10, arcade.color.BLACK, 24, 16)
+    hud.add_label("time", 12, 12, arcade.color.WHITE_SMOKE, 24, 16)
+    hud.add_label("score", 10, 45, arcade.color.AZURE, 24, 16)
+    hud.add_label("lives", 10, 75, arcade.color.RED, 24, 16)
+    return hud
 
-        file_path = os.path.dirname(os.path.abspath(__file__))
-        os.chdir(file_path)
 
-        self.current_state = INSTRUCTIONS_PAGE
+def make_profile_hud(phases):
+    """ One line for each phase of the frame profile, and the total, top right """
+    hud = Hud()
+    for i, phase in enumerate(phases + ("total",)):
+        hud.add_label(phase, SCREEN_WIDTH - 250, SCREEN_HEIGHT - 30 - 20 * i,
+                      arcade.color.YELLOW, 12, 24)
+    return hud
 
-        self.total_time = 0.0
-        self.gameover = None
-        self.lives = None
-        self.collision_time = None
-        self.numobj = None
-        self.ncoins = None
 
-        # All Sprites
-        self.all_sprites_list = None
+class SpriteGame(GameLogic):
+    """ The game played on arcade sprites and sprite lists, so it can be drawn """
 
-        # These are 'lists' that keep track of our sprites. Each sprite should
-        # go into a list.
-        self.background = None
+    def load_assets(self):
+        """ Decode every image before going on """
+        textures.load_atlas()
+        textures.preload()
 
-        self.coin_list = None
-        self.wall_list = None
-        self.player_list = None
-        self.myobject_list = None
-        self.coin_list = None
+    def make_sprite_list(self):
+        return arcade.SpriteList()
 
-        # Separate variable that holds the player sprite
-        self.player_sprite = None
+    def make_player(self):
+        return make_sprite(VehicleSprite, ["bugatti.png"], CHARACTER_SCALING)
 
-        # Our physics engine
-        self.physics_engine = None
+    def make_car(self, image):
+        return make_sprite(OthersSprite, [image], CHARACTER_SCALING)
 
-    def draw_instructions_page(self):
-        """
-        Draw an instruction page. Load the page as an image.
-        """
-        arcade.draw_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
-                                      SCREEN_WIDTH,
-                                      SCREEN_HEIGHT + 1000, arcade.color.BLACK)
+    def make_coin(self):
+        # Coin image from kenney.nl
+        return make_sprite(Coin, ["coin_01.png"], SPRITE_SCALING_COIN)
 
-        # title, instructions
-        arcade.draw_rectangle_filled(670, 570, 1035, 100, arcade.color.RED)
-        arcade.draw_rectangle_filled(450, 350, 470, 250, arcade.color.WHITE)
-        arcade.draw_rectangle_filled(450, 350, 447, 230, arcade.color.BLACK)
-        arcade.draw_text("STREET RACER XTREME", 168, 525, arcade.color.BLACK, 85)
-        arcade.draw_text("CLICK TO START GAME!", 760, 330, arcade.color.WHITE, 35)
-        arcade.draw_text("Coins are 10 points each", 320, 400, arcade.color.WHITE, 20)
-        arcade.draw_text("Press space to use nitrous", 320, 340, arcade.color.WHITE, 20)
-        arcade.draw_text("Move with the arrow keys", 320, 280, arcade.color.WHITE, 20)
-        arcade.draw_text("!! DONT CRASH INTO ANYBODY !!", 350, 100, arcade.color.RED, 40)
+    def setup(self, seed=None):
+        super().setup(seed)
 
-    # STEP 3: Add this function
-    def draw_game_over(self):
-        """
-        Draw "Game over" across the screen.
-        """
-        arcade.draw_rectangle_filled(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
-                                      SCREEN_WIDTH // 2,
-                                      SCREEN_HEIGHT // 1.5, arcade.color.BRONZE)
-        arcade.draw_rectangle_filled(SCREEN_WIDTH // 2, 410, 600, 140, arcade.color.COOL_GREY)
-        arcade.draw_rectangle_filled(SCREEN_WIDTH // 2, 275, 550, 100, arcade.color.COOL_GREY)
+        # Create the 'physics engine'
+        self.physics_engine = arcade.PhysicsEngineSimple(self.player_sprite,
+                                                         self.wall_list)
 
-        output = "Oops, You Lost :("
-        arcade.draw_text(output, 360, 381, arcade.color.BLACK, 66)
 
-        output = "Click Anywhere To Restart"
-        arcade.draw_text(output, 375, 258, arcade.color.BLACK, 40)
+class MyGame(SpriteGame, arcade.Window):
+    """
+    Main application class.
+    """
 
-    # Make the enemies
-    def create_buddies(self):
-        image_list = ("images//police.png",
-                      "images\\police.png",
-                      "images\\police.png",
-                      "images\\lambo.png",
-                      "images\\lambo.png",
-                      "images\\lambo.png")
+    def __init__(self):
 
-        for i in range(STARTING_OBJECTS_COUNT):
-            image_no = random.randrange(6)
-            enemy_sprite = OthersSprite(image_list[image_no], CHARACTER_SCALING)
-            enemy_sprite.guid = "Competitors"
+        # Call the parent class and set up the window
+        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
 
-            enemy_sprite.center_y = random.randrange(80, SCREEN_HEIGHT - 1)
-            enemy_sprite.center_x = random.randrange(250, SCREEN_WIDTH - 250)
+        self.background = None
 
-            if (random.random() % 2):
-                enemy_sprite.change_y = random.uniform(1, 3) * OBJECTS_SPEED
-                enemy_sprite.change_x = random.uniform(-0.2, 0.2) * OBJECTS_SPEED
+        # Seconds from launch to the first frame on the screen
+        self.first_frame_time = None
 
-            # enemy_sprite.change_angle = (random.random() - 0.5) * 2
-            enemy_sprite.size = 0
+        # Progress of the images loading in the background
+        self.loading_hud = Hud()
+        self.loading_hud.add_label("loading", LOADING_BAR_X, LOADING_BAR_Y + 20,
+                                   arcade.color.WHITE, 14, 24)
 
-            enemy_sprite.angle = 90
+        # Timer, score and lives
+        self.hud = make_hud()
 
-            self.all_sprites_list.append(enemy_sprite)
-            self.myobject_list.append(enemy_sprite)
+        # The best runs, on the game over box
+        self.scores_hud = Hud()
+        self.scores_hud.add_label("title", SCORES_X, SCORES_Y, arcade.color.BLACK, 14, 12)
+        for i in range(SHOWN):
+            self.scores_hud.add_label(f"run-{i}", SCORES_X, SCORES_Y - 18 * (i + 1),
+                                      arcade.color.BLACK, 12, 24)
 
-            # Make treasure
+        # Screens that never change are built once
+        self.instructions_screen = self.build_instructions_page()
+        self.game_over_screen = self.build_game_over()
 
-    def create_treasure(self):
-        for i in range(COIN_COUNT):
-            # Create the coin instance
-            # Coin image from kenney.nl
-            coin_sprite = Coin("images\/coin_01.png", SPRITE_SCALING_COIN)
+        # Last frame of the race, kept while the game over box is up
+        self.frozen_frame = FrozenFrame()
 
-            # Position the coin
-            coin_sprite.center_x = random.randrange(250, SCREEN_WIDTH - 250)
-            coin_sprite.center_y = random.randrange(1, SCREEN_HEIGHT - 1)
-            # move it down the road
-            coin_sprite.change_y -= 1
+        # Nitrous exhaust and crash debris, drawn in one batch
+        self.particles = ParticleStore()
+        self.particle_batch = ParticleBatch(self.particles)
 
-            # Add the coin to the lists
-            self.all_sprites_list.append(coin_sprite)
-            self.coin_list.append(coin_sprite)
+        # Seconds spent on game steps since the last frame was drawn, for
+        # the governor
+        self.frame_work = 0.0
 
-    def setup(self):
-        """ Set up the game here. Call this function to restart the game. """
+        # Frame profile, shown with F3, and whether every frame is being
+        # saved (--profile), which keeps the profiler on when it is hidden
+        self.show_profile = False
+        self.saving_profile = False
+        self.profile_hud = make_profile_hud(self.profiler.phases)
 
-        self.total_time = 0.0
+    def load_assets(self):
+        """
+        Start decoding the images in the background, the ones a race needs
+        first, so the instructions page shows up straight away.
+        """
+        self.loading_start_time = time.perf_counter()
+        self.loading_done = False
+        textures.load_atlas()
+        textures.load_in_background(GAME_IMAGES)
+
+    def draw_loading(self):
+        """ A progress bar under the instructions while images are loading """
+        done, total = textures.progress()
+        if done == total:
+            if not self.loading_done:
+                self.loading_done = True
+                print(f"Loaded {total} images in the background in "
+                      f"{(time.perf_counter() - self.loading_start_time) * 1000:.0f} ms")
+            return
+
+        center_x = LOADING_BAR_X + LOADING_BAR_WIDTH / 2
+        arcade.draw_rectangle_filled(center_x, LOADING_BAR_Y, LOADING_BAR_WIDTH, 10,
+                                     arcade.color.DARK_GRAY)
+        filled = LOADING_BAR_WIDTH * done / total
+        arcade.draw_rectangle_filled(LOADING_BAR_X + filled / 2, LOADING_BAR_Y, filled, 10,
+                                     arcade.color.RED)
+        self.loading_hud.set_text("loading", f"Loading {done}/{total}")
+        self.loading_hud.draw()
+
+    def build_instructions_page(self):
+        """
+        Build the instruction page once.
+        """
+        screen = StaticScreen()
+        screen.add_rectangle(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
+                             SCREEN_WIDTH,
+                             SCREEN_HEIGHT + 1000, arcade.color.BLACK)
 
-        self.background = arcade.load_texture("images\\background-1_0 (1).png")
+        # title, instructions
+        screen.add_rectangle(670, 570, 1035, 100, arcade.color.RED)
+        screen.add_rectangle(450, 350, 470, 250, arcade.color.WHITE)
+        screen.add_rectangle(450, 350, 447, 230, arcade.color.BLACK)
+        screen.add_text("STREET RACER XTREME", 168, 525, arcade.color.BLACK, 85)
+        screen.add_text("CLICK TO START GAME!", 760, 330, arcade.color.WHITE, 35)
+        screen.add_text("Coins are 10 points each", 320, 400, arcade.color.WHITE, 20)
+        screen.add_text("Press space to use nitrous", 320, 340, arcade.color.WHITE, 20)
+        screen.add_text("Move with the arrow keys", 320, 280, arcade.color.WHITE, 20)
+        screen.add_text("!! DONT CRASH INTO ANYBODY !!", 350, 100, arcade.color.RED, 40)
+        return screen
 
-        # Create the Sprite lists
-        self.all_sprites_list = arcade.SpriteList()
-        self.player_list = arcade.SpriteList()
-        self.wall_list = arcade.SpriteList()
-        self.coin_list = arcade.SpriteList()
-        self.myobject_list = arcade.SpriteList()
+    def draw_instructions_page(self):
+        """
+        Draw an instruction page.
+        """
+        self.instructions_screen.draw()
 
-        # Set up the player
-        self.gameover = 0
-        self.score = 0
-        self.lives = 4
-        self.collision_time = 0
-        self.numobj = STARTING_OBJECTS_COUNT
-        self.ncoins = COIN_COUNT
-        self.player_sprite = VehicleSprite("images\\bugatti.png",
-                                           CHARACTER_SCALING)
-        self.player_sprite.angle = 90
-        # self.player_sprite.change_y = 1
-        self.all_sprites_list.append(self.player_sprite)
+    def build_game_over(self):
+        """
+        Build the "Game over" box once.
+        """
+        screen = StaticScreen()
+        screen.add_rectangle(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2,
+                             SCREEN_WIDTH // 2,
+                             SCREEN_HEIGHT // 1.5, arcade.color.BRONZE)
+        screen.add_rectangle(SCREEN_WIDTH // 2, 410, 600, 140, arcade.color.COOL_GREY)
+        screen.add_rectangle(SCREEN_WIDTH // 2, 275, 550, 100, arcade.color.COOL_GREY)
 
-        self.create_buddies()
-        self.create_treasure()
+        output = "Oops, You Lost :("
+        screen.add_text(output, 360, 381, arcade.color.BLACK, 66)
 
-        # Make the mouse disappear when it is over the window.
-        # So we just see our object, not the pointer.
+        output = "Click Anywhere To Restart"
+        screen.add_text(output, 375, 258, arcade.color.BLACK, 40)
+        return screen
 
-        # Set the background color
-        arcade.set_background_color(arcade.color.ASH_GREY)
+    # STEP 3: Add this function
+    def draw_game_over(self):
+        """
+        Draw "Game over" across the screen.
+        """
+        self.game_over_screen.draw()
+        if self.high_scores is not None:
+            self.update_scores_hud()
+            self.scores_hud.draw()
+
+    def update_scores_hud(self):
+        """ The best runs, with an arrow at this one if it made the list """
+        self.scores_hud.set_text("title", "High scores")
+        runs = self.high_scores.top(SHOWN)
+        for i in range(SHOWN):
+            text = ""
+            if i < len(runs):
+                text = format_run(i, runs[i])
+                if i == self.high_score_rank:
+                    text += "  <"
+            self.scores_hud.set_text(f"run-{i}", text)
+
+    def setup(self, seed=None):
+        """ Set up the game here. Call this function to restart the game. """
+        super().setup(seed)
 
-        # Set up the player, specifically placing it at these coordinates.
-        # self.player_sprite = arcade.Sprite("images\\carcar.png", CHARACTER_SCALING)
-        # self.player_sprite.center_x = 500
-        # self.player_sprite.center_y = 110
-        # self.player_sprite.angle = 90
-        # self.player_sprite.change_y = 1
-        # self.player_list.append(self.player_sprite)
+        self.background = textures.get_texture("background-1_0 (1).png")
+        self.frozen_frame.clear()
 
-        # Create the 'physics engine'
-        self.physics_engine = arcade.PhysicsEngineSimple(self.player_sprite,
-                                                         self.wall_list)
+        # Set the background color
+        arcade.set_background_color(arcade.color.ASH_GREY)
 
-        # Set the viewport boundaries
-        # These numbers set where we have 'scrolled' to.
-        self.view_left = 0
-        self.view_bottom = 0
+    def restart(self, seed=None):
+        """ Play again, keeping the background and sprites """
+        super().restart(seed)
+        self.frozen_frame.clear()
 
-        # For draw
-        self.line_start = 0
+    def update(self, delta_time):
+        """ Run the game steps, and count how long they took """
+        start_time = time.perf_counter()
+        super().update(delta_time)
+        self.frame_work += time.perf_counter() - start_time
 
     def on_draw(self):
         """ Render the screen. """
+        start_time = time.perf_counter()
 
         # Clear the screen to the background color
         arcade.start_render()
 
         if self.current_state == INSTRUCTIONS_PAGE:
             self.draw_instructions_page()
+            self.draw_loading()
 
         elif self.current_state == GAME_RUNNING:
             self.draw_game()
 
         else:
-            self.draw_game()
+            # Draw the race one last time and keep a copy of it
+            if self.frozen_frame.texture is None:
+                self.draw_game()
+                self.frozen_frame.capture()
+            else:
+                self.frozen_frame.draw()
             self.draw_game_over()
 
+        if self.show_profile:
+            self.draw_profile()
+        self.profiler.end_frame()
+
+        # Only race frames say anything about how much the machine manages
+        if self.current_state == GAME_RUNNING:
+            self.govern(self.frame_work + time.perf_counter() - start_time)
+        self.frame_work = 0.0
+
+        if self.first_frame_time is None:
+            self.first_frame_time = time.perf_counter() - LAUNCH_TIME
+            print(f"First frame after {self.first_frame_time * 1000:.0f} ms")
+
+    def toggle_profile(self):
+        """ Show or hide the frame profile, profiling only while it is needed """
+        self.show_profile = not self.show_profile
+        self.profiler.enabled = self.show_profile or self.saving_profile
+
+    def draw_profile(self):
+        """ Average time of each phase over the last frames, top right """
+        # Change the numbers a few times a second, so they can be read
+        if self.profiler.frame_count % PROFILE_REFRESH_FRAMES == 0:
+            averages = self.profiler.averages()
+            for phase, time_ms in averages.items():
+                self.profile_hud.set_text(phase, f"{phase:>10} {time_ms:6.3f} ms")
+            self.profile_hud.set_text("total", f"{'total':>10} {sum(averages.values()):6.3f} ms")
+        self.profile_hud.draw()
+
     def draw_game(self):
 
         arcade.start_render()
+        profiler = self.profiler
+        profiler.start()
+
+        # How far we are between the last step and the next one
+        blend = 1.0
+        if self.current_state == GAME_RUNNING:
+            blend = self.time_accumulator / FIXED_TIME_STEP
+
+        # Point the camera at the part of the world we have scrolled to
+        view_bottom = self.last_view_bottom + (self.view_bottom - self.last_view_bottom) * blend
+        arcade.set_viewport(self.view_left, self.view_left + SCREEN_WIDTH,
+                            view_bottom, view_bottom + SCREEN_HEIGHT)
 
+        # The background repeats every half screen, so draw it twice
+        line_start = view_bottom % (SCREEN_HEIGHT // 2)
         for x in range(0, 1):
             arcade.draw_texture_rectangle(SCREEN_WIDTH // 2,
-                                          (SCREEN_HEIGHT // 2) - x - self.line_start,
+                                          view_bottom + (SCREEN_HEIGHT // 2) - x - line_start,
                                           SCREEN_WIDTH,
                                           SCREEN_HEIGHT, self.background)
             arcade.draw_texture_rectangle(SCREEN_WIDTH // 2,
-                                          (SCREEN_HEIGHT) - x - self.line_start,
+                                          view_bottom + (SCREEN_HEIGHT) - x - line_start,
                                           SCREEN_WIDTH,
                                           SCREEN_HEIGHT, self.background)
+        profiler.mark("background")
 
-        # Draw our sprites
+        # Draw our sprites where they are between the two steps
+        self.blend_positions(blend)
         self.all_sprites_list.draw()
+        self.restore_positions()
+        profiler.mark("sprites")
+
+        self.particle_batch.draw()
+        profiler.mark("effects")
+
+        # The HUD and the screens on top are drawn where the window is, not
+        # where the camera is
+        arcade.set_viewport(0, SCREEN_WIDTH, 0, SCREEN_HEIGHT)
+
+        self.update_hud()
+        self.hud.draw()
+        profiler.mark("hud")
 
+    def update_hud(self):
+        """ Give the HUD labels their text. Only changed labels redraw. """
         # Calculate minutes
         minutes = int(self.total_time) // 60
 
@@ -362,53 +418,42 @@ class MyGame(arcade.Window):
         output = f"Time: {minutes:02d}:{seconds:02d}"
 
         # Output the timer text.
-        arcade.draw_text(output, 10 + self.view_left, 10 + self.view_bottom,
-                         arcade.color.BLACK, 24)
-        arcade.draw_text(output, 12 + self.view_left, 12 + self.view_bottom,
-                         arcade.color.WHITE_SMOKE, 24)
+        self.hud.set_text("time_shadow", output)
+        self.hud.set_text("time", output)
 
         # Print Score
-        output = f"Score: {self.score:05d}"
-        arcade.draw_text(output, 10 + self.view_left, 45 + self.view_bottom,
-                         arcade.color.AZURE, 24)
+        self.hud.set_text("score", f"Score: {self.score:05d}")
 
         # Print Lives
-        output = f"Lives: {self.lives:01d}"
-        arcade.draw_text(output, 10 + self.view_left, 75 + self.view_bottom,
-                         arcade.color.RED, 24)
+        self.hud.set_text("lives", f"Lives: {self.lives:01d}")
+
+    def blend_positions(self, blend):
+        """ Move sprites part way back to where they were on the last step """
+        self.traffic.sync_sprites(blend, MAX_INTERPOLATE_DISTANCE)
+        self.coins.sync_sprites(blend, MAX_INTERPOLATE_DISTANCE)
+
+        # The player is a normal sprite, so move it and put it back after
+        sprite = self.player_sprite
+        sprite.step_x = sprite.center_x
+        sprite.step_y = sprite.center_y
+
+        last_x = getattr(sprite, "last_x", sprite.center_x)
+        last_y = getattr(sprite, "last_y", sprite.center_y)
+        sprite.center_x = last_x + (sprite.center_x - last_x) * blend
+        sprite.center_y = last_y + (sprite.center_y - last_y) * blend
+
+    def restore_positions(self):
+        """ Put the player back where the game logic left it """
+        sprite = self.player_sprite
+        sprite.center_x = sprite.step_x
+        sprite.center_y = sprite.step_y
 
     def on_key_press(self, key, modifiers):
-        """ Called whenever the user presses a key. """
-        if self.current_state == GAME_RUNNING:
-            if key == arcade.key.LEFT:
-                self.player_sprite.change_x = -MOVEMENT_SPEED
-            elif key == arcade.key.RIGHT:
-                self.player_sprite.change_x = MOVEMENT_SPEED
-            elif key == arcade.key.UP:
-                self.player_sprite.change_y = MOVEMENT_SPEED
-            elif key == arcade.key.DOWN:
-                self.player_sprite.change_y = -MOVEMENT_SPEED
-            elif key == arcade.key.SPACE:
-                self.player_sprite.speed = self.player_sprite.speed + 1
-            elif key == arcade.key.ESCAPE:
-                self.gameover = 0
-                if self.gameover:
-                    self.gameover = 0
-                    self.instruction_screen()
-
-    def on_key_release(self, key, modifiers):
-        """ Called whenever a user releases a key. """
-        if self.current_state == GAME_RUNNING:
-            if key == arcade.key.LEFT or key == arcade.key.RIGHT:
-                self.player_sprite.change_x = 0
-            elif key == arcade.key.UP or key == arcade.key.DOWN:
-                self.player_sprite.change_y = 0
-            elif key == arcade.key.SPACE:
-                self.player_sprite.speed = 0
-            elif key == arcade.key.ESCAPE:
-                if self.gameover:
-                    self.gameover = 0
-                    self.instruction_screen()
+        """ Window keys first, then the game's """
+        if key == PROFILE_KEY:
+            self.toggle_profile()
+            return
+        super().on_key_press(key, modifiers)
 
     def on_mouse_press(self, x, y, button, modifiers):
         """
@@ -417,6 +462,9 @@ class MyGame(arcade.Window):
 
         # Change states as needed.
         if self.current_state == INSTRUCTIONS_PAGE:
+            # Only the race's own images have to be loaded to start
+            textures.wait(GAME_IMAGES)
+
             # Next page of instructions.
             self.current_state = GAME_RUNNING
             # Start the game
@@ -424,76 +472,53 @@ class MyGame(arcade.Window):
             self.current_state = GAME_RUNNING
         elif self.current_state == GAME_OVER:
             # Restart the game.
-            self.setup()
+            self.restart()
             self.current_state = GAME_RUNNING
 
 
-    def update(self, delta_time):
-
-        """ Movement and game logic """
-        if self.current_state == GAME_RUNNING:
-            if self.gameover:
-                return
-
-            self.all_sprites_list.update()
-
-            # Game Clock
-            self.total_time += delta_time
-
-            # flick if it was collision
-            if self.collision_time:
-                if self.collision_time % 2:
-                    self.player_sprite.color = arcade.color.AMAZON
-                else:
-                    self.player_sprite.color = arcade.color.WHITE
-
-            # Call update on all sprites (The sprites don't do much in this
-            # example though.)
-            # self.physics_engine.update()
-
-            # Generate a list of all enemies that collided with the player.
-            ene_hit_list = arcade.check_for_collision_with_list(self.player_sprite,
-                                                            self.myobject_list)
-
-            # Loop through each colliding sprite, remove it, and add to the score.
-            for myobject in ene_hit_list:
-                myobject.remove_from_sprite_lists()
-                self.numobj -= 1
-                self.lives -= 1
-                self.collision_time = 50
-                self.player_sprite.color = arcade.color.AMAZON
-            if (self.numobj < 1):
-                self.numobj = STARTING_OBJECTS_COUNT
-                self.create_buddies()
-
-            if self.lives < 1:
-                self.current_state = GAME_OVER
-
-            # Generate a list of coins that collided with the player.
-            coin_hit_list = arcade.check_for_collision_with_list(self.player_sprite,
-                                                             self.coin_list)
-            for coin in coin_hit_list:
-                coin.remove_from_sprite_lists()
-                self.score += 10
-                self.ncoins -= 1
-            if self.ncoins < 1:
-                self.ncoins = COIN_COUNT
-                self.create_treasure()
-
-            # --- Manage Scrolling ---
-
-            if self.line_start == SCREEN_HEIGHT // 2:
-                self.line_start = 0
-            else:
-                self.line_start = self.line_start + 1
-
-
 def main():
     """ Main method """
+    parser = argparse.ArgumentParser(description=SCREEN_TITLE)
+    parser.add_argument("--seed", type=int, default=None,
+                        help="play the same games every time")
+    parser.add_argument("--record", metavar="FILE",
+                        help="save every game's keys to FILE, to replay later")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time every frame and save the times to FILE (.csv or .json)")
+    parser.add_argument("--scores", metavar="FILE", default=SCORES_FILE,
+                        help="where the high scores are kept")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS, metavar="MS",
+                        help="turn the traffic and effects down when frames take "
+                             "longer than this; 0 never does")
+    parser.add_argument("--governor-log", metavar="FILE",
+                        help="save the governor's decisions to FILE (.csv)")
+    args = parser.parse_args()
+
     window = MyGame()
-    window.setup()
+    window.saving_profile = bool(args.profile)
+    window.profiler.enabled = window.saving_profile
+    window.rng.seed(args.seed)
+    if args.record:
+        from .replay import InputRecorder
+        window.recorder = InputRecorder()
+    window.high_scores = HighScores(args.scores)
+    if args.budget:
+        window.governor = FrameGovernor(args.budget, log_path=args.governor_log)
+
+    # The race is set up when the instructions page is clicked, once its
+    # images are in
     arcade.run()
 
+    # Keep the game that was still going when the window closed
+    if window.recorder is not None:
+        window.recorder.end_game(window)
+        window.recorder.save(args.record)
+
+    if args.profile:
+        window.profiler.save(args.profile)
+
+    window.high_scores.close()
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,165 @@
+"""
+Sprite atlas builder.
+
+The car images are 300 to 600 pixels wide and drawn at a quarter of that,
+and the coin at a fifth, so most of their pixels are never seen. This
+scales each sprite the game draws down to the size it is drawn at, packs
+them all into one image, and writes a manifest saying where each one is:
+
+    FinalProject/atlas/sprites.png
+    FinalProject/atlas/sprites.json
+
+The manifest keeps a SHA-256 of every image it was built from and the scale
+it was built for. Running the builder again does nothing unless one of
+them changed (or --force is given), so it can run on every build.
+
+    python -m FinalProject.atlas
+    python -m FinalProject.atlas --check
+
+--check builds nothing and exits with 1 if the atlas is missing or out of
+date. The game loads the atlas with textures.load_atlas(), and loads any
+image the atlas is out of date for from its own file.
+"""
+import argparse
+import json
+import os
+import sys
+
+import PIL.Image
+
+from . import textures
+from .rules import BUDDY_IMAGES, CHARACTER_SCALING, SPRITE_SCALING_COIN
+
+# Every image a sprite wears, and the scale it is drawn at
+SPRITES = dict.fromkeys(("bugatti.png",) + BUDDY_IMAGES, CHARACTER_SCALING)
+SPRITES["coin_01.png"] = SPRITE_SCALING_COIN
+
+# Empty pixels around every sprite, so scaling on the GPU never picks up
+# a neighbour's edge
+PADDING = 2
+
+# Widest the atlas may be. It grows downwards after that.
+MAX_WIDTH = 2048
+
+# Bump this when the way the atlas is made changes, to rebuild it
+VERSION = 1
+
+
+def display_size(image, scale):
+    """ Size in pixels an image is drawn at, never less than one """
+    return (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+
+
+def pack(sizes, width):
+    """
+    Put rectangles on shelves, tallest first, each shelf as tall as its
+    first one. Returns where each went, by name, and the height used.
+    """
+    places = {}
+    x = y = shelf_height = 0
+    for name, (rect_width, rect_height) in sorted(sizes.items(),
+                                                  key=lambda item: (-item[1][1], item[0])):
+        rect_width += 2 * PADDING
+        rect_height += 2 * PADDING
+        if x and x + rect_width > width:
+            y += shelf_height
+            x = shelf_height = 0
+        places[name] = (x + PADDING, y + PADDING)
+        x += rect_width
+        shelf_height = max(shelf_height, rect_height)
+    return places, y + shelf_height
+
+
+def atlas_width(sizes):
+    """ Smallest power of two wide enough that the atlas comes out about square """
+    area = sum((width + 2 * PADDING) * (height + 2 * PADDING) for width, height in sizes.values())
+    widest = max(width + 2 * PADDING for width, height in sizes.values())
+    width = 1
+    while width < widest or width * width < area:
+        width *= 2
+    return min(width, max(MAX_WIDTH, widest))
+
+
+def sources(sprites=SPRITES):
+    """ What the atlas should be built from: name -> hash and scale """
+    return {name: {"hash": textures.file_hash(name), "scale": scale}
+            for name, scale in sorted(sprites.items())}
+
+
+def up_to_date(manifest_path=textures.ATLAS_MANIFEST, image_path=textures.ATLAS_IMAGE,
+               sprites=SPRITES):
+    """ Whether the atlas was built from exactly these images and scales """
+    if not (os.path.exists(manifest_path) and os.path.exists(image_path)):
+        return False
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+    if manifest.get("version") != VERSION:
+        return False
+    built = {name: {"hash": entry["hash"], "scale": entry["scale"]}
+             for name, entry in manifest["sprites"].items()}
+    return built == sources(sprites)
+
+
+def build(manifest_path=textures.ATLAS_MANIFEST, image_path=textures.ATLAS_IMAGE,
+          sprites=SPRITES):
+    """ Scale, pack and save every sprite, and write the manifest. Returns the manifest. """
+    images = {}
+    sizes = {}
+    for name, scale in sprites.items():
+        image = PIL.Image.open(textures.image_file(name)).convert("RGBA")
+        sizes[name] = display_size(image, scale)
+        images[name] = image
+
+    width = atlas_width(sizes)
+    places, height = pack(sizes, width)
+
+    atlas = PIL.Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    entries = {}
+    for name, (x, y) in sorted(places.items()):
+        image = images[name]
+        atlas.paste(image.resize(sizes[name], PIL.Image.LANCZOS), (x, y))
+        entries[name] = {"x": x, "y": y,
+                         "width": sizes[name][0], "height": sizes[name][1],
+                         "source_width": image.width, "source_height": image.height,
+                         "scale": sprites[name],
+                         "hash": textures.file_hash(name)}
+
+    manifest = {"version": VERSION, "width": width, "height": height, "sprites": entries}
+
+    # Write to new files and swap them in, so the game never reads half
+    # of an atlas
+    os.makedirs(os.path.dirname(image_path), exist_ok=True)
+    atlas.save(image_path + ".new", format="PNG", optimize=True)
+    with open(manifest_path + ".new", "w") as file:
+        json.dump(manifest, file, indent=1, sort_keys=True)
+    os.replace(image_path + ".new", image_path)
+    os.replace(manifest_path + ".new", manifest_path)
+    return manifest
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Build the sprite atlas.")
+    parser.add_argument("--force", action="store_true", help="build it even if it is up to date")
+    parser.add_argument("--check", action="store_true",
+                        help="only say whether it is up to date; exits with 1 if not")
+    args = parser.parse_args()
+
+    if up_to_date() and not args.force:
+        print(f"Sprite atlas is up to date: {textures.ATLAS_IMAGE}")
+        return
+    if args.check:
+        print("Sprite atlas is missing or out of date, run python -m FinalProject.atlas")
+        sys.exit(1)
+
+    manifest = build()
+    full = sum(entry["source_width"] * entry["source_height"]
+               for entry in manifest["sprites"].values())
+    print(f"Built {textures.ATLAS_IMAGE}: {len(manifest['sprites'])} sprites, "
+          f"{manifest['width']}x{manifest['height']} pixels, "
+          f"{manifest['width'] * manifest['height'] * 4 / 1024:.0f} KiB in memory "
+          f"instead of {full * 4 / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
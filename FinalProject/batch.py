@@ -0,0 +1,172 @@
+"""
+Batch runner.
+
+Plays many headless games at once, one per CPU core, and sums up how they
+went: scores, lives left and how long the player lasted. Good for
+balancing, where one game says nothing but a few thousand do.
+
+    python -m FinalProject.batch --games 2000 --seed 1 --out games.csv
+
+Every game gets its own seed, made from the batch seed and the game's
+number, so a game plays out the same whichever worker gets it and however
+many workers there are. Games are handed out in small batches and each
+result is written out as soon as it comes back.
+
+The games are the real game: GameLogic.restart() and the same fixed steps
+update() takes, with a driver pressing keys.
+"""
+import argparse
+import concurrent.futures
+import csv
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+from .rules import GAME_RUNNING, FIXED_TIME_STEP
+from .sim import HeadlessGame
+
+# Stop a game that is still going after this many steps (5 minutes)
+MAX_STEPS = 5 * 60 * 60
+
+# Games handed to a worker at a time
+GAMES_PER_TASK = 10
+
+# What is kept about each game, in this order
+FIELDS = ("game", "seed", "score", "lives", "steps", "seconds", "finished")
+
+# The game each worker process plays its games on, made once per process
+_game = None
+
+
+def game_seed(seed, number):
+    """ The seed of game 'number' in a batch """
+    return random.Random(f"{seed}-{number}").getrandbits(32)
+
+
+def start_worker(driver, cars, coins):
+    """ Set up a worker process: load the images and make its game """
+    global _game
+    _game = HeadlessGame(driver, cars, coins)
+
+
+def play_game(game, seed, max_steps=MAX_STEPS):
+    """ Play one game to the end (or max_steps) and return how it went """
+    game.driver_rng.seed(seed)
+    game.held_key = None
+    game.restart(seed)
+    game.current_state = GAME_RUNNING
+
+    while game.current_state == GAME_RUNNING and game.steps < max_steps:
+        game.drive()
+        game.step()
+
+    return (game.score, game.lives, game.steps, round(game.steps * FIXED_TIME_STEP, 3),
+            game.current_state != GAME_RUNNING)
+
+
+def play_games(seed, first, count, max_steps=MAX_STEPS):
+    """ Play games first to first + count - 1 of a batch in this worker """
+    results = []
+    for number in range(first, first + count):
+        this_seed = game_seed(seed, number)
+        results.append((number, this_seed) + play_game(_game, this_seed, max_steps))
+    return results
+
+
+def run_batch(games, seed, driver="random", cars=None, coins=None,
+              workers=None, max_steps=MAX_STEPS):
+    """
+    Play the games on a pool of worker processes. Yields each game's
+    result as soon as it is done, in whatever order they finish.
+    """
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=start_worker,
+            initargs=(driver, cars, coins)) as executor:
+        tasks = [executor.submit(play_games, seed, first,
+                                 min(GAMES_PER_TASK, games - first), max_steps)
+                 for first in range(0, games, GAMES_PER_TASK)]
+        for task in concurrent.futures.as_completed(tasks):
+            yield from task.result()
+
+
+def summarize(results):
+    """ Spread of each number over the games """
+    columns = np.array([result[2:6] for result in results], dtype=float)
+    summary = {"games": len(results),
+               "finished": sum(1 for result in results if result[6])}
+    for i, name in enumerate(("score", "lives", "steps", "seconds")):
+        values = columns[:, i]
+        p10, p50, p90 = np.percentile(values, (10, 50, 90))
+        summary[name] = {"mean": float(values.mean()), "std": float(values.std()),
+                         "min": float(values.min()), "p10": float(p10),
+                         "p50": float(p50), "p90": float(p90),
+                         "max": float(values.max())}
+    return summary
+
+
+def print_summary(summary):
+    """ One line per number """
+    print(f"Games:        {summary['games']} ({summary['finished']} ran out of lives)")
+    print(f"{'':14}{'mean':>9}{'std':>9}{'min':>9}{'p10':>9}{'p50':>9}{'p90':>9}{'max':>9}")
+    for name in ("score", "lives", "steps", "seconds"):
+        stats = summary[name]
+        print(f"{name:14}" + "".join(f"{stats[stat]:9.1f}" for stat in
+                                      ("mean", "std", "min", "p10", "p50", "p90", "max")))
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Play many headless games in parallel.")
+    parser.add_argument("--games", type=int, default=1000, help="number of games to play")
+    parser.add_argument("--driver", choices=("idle", "random"), default="random",
+                        help="who is at the wheel")
+    parser.add_argument("--cars", type=int, default=None,
+                        help="competitors on the road at once")
+    parser.add_argument("--coins", type=int, default=None,
+                        help="coins on each chunk of road")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="play the same games every time")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes, one per CPU core if left out")
+    parser.add_argument("--max-steps", type=int, default=MAX_STEPS,
+                        help="stop a game after this many steps")
+    parser.add_argument("--out", metavar="FILE", help="write every game to a CSV file")
+    args = parser.parse_args()
+
+    seed = args.seed if args.seed is not None else random.getrandbits(32)
+    workers = args.workers or os.cpu_count()
+    print(f"Playing {args.games} games on {workers} workers, batch seed {seed}")
+
+    out_file = writer = None
+    if args.out:
+        out_file = open(args.out, "w", newline="")
+        writer = csv.writer(out_file)
+        writer.writerow(FIELDS)
+
+    results = []
+    start_time = time.perf_counter()
+    for result in run_batch(args.games, seed, args.driver, args.cars, args.coins,
+                            workers, args.max_steps):
+        results.append(result)
+        if writer is not None:
+            writer.writerow(result)
+        if len(results) % 100 == 0:
+            print(f"\r{len(results)}/{args.games} games", end="", file=sys.stderr, flush=True)
+    elapsed = time.perf_counter() - start_time
+    print(file=sys.stderr)
+
+    if out_file is not None:
+        out_file.close()
+
+    if results:
+        print_summary(summarize(results))
+    steps = sum(result[4] for result in results)
+    print(f"Time:         {elapsed:.2f} s, {len(results) / elapsed:.1f} games/s, "
+          f"{steps / elapsed:.0f} steps/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+"""
+Frame cost benchmark.
+
+Plays scripted scenarios (how many competitors and coins, and how the
+player drives) and times each part of a step: moving everything, the crash
+check against traffic, the coin check and the particles (nitrous exhaust
+and crash debris, which the crowded scenarios make a lot of). With --draw
+it also opens a window and times draw_game. Each scenario reports p50 and p99 in
+milliseconds.
+
+Only a dozen or so competitors fit on the screen with room between them,
+so the "road" scenarios time the traffic model on its own instead: a long
+road packed with cars in every lane, all of them driving each step.
+
+    python -m FinalProject.bench run --out baseline.json
+    python -m FinalProject.bench compare baseline.json
+
+    python -m FinalProject.bench restart
+
+restart times setup() against restart() after a game has been played, and
+counts what each one throws away that the GPU would have to be sent again:
+new sprite lists, and calls that drop a list's buffers (adding or removing
+a sprite, or giving one a new texture). Without a window no buffers are
+ever made, so that is as far as it can see. With --draw it restarts between
+two drawn frames and counts the buffers, textures and shader programs
+arcade really makes.
+
+compare runs the scenarios again (or reads a second results file) and exits
+with 1 if any p50 or p99 got slower than the baseline by more than the
+threshold. Drawing needs a display; on a machine without one, use a virtual
+one such as xvfb-run, which draws in software. Without --draw, run and
+compare never import arcade.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+from .particles import ParticleStore
+from .rules import GameLogic, GAME_RUNNING, PARKING_X, KEY_LEFT, KEY_RIGHT, KEY_SPACE
+
+# name: (competitors, coins, driver)
+SCENARIOS = {
+    "idle": (7, 6, "idle"),
+    "weaving": (7, 6, "weaving"),
+    "nitrous": (7, 6, "nitrous"),
+    "busy-weaving": (50, 20, "weaving"),
+    "crowded-weaving": (500, 100, "weaving"),
+    "crowded-nitrous": (500, 100, "nitrous"),
+    "huge-weaving": (5000, 1000, "weaving"),
+    "road-100": (100, 1, "road"),
+    "road-1000": (1000, 1, "road"),
+}
+
+# Steps to play before timing, so the road fills up
+WARM_UP_STEPS = 120
+STEPS = 2000
+
+# Slower than the baseline by more than this fraction is a regression
+THRESHOLD = 0.25
+
+# ... and by more than this many milliseconds. Phases that take a few
+# microseconds jump around by more than 25% from run to run.
+NOISE_FLOOR = 0.05
+
+# Weaving changes direction this often, in steps
+WEAVE_STEPS = 30
+
+# Distance between cars in the same lane on the road scenarios, in pixels
+ROAD_SPACING = 250
+
+PHASES = ("move", "crashes", "coins", "particles", "update", "traffic", "draw")
+
+# Games played for each of setup() and restart() when timing them, and the
+# steps of each game before it starts over
+RESTART_RUNS = 20
+RESTART_STEPS = 300
+
+# The game's sprite lists, each drawn with its own GPU buffers
+SPRITE_LISTS = ("all_sprites_list", "player_list", "wall_list", "coin_list", "myobject_list")
+
+# What arcade makes on the GPU, counted while a restart is drawn
+GL_OBJECTS = ("buffer", "vertex_array", "texture", "program")
+
+# Sprite list calls that throw its buffers away, to be made again on the
+# next draw
+LIST_CHANGES = ("append", "remove", "pop", "update_texture")
+
+
+class BenchGame(GameLogic):
+    """ The game without a window, but with the window's particles """
+
+    def __init__(self):
+        super().__init__()
+        self.particles = ParticleStore(seed=1)
+
+
+def drive(game, driver, step):
+    """ Press the keys the scenario's driver would press before this step """
+    if driver == "weaving":
+        if step % WEAVE_STEPS == 0:
+            if step // WEAVE_STEPS % 2:
+                game.on_key_release(KEY_LEFT, 0)
+                game.on_key_press(KEY_RIGHT, 0)
+            else:
+                game.on_key_release(KEY_RIGHT, 0)
+                game.on_key_press(KEY_LEFT, 0)
+    elif driver == "nitrous":
+        if step == 0:
+            game.on_key_press(KEY_SPACE, 0)
+
+
+def play_road(game, steps):
+    """ Drive a road full of cars and return the seconds each step took """
+    traffic = game.traffic
+    for index in np.flatnonzero(traffic.active[:traffic.count]).tolist():
+        traffic.kill(index)
+
+    # No player in the way
+    traffic.set_obstacle(PARKING_X, 0, 0, 0, 0)
+
+    rng = random.Random(1)
+    lanes = len(traffic.lane_x)
+    for index in range(traffic.count):
+        traffic.spawn_car(index, index % lanes, index // lanes * ROAD_SPACING,
+                          rng.uniform(4, 10))
+
+    times = {phase: [] for phase in PHASES}
+    for step in range(WARM_UP_STEPS + steps):
+        start_time = time.perf_counter()
+        traffic.remember()
+        traffic.update()
+        end_time = time.perf_counter()
+        if step >= WARM_UP_STEPS:
+            times["traffic"].append(end_time - start_time)
+    return times
+
+
+def play_scenario(game, cars, coins, driver, steps, draw=False):
+    """ Play one scenario and return the seconds each phase took on each step """
+    if draw:
+        import arcade
+        import pyglet
+
+    game.objects_count = cars
+    game.coin_count = coins
+    game.setup(1)
+    if driver == "road":
+        return play_road(game, steps)
+    game.current_state = GAME_RUNNING
+
+    # Never run out of lives, so the whole run is one game
+    game.lives = 1000000
+
+    times = {phase: [] for phase in PHASES}
+    for step in range(WARM_UP_STEPS + steps):
+        drive(game, driver, step)
+        game.remember_positions()
+
+        # The same phases as GameLogic.step()
+        start_time = time.perf_counter()
+        game.move_all()
+        moved_time = time.perf_counter()
+        game.check_crashes()
+        crashed_time = time.perf_counter()
+        game.collect_coins()
+        coins_time = time.perf_counter()
+        game.update_particles()
+        end_time = time.perf_counter()
+
+        if draw:
+            arcade.start_render()
+            game.draw_game()
+            pyglet.gl.glFinish()
+            draw_time = time.perf_counter() - end_time
+            game.flip()
+
+        if step < WARM_UP_STEPS:
+            continue
+        times["move"].append(moved_time - start_time)
+        times["crashes"].append(crashed_time - moved_time)
+        times["coins"].append(coins_time - crashed_time)
+        times["particles"].append(end_time - coins_time)
+        times["update"].append(end_time - start_time)
+        if draw:
+            times["draw"].append(draw_time)
+
+    return times
+
+
+def sprite_lists(game):
+    return [getattr(game, name) for name in SPRITE_LISTS]
+
+
+def draw_frame(game):
+    """ Draw one frame and wait for the GPU to finish it """
+    import arcade
+    import pyglet
+
+    arcade.start_render()
+    game.draw_game()
+    pyglet.gl.glFinish()
+    game.flip()
+
+
+class Counting:
+    """ Counts calls to some functions of a module or class inside a with block """
+
+    def __init__(self, owner, names):
+        self.owner = owner
+        self.names = names
+
+    def __enter__(self):
+        self.counts = dict.fromkeys(self.names, 0)
+        self.originals = {name: getattr(self.owner, name) for name in self.names}
+        for name, original in self.originals.items():
+            setattr(self.owner, name, self.counting(name, original))
+        return self.counts
+
+    def counting(self, name, original):
+        def call(*args, **kwargs):
+            self.counts[name] += 1
+            return original(*args, **kwargs)
+        return call
+
+    def __exit__(self, *exc_info):
+        for name, original in self.originals.items():
+            setattr(self.owner, name, original)
+
+
+def play_a_while(game):
+    """ Play a game on nitrous so there is traffic and coins to clear """
+    game.current_state = GAME_RUNNING
+    game.on_key_press(KEY_SPACE, 0)
+    for step in range(RESTART_STEPS):
+        game.step()
+    game.on_key_release(KEY_SPACE, 0)
+
+
+def time_restarts(game, start):
+    """ Seconds start(seed) took after each of RESTART_RUNS games """
+    times = []
+    for seed in range(RESTART_RUNS):
+        play_a_while(game)
+        start_time = time.perf_counter()
+        start(seed)
+        times.append(time.perf_counter() - start_time)
+    return times
+
+
+def count_restart(game, start, draw=False):
+    """
+    What the GPU would have to be sent again after start(): new sprite
+    lists, calls that drop a list's buffers and, with draw, everything
+    arcade made to draw the frame after it.
+    """
+    import arcade
+
+    play_a_while(game)
+    lists = sprite_lists(game)
+
+    if draw:
+        draw_frame(game)
+    with Counting(arcade.SpriteList, LIST_CHANGES) as changes, \
+            Counting(arcade.shader, GL_OBJECTS) as made:
+        start(1)
+        if draw:
+            draw_frame(game)
+
+    counts = {"new_lists": sum(1 for old, new in zip(lists, sprite_lists(game))
+                               if old is not new)}
+    counts.update(changes)
+    if draw:
+        counts.update(made)
+    return counts
+
+
+def run_restart(draw=False):
+    """ setup() against restart(): how long each takes and what it throws away """
+    if draw:
+        from .RacingGame import MyGame
+        game = MyGame()
+    else:
+        # The window's sprites and lists, just not drawn
+        from .RacingGame import SpriteGame
+        game = SpriteGame()
+    game.setup(0)
+
+    results = {}
+    for name, start in (("setup", game.setup), ("restart", game.restart)):
+        result = summarize(time_restarts(game, start))
+        result.update(count_restart(game, start, draw))
+        results[name] = result
+
+        counts = "  ".join(f"{key} {value}" for key, value in result.items()
+                           if key not in ("p50", "p99"))
+        print(f"{name:8} {result['p50']:.3f}/{result['p99']:.3f} ms  {counts}")
+
+    if draw:
+        game.close()
+    return results
+
+
+def summarize(samples):
+    """ p50 and p99 of a list of seconds, in milliseconds """
+    samples = np.array(samples) * 1000
+    return {"p50": round(float(np.percentile(samples, 50)), 4),
+            "p99": round(float(np.percentile(samples, 99)), 4)}
+
+
+def run(names, steps, draw=False):
+    """ Run scenarios and return the results, ready to save as JSON """
+    if draw:
+        from .RacingGame import MyGame
+        game = MyGame()
+    else:
+        game = BenchGame()
+
+    results = {"python": platform.python_version(),
+               "machine": platform.machine(),
+               "steps": steps,
+               "scenarios": {}}
+    for name in names:
+        cars, coins, driver = SCENARIOS[name]
+        times = play_scenario(game, cars, coins, driver, steps, draw)
+
+        result = {"cars": cars, "coin_count": coins, "driver": driver}
+        for phase in PHASES:
+            if times[phase]:
+                result[phase] = summarize(times[phase])
+        results["scenarios"][name] = result
+
+        print_scenario(name, result)
+
+    if draw:
+        game.close()
+    return results
+
+
+def print_scenario(name, result):
+    """ One line per scenario, p50/p99 of each phase """
+    columns = []
+    for phase in PHASES:
+        if phase in result:
+            columns.append(f"{phase} {result[phase]['p50']:.3f}/{result[phase]['p99']:.3f}")
+    print(f"{name:16} " + "  ".join(columns))
+
+
+def compare(baseline, current, threshold):
+    """ Lines describing every phase that got slower than allowed """
+    regressions = []
+    for name, old in baseline["scenarios"].items():
+        new = current["scenarios"].get(name)
+        if new is None:
+            continue
+        for phase in PHASES:
+            if phase not in old or phase not in new:
+                continue
+            for stat in ("p50", "p99"):
+                limit = max(old[phase][stat] * (1 + threshold),
+                            old[phase][stat] + NOISE_FLOOR)
+                if new[phase][stat] > limit:
+                    regressions.append(f"{name} {phase} {stat}: {new[phase][stat]:.3f} ms, "
+                                       f"baseline {old[phase][stat]:.3f} ms")
+    return regressions
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Time the game's frames in set scenarios.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the scenarios")
+    run_parser.add_argument("--out", help="save the results to this JSON file")
+
+    compare_parser = commands.add_parser("compare", help="check for regressions")
+    compare_parser.add_argument("baseline", help="results saved with run --out")
+    compare_parser.add_argument("current", nargs="?",
+                                help="results to check; runs the scenarios if left out")
+    compare_parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                                help="allowed slowdown, 0.25 is 25%%")
+
+    restart_parser = commands.add_parser("restart", help="time setup() against restart()")
+    restart_parser.add_argument("--out", help="save the results to this JSON file")
+
+    for sub_parser in (run_parser, compare_parser):
+        sub_parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS,
+                                default=list(SCENARIOS))
+        sub_parser.add_argument("--steps", type=int, default=STEPS)
+        sub_parser.add_argument("--draw", action="store_true",
+                                help="also time draw_game (needs a display)")
+    restart_parser.add_argument("--draw", action="store_true",
+                                help="count what arcade makes on the GPU (needs a display)")
+    args = parser.parse_args()
+
+    if args.command == "restart":
+        results = run_restart(args.draw)
+        if args.out:
+            with open(args.out, "w") as file:
+                json.dump(results, file, indent=2)
+        return
+
+    if args.command == "run":
+        results = run(args.scenarios, args.steps, args.draw)
+        if args.out:
+            with open(args.out, "w") as file:
+                json.dump(results, file, indent=2)
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    if args.current:
+        with open(args.current) as file:
+            current = json.load(file)
+    else:
+        names = [name for name in args.scenarios if name in baseline["scenarios"]]
+        current = run(names, args.steps, args.draw)
+
+    regressions = compare(baseline, current, args.threshold)
+    for line in regressions:
+        print("SLOWER", line)
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
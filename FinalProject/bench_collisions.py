@@ -0,0 +1,104 @@
+"""
+Collision benchmark.
+
+Puts more and more competitors on a long stretch of road, at the same
+density as the real game, and times how long it takes to find what hits the
+player: with arcade's check_for_collision_with_list (looks at every car
+where it is now) and with the sweep the game runs on the entity store
+(finds every car the player touched during its last step, looking only at
+the cars near it in the store's rows sorted up the road). The store's
+time should stay flat however many cars there are, apart from the
+cars it hits, which each cost a closer look; 'near' is how many rows it
+looked at. The last column is what keeping the rows sorted costs: one
+step of moving every car.
+
+    python -m FinalProject.bench_collisions
+"""
+import argparse
+import random
+import time
+
+import arcade
+
+from .RacingGame import OthersSprite, VehicleSprite, make_sprite
+from .rules import (BUDDY_IMAGES, CHARACTER_SCALING, OBJECTS_SPEED, PLAYER_MOVEMENT_SPEED,
+                    SCREEN_WIDTH, SCREEN_HEIGHT, STARTING_OBJECTS_COUNT)
+from . import hitboxes, textures
+from .entities import EntityStore, half_size
+
+# How many times to run each check
+REPEATS = 200
+
+
+def make_road(count):
+    """
+    Competitors spread over a road long enough that each screen has as
+    many cars as the normal game.
+    """
+    road_length = SCREEN_HEIGHT * max(1, count / STARTING_OBJECTS_COUNT)
+
+    sprite_list = arcade.SpriteList()
+    store = EntityStore(count)
+    for i in range(count):
+        sprite = make_sprite(OthersSprite, [random.choice(BUDDY_IMAGES)], CHARACTER_SCALING)
+        sprite.angle = 90
+        hitboxes.apply(sprite)
+        sprite.center_x = random.randrange(250, SCREEN_WIDTH - 250)
+        sprite.center_y = random.uniform(0, road_length)
+        sprite_list.append(sprite)
+        store.spawn(store.add(sprite), sprite.center_x, sprite.center_y, change_y=-OBJECTS_SPEED)
+
+    return sprite_list, store
+
+
+def time_check(check, repeats):
+    """ Average seconds for one call """
+    start_time = time.perf_counter()
+    for i in range(repeats):
+        check()
+    return (time.perf_counter() - start_time) / repeats
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Time player collisions against traffic.")
+    parser.add_argument("counts", type=int, nargs="*", default=[7, 50, 200, 1000, 5000],
+                        help="numbers of competitors to try")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    args = parser.parse_args()
+
+    random.seed(1)
+    textures.load_atlas()
+    textures.preload()
+    player = make_sprite(VehicleSprite, ["bugatti.png"], CHARACTER_SCALING)
+    player.angle = 90
+    hitboxes.apply(player)
+    player.center_x = SCREEN_WIDTH / 2
+    player.center_y = SCREEN_HEIGHT / 2
+    # Where the player was a step ago, steering to the right
+    start_x = player.center_x - PLAYER_MOVEMENT_SPEED
+    start_y = player.center_y
+
+    print(f"{'cars':>6} {'list (us)':>10} {'store (us)':>10} {'hits':>6} {'near':>6} {'move (us)':>10}")
+    for count in args.counts:
+        sprite_list, store = make_road(count)
+
+        list_time = time_check(
+            lambda: arcade.check_for_collision_with_list(player, sprite_list),
+            args.repeats)
+        store_time = time_check(
+            lambda: store.sweep_for_collision(player, start_x, start_y), args.repeats)
+
+        hits = len(store.sweep_for_collision(player, start_x, start_y))
+        near = len(store.rows_near(min(start_y, player.center_y),
+                                   max(start_y, player.center_y), half_size(player)[1]))
+
+        # Last, as it moves the cars away
+        move_time = time_check(store.move, args.repeats)
+
+        print(f"{count:6d} {list_time * 1e6:10.1f} {store_time * 1e6:10.1f} {hits:6d} {near:6d} "
+              f"{move_time * 1e6:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+HUD drawing benchmark.
+
+Draws the timer, score and lives for a number of frames the old way (four
+arcade.draw_text calls) and with the cached Hud, with the clock ticking at
+60 frames per second, and prints the average time per frame for each. This
+needs a display.
+
+    python -m FinalProject.bench_hud --frames 600
+
+With --headless nothing is drawn. It plays the same frames, with coins
+being picked up and the F3 profile refreshing, and times the work that
+doesn't need the GPU: the text draw_text rasterizes for every string it
+hasn't seen, against the Hud's set_text. It also counts how often arcade
+would rebuild each HUD's sprite buffer: once for every glyph swapped, as
+labels did before they dropped the buffer, against once per frame now.
+
+    python -m FinalProject.bench_hud --headless --frames 3600
+"""
+import argparse
+import random
+import time
+
+import arcade
+import pyglet
+
+from .hud import text_sprite
+from .profiler import PHASES
+from .RacingGame import (MyGame, FIXED_TIME_STEP, PROFILE_REFRESH_FRAMES, make_hud,
+                         make_profile_hud)
+from .rules import COIN_POINTS, STARTING_LIVES
+
+# In the headless race, how often a coin is picked up and a life lost
+COIN_FRAMES = 90
+CRASH_FRAMES = 600
+
+
+def draw_text_hud(game):
+    """ The HUD as it used to be drawn, every frame from scratch """
+    minutes = int(game.total_time) // 60
+    seconds = int(game.total_time) % 60
+    output = f"Time: {minutes:02d}:{seconds:02d}"
+    arcade.draw_text(output, 10, 10, arcade.color.BLACK, 24)
+    arcade.draw_text(output, 12, 12, arcade.color.WHITE_SMOKE, 24)
+    arcade.draw_text(f"Score: {game.score:05d}", 10, 45, arcade.color.AZURE, 24)
+    arcade.draw_text(f"Lives: {game.lives:01d}", 10, 75, arcade.color.RED, 24)
+
+
+def draw_cached_hud(game):
+    """ The HUD as drawn by the game now """
+    game.update_hud()
+    game.hud.draw()
+
+
+def hud_texts(total_time, score, lives):
+    """ The HUD's strings, as update_hud writes them """
+    minutes = int(total_time) // 60
+    seconds = int(total_time) % 60
+    output = f"Time: {minutes:02d}:{seconds:02d}"
+    return {"time_shadow": output, "time": output,
+            "score": f"Score: {score:05d}", "lives": f"Lives: {lives:01d}"}
+
+
+def set_texts(hud, texts):
+    """
+    Give a Hud's labels their text, and count the glyphs that got a new
+    texture
+    """
+    before = [sprite.texture for sprite in hud.sprite_list]
+    for name, text in texts.items():
+        hud.set_text(name, text)
+    return sum(old is not sprite.texture for old, sprite in zip(before, hud.sprite_list))
+
+
+def headless(frames):
+    """ Play the HUD for some frames without drawing, see above """
+    random.seed(1)
+    game_hud = make_hud()
+    profile_hud = make_profile_hud(PHASES)
+    colors = {name: label.sprites[0].color for name, label in game_hud.labels.items()}
+
+    # Strings draw_text has rasterized, by text and color like its cache
+    seen = set()
+    raster_time = 0.0
+    hud_time = 0.0
+    swaps = {"hud": 0, "profile": 0}
+    rebuilds = {"hud": 0, "profile": 0}
+    most = {"hud": 0, "profile": 0}
+
+    score = 0
+    lives = STARTING_LIVES
+    for frame in range(frames):
+        if frame % COIN_FRAMES == COIN_FRAMES - 1:
+            score += COIN_POINTS
+        if frame % CRASH_FRAMES == CRASH_FRAMES - 1:
+            lives = max(1, lives - 1)
+        texts = hud_texts(frame * FIXED_TIME_STEP, score, lives)
+
+        start_time = time.perf_counter()
+        for name, text in texts.items():
+            if (text, colors[name]) not in seen:
+                seen.add((text, colors[name]))
+                text_sprite(text, 0, 0, colors[name], 24)
+        raster_time += time.perf_counter() - start_time
+
+        start_time = time.perf_counter()
+        swapped = set_texts(game_hud, texts)
+        hud_time += time.perf_counter() - start_time
+        swaps["hud"] += swapped
+        rebuilds["hud"] += swapped > 0
+        most["hud"] = max(most["hud"], swapped)
+
+        if frame % PROFILE_REFRESH_FRAMES == 0:
+            averages = {phase: random.uniform(0.01, 3.0) for phase in PHASES}
+            texts = {phase: f"{phase:>10} {time_ms:6.3f} ms" for phase, time_ms in averages.items()}
+            texts["total"] = f"{'total':>10} {sum(averages.values()):6.3f} ms"
+            start_time = time.perf_counter()
+            swapped = set_texts(profile_hud, texts)
+            hud_time += time.perf_counter() - start_time
+            swaps["profile"] += swapped
+            rebuilds["profile"] += swapped > 0
+            most["profile"] = max(most["profile"], swapped)
+
+    refreshes = (frames + PROFILE_REFRESH_FRAMES - 1) // PROFILE_REFRESH_FRAMES
+    print(f"{frames} frames, no display")
+    print(f"draw_text rasterizing: {raster_time / frames * 1e6:8.1f} us/frame")
+    print(f"Hud set_text:          {hud_time / frames * 1e6:8.1f} us/frame")
+    print(f"HUD buffer rebuilds:     {swaps['hud']} before, {rebuilds['hud']} now "
+          f"(up to {most['hud']} in one frame before)")
+    print(f"F3 profile rebuilds:     {swaps['profile']} before, {rebuilds['profile']} now "
+          f"in {refreshes} refreshes (up to {most['profile']} in one frame before)")
+
+
+def time_frames(game, draw, frames):
+    """ Average seconds per frame, waiting for the GPU to finish each one """
+    game.total_time = 0.0
+    start_time = time.perf_counter()
+    for i in range(frames):
+        arcade.start_render()
+        draw(game)
+        pyglet.gl.glFinish()
+        game.total_time += FIXED_TIME_STEP
+    return (time.perf_counter() - start_time) / frames
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Time drawing the HUD.")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--headless", action="store_true",
+                        help="time only the work that doesn't need a display")
+    args = parser.parse_args()
+
+    if args.headless:
+        headless(args.frames)
+        return
+
+    game = MyGame()
+    game.setup()
+
+    # Warm up both, so first-time rasterizing isn't counted
+    time_frames(game, draw_text_hud, 60)
+    time_frames(game, draw_cached_hud, 60)
+
+    text_time = time_frames(game, draw_text_hud, args.frames)
+    hud_time = time_frames(game, draw_cached_hud, args.frames)
+    game.close()
+
+    print(f"draw_text: {text_time * 1000:.3f} ms/frame")
+    print(f"Hud:       {hud_time * 1000:.3f} ms/frame")
+    print(f"Saved:     {(text_time - hud_time) * 1000:.3f} ms/frame")
+
+
+if __name__ == "__main__":
+    main()
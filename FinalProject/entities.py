@@ -0,0 +1,377 @@
+"""
+Entity store.
+
+Keeps the positions, speeds and flags of a group of sprites in NumPy arrays,
+one row per sprite, so a whole group moves with a few array operations
+instead of one Python method call per sprite. The arcade sprites are only
+told where they are when it is time to draw them (or when the player might
+be touching them).
+
+Collisions use the arrays too. The store keeps its rows sorted up the road,
+so sweep_for_collision() finds the rows near the player with two binary
+searches and runs a bounding box test on just those, however long the road
+is. Sorting again after each move is cheap, as the rows were in order the
+step before and hardly any pass each other, and it is less work than
+keeping a grid of cells up to date when thousands of sprites move every
+step. A store with only a few rows (the normal game's) just tests them
+all. The boxes are around the sprites' hit boxes, so for hit boxes that
+are plain rectangles the box test is all there is to do.
+
+It also looks between steps. A car on nitrous can move further in one step
+than a car is long, and a test at the end of the step would miss what it
+drove through, so the boxes are swept along how the sprite and each row
+moved, and it finds the moment they first touched.
+"""
+import math
+
+import numpy as np
+
+from .hitboxes import polygons_intersect
+
+# Stores with fewer rows than this aren't kept sorted: looking at every row
+# costs less than the sorting and searching, which take a few microseconds
+# each however few rows there are
+SORTED_ROWS = 64
+
+
+def half_size(sprite):
+    """
+    Half the width and height of the box around a sprite's hit box, or
+    around the sprite as drawn (turned by its angle) if it has none.
+    """
+    box = getattr(sprite, "hit_box", None)
+    if box is not None:
+        return box.half_width, box.half_height
+
+    angle = math.radians(sprite.angle)
+    cos = abs(math.cos(angle))
+    sin = abs(math.sin(angle))
+    return ((sprite.width * cos + sprite.height * sin) / 2,
+            (sprite.width * sin + sprite.height * cos) / 2)
+
+
+def outline_points(sprite, center_x=None, center_y=None):
+    """
+    Corners of a sprite's hit box where it is now, the same as arcade's
+    sprite.points, or moved to be centred on center_x, center_y.
+    """
+    if center_x is None:
+        center_x, center_y = sprite.center_x, sprite.center_y
+
+    box = getattr(sprite, "hit_box", None)
+    if box is None:
+        shift_x = center_x - sprite.center_x
+        shift_y = center_y - sprite.center_y
+        return [(x + shift_x, y + shift_y) for x, y in sprite.points]
+    return [(x + center_x, y + center_y) for x, y in box.points]
+
+
+def overlap_times(gap, move, reach):
+    """
+    Along one axis: when something that starts 'gap' away and moves by
+    'move' over the step is less than 'reach' away. Returns the times it
+    gets there and leaves again, in steps from the start. Never is
+    (inf, -inf) and always is (-inf, inf).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first = (-reach - gap) / move
+        second = (reach - gap) / move
+    still = move == 0
+    inside = np.abs(gap) < reach
+    enter = np.where(still, np.where(inside, -np.inf, np.inf), np.minimum(first, second))
+    leave = np.where(still, np.where(inside, np.inf, -np.inf), np.maximum(first, second))
+    return enter, leave
+
+
+class EntityStore:
+    """
+    A fixed number of rows, each tied to one sprite. Subclasses say how the
+    rows move in move().
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.count = 0
+        self.sprites = []
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.change_x = np.zeros(capacity)
+        self.change_y = np.zeros(capacity)
+        self.active = np.zeros(capacity, dtype=bool)
+
+        # Where each row was one step ago, for smooth drawing
+        self.last_x = np.zeros(capacity)
+        self.last_y = np.zeros(capacity)
+
+        # Half the size of the box around each sprite's hit box
+        self.half_width = np.zeros(capacity)
+        self.half_height = np.zeros(capacity)
+
+        # The rows in order up the road, with their y, and the biggest
+        # half height and speed of any row, to find the rows near a point
+        # without looking at the rest. Sorted again after every move, and
+        # when it is needed after rows were put in or taken out.
+        self.order = np.zeros(0, dtype=int)
+        self.sorted_y = np.zeros(0)
+        self.most_half_height = 0.0
+        self.most_change_y = 0.0
+        self.rows_sorted = False
+
+    def __len__(self):
+        return self.count
+
+    def add(self, sprite):
+        """ Give a sprite a row. It stays inactive until spawn() """
+        if self.count == self.capacity:
+            raise ValueError(f"Entity store is full ({self.capacity} rows)")
+
+        index = self.count
+        self.count += 1
+        self.sprites.append(sprite)
+        sprite.index = index
+
+        self.x[index] = self.last_x[index] = sprite.center_x
+        self.y[index] = self.last_y[index] = sprite.center_y
+        self.measure(index)
+        self.rows_sorted = False
+        return index
+
+    def measure(self, index):
+        """ Read the sprite's size, which changes with its texture """
+        self.half_width[index], self.half_height[index] = half_size(self.sprites[index])
+
+    def spawn(self, index, x, y, change_x=0.0, change_y=0.0):
+        """ Put a row into the game """
+        sprite = self.sprites[index]
+        self.measure(index)
+
+        self.x[index] = self.last_x[index] = x
+        self.y[index] = self.last_y[index] = y
+        self.change_x[index] = change_x
+        self.change_y[index] = change_y
+        self.active[index] = True
+        self.rows_sorted = False
+
+        sprite.activate()
+        sprite.set_position(x, y)
+
+    def free_index(self, start=0, stop=None):
+        """
+        A row that is not in the game, or None if they all are. Only rows
+        from start up to stop are looked at, if given.
+        """
+        if stop is None:
+            stop = self.count
+        free = np.flatnonzero(~self.active[start:stop])
+        if len(free) == 0:
+            return None
+        return start + int(free[0])
+
+    def active_count(self):
+        """ How many rows are in the game """
+        return int(np.count_nonzero(self.active[:self.count]))
+
+    def kill(self, index):
+        """ Take a row out of the game and hide its sprite """
+        sprite = self.sprites[index]
+        sprite.deactivate()
+        self.active[index] = False
+        self.change_x[index] = 0
+        self.change_y[index] = 0
+        self.x[index] = self.last_x[index] = sprite.center_x
+        self.y[index] = self.last_y[index] = sprite.center_y
+        self.rows_sorted = False
+
+    def reset(self):
+        """ Take every row out of the game, keeping the sprites for next time """
+        for index in np.flatnonzero(self.active[:self.count]).tolist():
+            self.kill(index)
+
+    def retire_outside(self, bottom, top=None):
+        """
+        Kill every active row that is completely below 'bottom' or above
+        'top', so its sprite can be used again.
+        """
+        count = self.count
+        y = self.y[:count]
+        half_height = self.half_height[:count]
+        outside = y + half_height < bottom
+        if top is not None:
+            outside |= y - half_height > top
+        outside &= self.active[:count]
+        if outside.any():
+            for index in np.flatnonzero(outside).tolist():
+                self.kill(index)
+
+    def remember(self):
+        """ Save where every row is before the next step """
+        count = self.count
+        self.last_x[:count] = self.x[:count]
+        self.last_y[:count] = self.y[:count]
+
+    def update(self):
+        """ Move every active row one step """
+        self.move()
+
+    def move(self):
+        """ Override to move the rows """
+        count = self.count
+        self.x[:count] += self.change_x[:count]
+        self.y[:count] += self.change_y[:count]
+        if count >= SORTED_ROWS:
+            self.sort_rows()
+
+    def sort_rows(self):
+        """
+        Put the rows in order up the road again. They were in order last
+        step and few pass each other, so sorting them starting from that
+        order is almost one pass over them.
+        """
+        count = self.count
+        order = self.order
+        if len(order) != count:
+            order = np.arange(count)
+        y = self.y[order]
+        by_y = np.argsort(y, kind="stable")
+        self.order = order[by_y]
+        self.sorted_y = y[by_y]
+        if count:
+            self.most_half_height = float(self.half_height[:count].max())
+            self.most_change_y = float(np.abs(self.change_y[:count]).max())
+        self.rows_sorted = True
+
+    def rows_near(self, low, high, reach):
+        """
+        Rows, in row order, whose y could be within reach of somewhere
+        between low and high, counting their own half height and how far
+        they moved this step. Two binary searches in the sorted rows, or
+        every row in a small store.
+        """
+        if self.count < SORTED_ROWS:
+            return np.arange(self.count)
+        if not self.rows_sorted:
+            self.sort_rows()
+        reach += self.most_half_height + self.most_change_y
+        first = np.searchsorted(self.sorted_y, low - reach, side="left")
+        last = np.searchsorted(self.sorted_y, high + reach, side="right")
+        return np.sort(self.order[first:last])
+
+    def sweep_for_collision(self, sprite, start_x, start_y):
+        """
+        Active sprites this one touched at any moment of the last step, as
+        (sprite, time) pairs, soonest first. time is how far into the step
+        they first touched, from 0 to 1.
+
+        The sprite went in a straight line from start_x, start_y to where
+        it is now, and each row from x - change_x, y - change_y to x, y.
+        Seen from the row, the sprite moves by the difference of the two,
+        and the time its box is inside the row's on both axes is worked
+        out exactly, however far either went.
+        """
+        half_width, half_height = half_size(sprite)
+
+        # Only the rows up and down the road from the sprite's path are
+        # looked at, however many there are further away
+        rows = self.rows_near(min(start_y, sprite.center_y),
+                              max(start_y, sprite.center_y), half_height)
+        x = self.x[rows]
+        y = self.y[rows]
+        change_x = self.change_x[rows]
+        change_y = self.change_y[rows]
+        reach_x = self.half_width[rows] + half_width
+        reach_y = self.half_height[rows] + half_height
+
+        # Only rows whose path comes near the sprite's path at all are
+        # worth timing; that is rarely more than one or two. Each path is
+        # a box around its middle, half the move wide.
+        move_x = sprite.center_x - start_x
+        move_y = sprite.center_y - start_y
+        near = np.flatnonzero(
+            self.active[rows]
+            & (np.abs(x - change_x / 2 - (start_x + move_x / 2))
+               < reach_x + np.abs(change_x / 2) + abs(move_x / 2))
+            & (np.abs(y - change_y / 2 - (start_y + move_y / 2))
+               < reach_y + np.abs(change_y / 2) + abs(move_y / 2)))
+        if not len(near):
+            return []
+
+        gap_x = start_x - (x[near] - change_x[near])
+        gap_y = start_y - (y[near] - change_y[near])
+        enter_x, leave_x = overlap_times(gap_x, move_x - change_x[near], reach_x[near])
+        enter_y, leave_y = overlap_times(gap_y, move_y - change_y[near], reach_y[near])
+        enter = np.maximum(enter_x, enter_y).tolist()
+        leave = np.minimum(leave_x, leave_y).tolist()
+
+        box = getattr(sprite, "hit_box", None)
+        is_box = box is not None and box.is_box
+
+        hits = []
+        for index, enter, leave in zip(rows[near].tolist(), enter, leave):
+            if not (enter < leave and enter < 1 and leave > 0):
+                continue
+            other = self.sprites[index]
+            other.set_position(float(self.x[index]), float(self.y[index]))
+            first = max(enter, 0.0)
+
+            other_box = getattr(other, "hit_box", None)
+            if not (is_box and other_box is not None and other_box.is_box):
+                # The boxes met, but the outlines may not have
+                first = self.outline_time(sprite, start_x, start_y, index,
+                                          first, min(leave, 1.0))
+                if first is None:
+                    continue
+            hits.append((other, first))
+
+        hits.sort(key=lambda hit: hit[1])
+        return hits
+
+    def outline_time(self, sprite, start_x, start_y, index, first, last):
+        """
+        First time between first and last that the outlines of the sprite
+        and a row overlap, or None. Looks often enough that neither moves
+        more than half its size between looks.
+        """
+        other = self.sprites[index]
+        start_other_x = self.x[index] - self.change_x[index]
+        start_other_y = self.y[index] - self.change_y[index]
+        move_x = sprite.center_x - start_x - self.change_x[index]
+        move_y = sprite.center_y - start_y - self.change_y[index]
+
+        smallest = min(self.half_width[index], self.half_height[index], *half_size(sprite))
+        distance = math.hypot(move_x, move_y) * (last - first)
+        looks = max(1, math.ceil(distance / max(smallest, 1.0)))
+        for i in range(looks + 1):
+            time = first + (last - first) * i / looks
+            sprite_points = outline_points(sprite, start_x + (sprite.center_x - start_x) * time,
+                                           start_y + (sprite.center_y - start_y) * time)
+            other_points = outline_points(
+                other, float(start_other_x + self.change_x[index] * time),
+                float(start_other_y + self.change_y[index] * time))
+            if polygons_intersect(sprite_points, other_points):
+                return time
+        return None
+
+    def sync_sprites(self, blend=1.0, max_jump=None):
+        """
+        Copy the positions into the sprites so they can be drawn. With a
+        blend below 1 they are drawn part way between the last step and
+        this one, except for rows that jumped further than max_jump.
+        """
+        count = self.count
+        x = self.x[:count]
+        y = self.y[:count]
+
+        if blend < 1:
+            last_x = self.last_x[:count]
+            last_y = self.last_y[:count]
+            smooth = np.ones(count, dtype=bool)
+            if max_jump is not None:
+                smooth = (np.abs(x - last_x) <= max_jump) & (np.abs(y - last_y) <= max_jump)
+            x = np.where(smooth, last_x + (x - last_x) * blend, x)
+            y = np.where(smooth, last_y + (y - last_y) * blend, y)
+
+        x = x.tolist()
+        y = y.tolist()
+        for index in np.flatnonzero(self.active[:count]).tolist():
+            self.sprites[index].set_position(x[index], y[index])
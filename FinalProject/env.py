@@ -0,0 +1,455 @@
+"""
+Training environment.
+
+Wraps the game for driving agents, the way Gym environments look:
+
+    env = RacingEnv()
+    observation, info = env.reset(seed=1)
+    observation, reward, terminated, truncated, info = env.step(action)
+
+An action is which key the agent holds down this step, see ACTIONS.
+Changing the action lets go of the old key and presses the new one, the
+same as on_key_press() and on_key_release() do for a player.
+
+An observation is a flat float32 array: the player (where it is on the
+road and how it is moving, and its lives), then the NEAREST_CARS nearest
+competitors and the NEAREST_COINS nearest coins, closest first, as
+positions relative to the player. Rows for cars or coins that aren't there
+are all zero, including their first column, which is 1 for one that is.
+
+The reward is one for each coin picked up and -LIFE_PENALTY for each life
+lost. An episode ends when the game is over, or is cut off after
+max_steps.
+
+VectorRacingEnv hands back N games as batched arrays. It is a serial
+wrapper: step() still steps the games one after another in this process,
+so it is no faster than N RacingEnvs, it only saves the agent the batching.
+The arrays are made once and filled in place every step, and a finished
+game starts over by itself.
+
+SubprocessVectorEnv is the parallel one. It has the same API, with the
+games split between worker processes, one per CPU core, the way batch.py
+splits a batch. Each worker
+keeps a VectorRacingEnv of its share of the games for as long as the env
+lives, and fills its rows of arrays shared with the main process, so a
+step only sends one byte to each worker and gets one back. The same seed
+plays the same games as VectorRacingEnv, however many workers there are.
+
+    python -m FinalProject.env --envs 16 --steps 20000
+    python -m FinalProject.env --envs 64 --steps 200000 --workers 8
+
+plays random actions and prints how many steps per second that gets.
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import time
+
+import numpy as np
+
+from .rules import (GameLogic, GAME_RUNNING, GAME_OVER, SCREEN_WIDTH, SCREEN_HEIGHT,
+                    MOVEMENT_SPEED, OBJECTS_SPEED, ROAD_SPEED, STARTING_LIVES, ROAD_LEFT, ROAD_RIGHT,
+                    COIN_POINTS, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN, KEY_SPACE)
+
+# What each action holds down
+ACTIONS = (None, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN, KEY_SPACE)
+ACTION_NAMES = ("nothing", "left", "right", "up", "down", "nitrous")
+
+# How many of the nearest cars and coins are in an observation
+NEAREST_CARS = 8
+NEAREST_COINS = 4
+
+# Columns for the player, each car (there?, x, y, change_x, change_y) and
+# each coin (there?, x, y)
+PLAYER_COLUMNS = 6
+CAR_COLUMNS = 5
+COIN_COLUMNS = 3
+OBSERVATION_SIZE = (PLAYER_COLUMNS + NEAREST_CARS * CAR_COLUMNS
+                    + NEAREST_COINS * COIN_COLUMNS)
+
+# What losing a life costs, in coins
+LIFE_PENALTY = 5
+
+# Cut an episode off after this many steps (5 minutes)
+MAX_STEPS = 5 * 60 * 60
+
+# Half the width of the road, for putting x between -1 and 1
+ROAD_HALF_WIDTH = (ROAD_RIGHT - ROAD_LEFT) / 2
+
+# The arrays a vector env fills, one row per game: name, columns (None for
+# one number per game) and type
+VECTOR_ARRAYS = (
+    ("observations", OBSERVATION_SIZE, np.float32),
+    ("final_observations", OBSERVATION_SIZE, np.float32),
+    ("rewards", None, np.float32),
+    ("terminated", None, bool),
+    ("truncated", None, bool),
+    ("scores", None, np.int64),
+    ("lives", None, np.int64),
+    ("episodes", None, np.int64),
+)
+
+# What SubprocessVectorEnv tells its workers to do
+STEP = b"s"
+RESET = b"r"
+CLOSE = b"c"
+
+
+def vector_arrays(count, buffer=None, fields=VECTOR_ARRAYS):
+    """
+    The arrays of a vector env of 'count' games, by name, and how many
+    bytes they take. With a buffer they are laid out one after the other
+    in it, so processes sharing the buffer share the arrays.
+    """
+    arrays = {}
+    offset = 0
+    for name, columns, dtype in fields:
+        shape = (count,) if columns is None else (count, columns)
+        items = count * (columns or 1)
+        if buffer is None:
+            arrays[name] = np.zeros(shape, dtype=dtype)
+        else:
+            arrays[name] = np.frombuffer(buffer, dtype, items, offset).reshape(shape)
+        # Keep every array lined up on 8 bytes
+        offset += -(-items * np.dtype(dtype).itemsize // 8) * 8
+    return arrays, offset
+
+
+def nearest(store, center_x, center_y, out):
+    """
+    Fill out (one row per car or coin) with the active rows of a store
+    nearest to a point, closest first. Rows that are left stay zero.
+    """
+    count = store.count
+    dx = store.x[:count] - center_x
+    dy = store.y[:count] - center_y
+    distance = np.where(store.active[:count], dx * dx + dy * dy, np.inf)
+
+    wanted = len(out)
+    if count > wanted:
+        rows = np.argpartition(distance, wanted)[:wanted]
+        rows = rows[np.argsort(distance[rows])]
+    else:
+        rows = np.argsort(distance)
+    found = int(np.isfinite(distance[rows]).sum())
+    rows = rows[:found]
+
+    out[found:] = 0
+    out[:found, 0] = 1
+    out[:found, 1] = dx[rows] / SCREEN_WIDTH
+    out[:found, 2] = dy[rows] / SCREEN_HEIGHT
+    if out.shape[1] > 3:
+        # How they move on the screen, so road speed is standing still
+        out[:found, 3] = store.change_x[rows] / OBJECTS_SPEED
+        out[:found, 4] = (store.change_y[rows] - ROAD_SPEED) / OBJECTS_SPEED
+
+
+def observe(game, out):
+    """ Write what the agent sees of a game into out """
+    player = game.player_sprite
+    out[0] = (player.center_x - SCREEN_WIDTH / 2) / ROAD_HALF_WIDTH
+    out[1] = (player.center_y - game.view_bottom) / SCREEN_HEIGHT
+    out[2] = player.change_x / MOVEMENT_SPEED
+    out[3] = player.change_y / MOVEMENT_SPEED
+    out[4] = player.speed / player.max_speed
+    out[5] = game.lives / STARTING_LIVES
+
+    cars_end = PLAYER_COLUMNS + NEAREST_CARS * CAR_COLUMNS
+    nearest(game.traffic, player.center_x, player.center_y,
+            out[PLAYER_COLUMNS:cars_end].reshape(NEAREST_CARS, CAR_COLUMNS))
+    nearest(game.coins, player.center_x, player.center_y,
+            out[cars_end:].reshape(NEAREST_COINS, COIN_COLUMNS))
+
+
+class RacingEnv:
+    """ One game, one agent """
+
+    action_count = len(ACTIONS)
+    observation_shape = (OBSERVATION_SIZE,)
+
+    def __init__(self, cars=None, coins=None, max_steps=MAX_STEPS, game=None):
+        self.game = game or GameLogic()
+        if cars is not None:
+            self.game.objects_count = cars
+        if coins is not None:
+            self.game.coin_count = coins
+        self.max_steps = max_steps
+
+        self.held_key = None
+        self.observation = np.zeros(OBSERVATION_SIZE, dtype=np.float32)
+        self.info = {"score": 0, "lives": 0, "steps": 0, "seed": None}
+
+    def reset(self, seed=None):
+        """ Start a new game. Returns the first observation and an info dict """
+        game = self.game
+        game.restart(seed)
+        game.current_state = GAME_RUNNING
+        self.held_key = None
+
+        observe(game, self.observation)
+        return self.observation, self.update_info()
+
+    def hold(self, action):
+        """ Hold down the key of an action, letting go of the last one """
+        key = ACTIONS[action]
+        if key == self.held_key:
+            return
+        if self.held_key is not None:
+            self.game.on_key_release(self.held_key, 0)
+        if key is not None:
+            self.game.on_key_press(key, 0)
+        self.held_key = key
+
+    def step(self, action):
+        """
+        Hold the action's key for one step. Returns the observation, the
+        reward, whether the game is over, whether it was cut off and an
+        info dict. The arrays and dict are reused on the next call.
+        """
+        game = self.game
+        score = game.score
+        lives = game.lives
+
+        self.hold(action)
+        game.step()
+
+        reward = ((game.score - score) / COIN_POINTS
+                  - (lives - game.lives) * LIFE_PENALTY)
+        terminated = game.current_state == GAME_OVER
+        truncated = not terminated and game.steps >= self.max_steps
+
+        observe(game, self.observation)
+        return self.observation, reward, terminated, truncated, self.update_info()
+
+    def update_info(self):
+        info = self.info
+        info["score"] = self.game.score
+        info["lives"] = self.game.lives
+        info["steps"] = self.game.steps
+        info["seed"] = self.game.run_seed
+        return info
+
+
+class VectorRacingEnv:
+    """
+    N games behind one set of arrays. reset() and step() return arrays with
+    one row per game. A game that ends starts a new one straight away: its
+    row then shows the new game, and the last observation of the one that
+    ended is in final_observations.
+
+    The games are stepped one at a time in a Python loop; for stepping
+    them in parallel use SubprocessVectorEnv.
+    """
+
+    action_count = len(ACTIONS)
+
+    def __init__(self, count, cars=None, coins=None, max_steps=MAX_STEPS, seed=None,
+                 arrays=None):
+        self.count = count
+        self.observation_shape = (count, OBSERVATION_SIZE)
+        self.envs = [RacingEnv(cars, coins, max_steps) for i in range(count)]
+
+        # Seeds for each game's first episode, after that each game picks
+        # its own from its dice
+        self.seeds = random.Random(seed).sample(range(2 ** 32), count)
+
+        # Arrays from vector_arrays(), made here unless we are given some
+        if arrays is None:
+            arrays, size = vector_arrays(count)
+        self.observations = arrays["observations"]
+        self.final_observations = arrays["final_observations"]
+        self.rewards = arrays["rewards"]
+        self.terminated = arrays["terminated"]
+        self.truncated = arrays["truncated"]
+        self.scores = arrays["scores"]
+        self.lives = arrays["lives"]
+        self.episodes = arrays["episodes"]
+
+        # Each game writes its observations straight into its row
+        for i, env in enumerate(self.envs):
+            env.observation = self.observations[i]
+
+    def reset(self):
+        """ Start every game. Returns the observations and an info dict """
+        for i, env in enumerate(self.envs):
+            env.game.rng.seed(self.seeds[i])
+            env.reset(self.seeds[i])
+        self.episodes[:] = 0
+        return self.observations, self.update_info()
+
+    def step(self, actions):
+        """
+        Step every game with its action, one after another. Returns
+        observations, rewards, terminated, truncated and an info dict, all
+        filled in place.
+        """
+        for i, env in enumerate(self.envs):
+            observation, reward, terminated, truncated, info = env.step(actions[i])
+            self.rewards[i] = reward
+            self.terminated[i] = terminated
+            self.truncated[i] = truncated
+            if terminated or truncated:
+                self.final_observations[i] = observation
+                self.episodes[i] += 1
+                env.reset()
+        return (self.observations, self.rewards, self.terminated, self.truncated,
+                self.update_info())
+
+    def update_info(self):
+        for i, env in enumerate(self.envs):
+            self.scores[i] = env.game.score
+            self.lives[i] = env.game.lives
+        return {"score": self.scores, "lives": self.lives, "episodes": self.episodes,
+                "final_observation": self.final_observations}
+
+    def close(self):
+        """ Nothing to let go of, the games are in this process """
+
+
+def run_worker(connection, buffer, count, start, stop, seeds, cars, coins, max_steps):
+    """
+    Worker process of a SubprocessVectorEnv: plays games start to stop - 1
+    in their rows of the shared arrays, whenever it is told to
+    """
+    arrays, size = vector_arrays(count, buffer, SubprocessVectorEnv.fields)
+    env = VectorRacingEnv(stop - start, cars, coins, max_steps,
+                          arrays={name: array[start:stop] for name, array in arrays.items()})
+    env.seeds = seeds
+    actions = arrays["actions"][start:stop]
+
+    while True:
+        command = connection.recv_bytes()
+        if command == STEP:
+            env.step(actions)
+        elif command == RESET:
+            env.reset()
+        else:
+            break
+        connection.send_bytes(command)
+    connection.close()
+
+
+class SubprocessVectorEnv:
+    """
+    VectorRacingEnv with the games split between worker processes. Returns
+    the same arrays, filled in place, and plays the same games from the
+    same seed. Call close() when done, to stop the workers.
+    """
+
+    action_count = len(ACTIONS)
+
+    # The shared arrays: the vector env's, and the actions for the workers
+    fields = VECTOR_ARRAYS + (("actions", None, np.int64),)
+
+    def __init__(self, count, cars=None, coins=None, max_steps=MAX_STEPS, seed=None,
+                 workers=None):
+        self.count = count
+        self.observation_shape = (count, OBSERVATION_SIZE)
+        workers = max(1, min(workers or os.cpu_count(), count))
+
+        # One block of memory for every array, shared with the workers
+        arrays, size = vector_arrays(count, fields=self.fields)
+        self.buffer = multiprocessing.RawArray("B", size)
+        arrays, size = vector_arrays(count, self.buffer, self.fields)
+        self.observations = arrays["observations"]
+        self.final_observations = arrays["final_observations"]
+        self.rewards = arrays["rewards"]
+        self.terminated = arrays["terminated"]
+        self.truncated = arrays["truncated"]
+        self.scores = arrays["scores"]
+        self.lives = arrays["lives"]
+        self.episodes = arrays["episodes"]
+        self.actions = arrays["actions"]
+
+        # The same seeds VectorRacingEnv would give each game
+        seeds = random.Random(seed).sample(range(2 ** 32), count)
+
+        # As even a share of the games as we can for each worker
+        self.connections = []
+        self.processes = []
+        bounds = [count * i // workers for i in range(workers + 1)]
+        for start, stop in zip(bounds, bounds[1:]):
+            connection, worker_connection = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=run_worker, daemon=True,
+                args=(worker_connection, self.buffer, count, start, stop, seeds[start:stop],
+                      cars, coins, max_steps))
+            process.start()
+            worker_connection.close()
+            self.connections.append(connection)
+            self.processes.append(process)
+
+        self.info = {"score": self.scores, "lives": self.lives, "episodes": self.episodes,
+                     "final_observation": self.final_observations}
+
+    def tell_workers(self, command):
+        """ Have every worker do something at once and wait for all of them """
+        for connection in self.connections:
+            connection.send_bytes(command)
+        for connection in self.connections:
+            connection.recv_bytes()
+
+    def reset(self):
+        """ Start every game. Returns the observations and an info dict """
+        self.tell_workers(RESET)
+        return self.observations, self.info
+
+    def step(self, actions):
+        """
+        Step every game with its action. Returns observations, rewards,
+        terminated, truncated and an info dict, all filled in place.
+        """
+        self.actions[:] = actions
+        self.tell_workers(STEP)
+        return self.observations, self.rewards, self.terminated, self.truncated, self.info
+
+    def close(self):
+        """ Stop the workers """
+        for connection in self.connections:
+            connection.send_bytes(CLOSE)
+            connection.close()
+        for process in self.processes:
+            process.join()
+        self.connections = []
+        self.processes = []
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Play random actions and time the environment.")
+    parser.add_argument("--envs", type=int, default=16, help="games stepped together")
+    parser.add_argument("--steps", type=int, default=20000, help="steps in total")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="worker processes to play the games on; 0 plays them all here")
+    args = parser.parse_args()
+
+    if args.workers:
+        env = SubprocessVectorEnv(args.envs, seed=args.seed, workers=args.workers)
+    else:
+        env = VectorRacingEnv(args.envs, seed=args.seed)
+    env.reset()
+    rng = np.random.default_rng(args.seed)
+    actions = np.zeros(args.envs, dtype=np.int64)
+
+    total_reward = 0.0
+    batches = max(1, args.steps // args.envs)
+    start_time = time.perf_counter()
+    for i in range(batches):
+        # A random agent that keeps its action for a while, like a player
+        change = rng.random(args.envs) < 1 / 15
+        actions[change] = rng.integers(0, env.action_count, change.sum())
+        observations, rewards, terminated, truncated, info = env.step(actions)
+        total_reward += float(rewards.sum())
+    elapsed = time.perf_counter() - start_time
+    env.close()
+
+    steps = batches * args.envs
+    print(f"Steps:        {steps} in {elapsed:.2f} s, {steps / elapsed:.0f} steps/s")
+    print(f"Episodes:     {int(env.episodes.sum())}")
+    print(f"Reward:       {total_reward:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Frame-time governor.
+
+The same game runs on fast and slow machines. Instead of tuning the
+constants for each one, the governor watches how long each frame takes
+(the game steps plus drawing) and turns the load down when frames go over
+budget and back up when there is room to spare.
+
+The load goes in LEVELS, from lightest to full. Each level says how much
+of the road's traffic shows up (fewer cars sent out, and fewer on the road
+at once) and how many particles the effects make.
+
+It doesn't flip back and forth:
+
+- It goes by the 90th percentile of the last WINDOW_FRAMES frames, so one
+  slow frame doesn't count for anything.
+- It turns the load down once that is over the budget, but only turns it
+  back up when it is under FAST_FRACTION of the budget. In between, it
+  leaves it alone.
+- After each change it waits for a whole window of frames at the new level
+  before deciding again, and longer before turning the load up.
+- Every time a level turns out to be too much, it waits twice as long
+  before trying that level again, up to MAX_UP_HOLD_FRAMES. A machine that
+  can nearly manage a level tries it less and less often.
+
+Every change is printed and kept in 'decisions', and can be written to a
+CSV file, so a run on a new machine shows which level it settled on and why.
+
+    python -m FinalProject.RacingGame --budget 16.7 --governor-log load.csv
+    python -m FinalProject.sim --budget 0.2 --record run.txt
+"""
+import collections
+import csv
+
+# (share of the traffic, share of the particles), lightest first
+LEVELS = (
+    (0.25, 0.0),
+    (0.5, 0.25),
+    (0.75, 0.5),
+    (1.0, 1.0),
+)
+
+# Time a frame may take, in ms: 60 frames a second
+BUDGET_MS = 1000 / 60
+
+# Frames it looks at, and which one of them counts, slowest first
+WINDOW_FRAMES = 60
+PERCENTILE = 0.9
+
+# Turn the load up only when frames are this far under the budget
+FAST_FRACTION = 0.6
+
+# Frames to wait before trying a heavier level, and the most it ever waits
+UP_HOLD_FRAMES = 120
+MAX_UP_HOLD_FRAMES = 3600
+
+# Columns of the decisions file
+LOG_FIELDS = ("frame", "frame_ms", "budget_ms", "old_level", "new_level",
+              "traffic", "effects", "reason")
+
+
+class Decision:
+    """ One change of load, and why """
+
+    def __init__(self, frame, frame_ms, budget_ms, old_level, new_level, reason):
+        self.frame = frame
+        self.frame_ms = frame_ms
+        self.budget_ms = budget_ms
+        self.old_level = old_level
+        self.new_level = new_level
+        self.reason = reason
+
+    def describe(self):
+        traffic, effects = LEVELS[self.new_level]
+        return (f"Governor: frames {self.frame_ms:.2f} ms, budget {self.budget_ms:.2f} ms, "
+                f"{self.reason}: level {self.old_level} -> {self.new_level} "
+                f"(traffic {traffic:.0%}, effects {effects:.0%})")
+
+
+class FrameGovernor:
+    """ Picks the load level from how long the last frames took """
+
+    def __init__(self, budget_ms=BUDGET_MS, level=None, log_path=None, verbose=True):
+        self.budget_ms = budget_ms
+        self.level = len(LEVELS) - 1 if level is None else level
+        self.times = collections.deque(maxlen=WINDOW_FRAMES)
+        self.frame = 0
+
+        # Frames to wait before trying each level, doubled every time it
+        # was too much, and how many are left before the next one up
+        self.level_hold = [UP_HOLD_FRAMES] * len(LEVELS)
+        self.up_wait = 0
+
+        self.decisions = []
+        self.log_path = log_path
+        self.verbose = verbose
+        if log_path is not None:
+            with open(log_path, "w", newline="") as file:
+                csv.writer(file).writerow(LOG_FIELDS)
+
+    def settings(self):
+        """ (share of the traffic, share of the particles) at the current level """
+        return LEVELS[self.level]
+
+    def add_frame(self, seconds):
+        """
+        How long a frame took. Returns the new level if the load should
+        change, or None.
+        """
+        self.frame += 1
+        self.times.append(seconds * 1000)
+        if self.up_wait:
+            self.up_wait -= 1
+        if len(self.times) < WINDOW_FRAMES:
+            return None
+
+        frame_ms = sorted(self.times)[int(PERCENTILE * (WINDOW_FRAMES - 1))]
+        if frame_ms > self.budget_ms and self.level > 0:
+            return self.change(self.level - 1, frame_ms, "over budget")
+        if (frame_ms < self.budget_ms * FAST_FRACTION and self.level < len(LEVELS) - 1
+                and not self.up_wait):
+            return self.change(self.level + 1, frame_ms, "room to spare")
+        return None
+
+    def change(self, level, frame_ms, reason):
+        """ Go to a new level, and write down why """
+        if level < self.level:
+            # This level was too much: try it less often
+            hold = min(self.level_hold[self.level] * 2, MAX_UP_HOLD_FRAMES)
+            self.level_hold[self.level] = hold
+            reason += f", not trying level {self.level} again for {hold} frames"
+
+        decision = Decision(self.frame, frame_ms, self.budget_ms, self.level, level, reason)
+        self.decisions.append(decision)
+        self.level = level
+
+        # Start measuring afresh at the new level
+        self.times.clear()
+        if level + 1 < len(LEVELS):
+            self.up_wait = self.level_hold[level + 1]
+
+        if self.verbose:
+            print(decision.describe())
+        if self.log_path is not None:
+            traffic, effects = LEVELS[level]
+            with open(self.log_path, "a", newline="") as file:
+                csv.writer(file).writerow((decision.frame, round(frame_ms, 3), round(self.budget_ms, 3),
+                                           decision.old_level, level, traffic, effects, reason))
+        return level
@@ -0,0 +1,259 @@
+"""
+Hit boxes.
+
+arcade works out a sprite's hit box (its rotated rectangle) again every
+time the sprite moves, with four rotations, and the rectangle includes
+the transparent corners of the car and coin images.
+
+Here the shape of each image is worked out once, in one of two ways:
+
+    box      the smallest rectangle around the opaque pixels. At the
+             angles the game uses (0 and 90) it lines up with the screen,
+             so a bounding box test is the whole collision test.
+    outline  the convex hull of the opaque pixels, cut down to a few
+             corners. Closer to the real shape, but pairs that get close
+             still need a polygon test.
+
+For each texture, scale and angle the shape is scaled and rotated once,
+and every sprite that wears that texture shares it. The shapes can also be
+saved next to the images, so they don't have to be worked out again on the
+next start.
+
+    python -m FinalProject.hitboxes
+
+works out every shape and saves them.
+"""
+import json
+import math
+import os
+import time
+
+import numpy as np
+
+from . import textures
+
+# Where the outlines are saved
+CACHE_FILE = os.path.join(textures.IMAGE_DIR, "hitboxes.json")
+
+# Pixels with at least this much alpha count as solid
+ALPHA_THRESHOLD = 128
+
+# Most corners an outline can keep
+MAX_POINTS = 8
+
+# "box" or "outline", see above
+SHAPE = "box"
+SHAPES = ("box", "outline")
+
+# (name, shape) -> corners in image pixels, from the middle of the image
+_outlines = {}
+
+# (name, shape, scale, angle) -> HitBox
+_hit_boxes = {}
+
+
+class HitBox:
+    """ An outline moved into place for one scale and angle """
+
+    def __init__(self, points):
+        self.points = tuple(points)
+
+        # Half the size of the box around the outline
+        self.half_width = max(abs(x) for x, y in self.points)
+        self.half_height = max(abs(y) for x, y in self.points)
+
+        # A rectangle lined up with the screen needs no more testing than
+        # its bounding box
+        self.is_box = (len(self.points) == 4
+                       and len({x for x, y in self.points}) == 2
+                       and len({y for x, y in self.points}) == 2)
+
+
+def convex_hull(points):
+    """ Corners of the convex hull, counter-clockwise (monotone chain) """
+    points = sorted(set(points))
+    if len(points) < 3:
+        return points
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for point in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+
+    upper = []
+    for point in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+
+    return lower[:-1] + upper[:-1]
+
+
+def simplify(hull, max_points=MAX_POINTS):
+    """
+    Drop corners until there are at most max_points, each time the one
+    whose triangle with its neighbours is smallest.
+    """
+    hull = list(hull)
+    while len(hull) > max_points:
+        smallest = None
+        for i in range(len(hull)):
+            a, b, c = hull[i - 1], hull[i], hull[(i + 1) % len(hull)]
+            area = abs((b[0] - a[0]) * (c[1] - a[1]) - (c[0] - a[0]) * (b[1] - a[1]))
+            if smallest is None or area < smallest[0]:
+                smallest = (area, i)
+        del hull[smallest[1]]
+    return hull
+
+
+def image_outline(image, shape):
+    """
+    Corners of the solid part of an image, in pixels from its middle, with
+    y going up like in arcade.
+    """
+    alpha = np.array(image.convert("RGBA"))[:, :, 3] >= ALPHA_THRESHOLD
+    height, width = alpha.shape
+
+    if shape == "box":
+        rows = np.flatnonzero(alpha.any(axis=1))
+        columns = np.flatnonzero(alpha.any(axis=0))
+        if len(rows) == 0:
+            rows = columns = np.array([0, max(width, height) - 1])
+        left = int(columns[0]) - width / 2
+        right = int(columns[-1]) + 1 - width / 2
+        top = height / 2 - int(rows[0])
+        bottom = height / 2 - (int(rows[-1]) + 1)
+        return [(left, bottom), (right, bottom), (right, top), (left, top)]
+
+    # The first and last solid pixel of every row are enough for the hull
+    points = []
+    for row in np.flatnonzero(alpha.any(axis=1)).tolist():
+        columns = np.flatnonzero(alpha[row])
+        left = int(columns[0])
+        right = int(columns[-1]) + 1
+        for x in (left, right):
+            for y in (row, row + 1):
+                points.append((x - width / 2, height / 2 - y))
+
+    if not points:
+        points = [(-width / 2, -height / 2), (width / 2, -height / 2),
+                  (width / 2, height / 2), (-width / 2, height / 2)]
+    return simplify(convex_hull(points))
+
+
+def outline(name, shape=None):
+    """ The shape of a texture in the registry, worked out the first time """
+    key = (textures.texture_name(name), shape or SHAPE)
+    points = _outlines.get(key)
+    if points is None:
+        image = textures.get_image(key[0])
+        points = _outlines[key] = image_outline(image, key[1])
+    return points
+
+
+def polygons_intersect(poly_a, poly_b):
+    """
+    Whether two convex polygons overlap, by looking for a gap along the
+    normal of every edge. Gives the same answers as
+    arcade.are_polygons_intersecting, without importing arcade.
+    """
+    for polygon in (poly_a, poly_b):
+        for i in range(len(polygon)):
+            x1, y1 = polygon[i]
+            x2, y2 = polygon[(i + 1) % len(polygon)]
+            normal_x = y2 - y1
+            normal_y = x1 - x2
+
+            projected_a = [normal_x * x + normal_y * y for x, y in poly_a]
+            projected_b = [normal_x * x + normal_y * y for x, y in poly_b]
+            if max(projected_a) <= min(projected_b) or max(projected_b) <= min(projected_a):
+                return False
+    return True
+
+
+def rotate(x, y, angle):
+    """
+    Turn a point around the origin by angle degrees. Rounded, so a box
+    turned by 90 degrees comes out exactly lined up with the screen.
+    """
+    cos = math.cos(math.radians(angle))
+    sin = math.sin(math.radians(angle))
+    return (round(x * cos - y * sin, 6), round(x * sin + y * cos, 6))
+
+
+def hit_box(name, scale, angle, shape=None):
+    """ The shared hit box for a texture at a scale and angle """
+    key = (textures.texture_name(name), shape or SHAPE, scale, angle)
+    box = _hit_boxes.get(key)
+    if box is None:
+        points = [rotate(x * scale, y * scale, angle) for x, y in outline(name, shape)]
+        box = _hit_boxes[key] = HitBox(points)
+    return box
+
+
+def apply(sprite, shape=None):
+    """
+    Give a sprite the hit box of the texture it is wearing now. Textures
+    that aren't in the registry keep arcade's hit box.
+    """
+    name = textures.name_of(sprite.texture)
+    if name is None:
+        return
+    box = hit_box(name, sprite.scale, sprite.angle, shape)
+    if getattr(sprite, "hit_box", None) is box:
+        return
+    sprite.hit_box = box
+    sprite.points = box.points
+    # set_points() leaves arcade's cached corners alone, so drop them
+    sprite._point_list_cache = None
+
+
+def file_stamp(name):
+    """ Size and change time of an image, to see if a saved outline is stale """
+    stat = os.stat(textures.image_file(name))
+    return [stat.st_size, int(stat.st_mtime)]
+
+
+def load_cache(path=CACHE_FILE):
+    """ Read saved shapes, skipping any whose image has changed since """
+    if not os.path.exists(path):
+        return
+    with open(path) as file:
+        saved = json.load(file)
+    for name, entry in saved.items():
+        if not os.path.exists(textures.image_file(name)) or entry["stamp"] != file_stamp(name):
+            continue
+        for shape in SHAPES:
+            if shape in entry:
+                _outlines.setdefault((name, shape), [tuple(point) for point in entry[shape]])
+
+
+def save_cache(path=CACHE_FILE):
+    """ Save every shape worked out so far """
+    saved = {}
+    for (name, shape), points in sorted(_outlines.items()):
+        entry = saved.setdefault(name, {"stamp": file_stamp(name)})
+        entry[shape] = [list(point) for point in points]
+    with open(path, "w") as file:
+        json.dump(saved, file, indent=1)
+
+
+def main():
+    """ Main method """
+    textures.preload()
+    start_time = time.perf_counter()
+    for name in textures.names():
+        for shape in SHAPES:
+            outline(name, shape)
+    elapsed = time.perf_counter() - start_time
+
+    save_cache()
+    print(f"{len(textures.names())} textures in {elapsed * 1000:.1f} ms, saved to {CACHE_FILE}")
+
+
+if __name__ == "__main__":
+    main()
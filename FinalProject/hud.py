@@ -0,0 +1,192 @@
+"""
+Heads-up display.
+
+arcade.draw_text looks up (and the first time, rasterizes) a whole image for
+every string and draws each one with its own sprite list. The timer, score
+and lives change at most once a second, so instead we keep a small glyph
+atlas: every character is rendered once, in white, and each label is a row
+of glyph sprites in one shared SpriteList. Changing a label only swaps the
+textures of the characters that changed, and the whole HUD is one draw call.
+
+arcade rebuilds a SpriteList's whole buffer every time one of its sprites
+gets a new texture, so a label that swaps textures drops the buffer first
+instead. The swaps are then free, and the next draw rebuilds it once, however
+many characters and labels changed that frame.
+"""
+import math
+
+import arcade
+import PIL.Image
+import PIL.ImageDraw
+import PIL.ImageFont
+
+# Same font choices and sizing as arcade.draw_text, so the HUD looks the same
+FONT_NAMES = ("calibri", "arial", "arial.ttf", "NotoSans-Regular.ttf",
+              "/usr/share/fonts/truetype/freefont/FreeMono.ttf",
+              "/System/Library/Fonts/SFNSDisplay.ttf")
+FONT_SIZE_SCALE = 1.25
+
+# Draw big and shrink, so the glyphs are smooth
+SCALE_UP = 5
+
+
+def load_font(size):
+    """ First font we can find, at a size in pixels """
+    for name in FONT_NAMES:
+        try:
+            return PIL.ImageFont.truetype(name, size)
+        except OSError:
+            pass
+
+    # Newer Pillow has a scalable built-in font, older only a tiny bitmap one
+    try:
+        return PIL.ImageFont.load_default(size)
+    except TypeError:
+        return PIL.ImageFont.load_default()
+
+
+def render_text(font, text, name):
+    """ Rasterize white text with a big font, shrink it, and make a texture """
+    ascent, descent = font.getmetrics()
+    width = max(1, math.ceil(font.getlength(text)))
+    height = ascent + descent
+
+    image = PIL.Image.new("RGBA", (width, height))
+    draw = PIL.ImageDraw.Draw(image)
+    draw.text((0, 0), text, (255, 255, 255, 255), font=font)
+
+    size = (max(1, width // SCALE_UP), max(1, height // SCALE_UP))
+    image = image.resize(size, resample=PIL.Image.LANCZOS)
+    return arcade.Texture(name, image)
+
+
+def text_sprite(text, x, y, color, font_size):
+    """
+    A sprite showing a whole string, with its bottom left corner at x, y.
+    For text that never changes.
+    """
+    font = load_font(int(font_size * FONT_SIZE_SCALE * SCALE_UP))
+    sprite = arcade.Sprite()
+    sprite.texture = render_text(font, text, f"text-{font_size}-{text}")
+    sprite.color = color
+    sprite.set_position(x + sprite.width / 2, y + sprite.height / 2)
+    return sprite
+
+
+class GlyphAtlas:
+    """ One white texture per character, for one font size """
+
+    def __init__(self, font_size):
+        self.font_size = font_size
+        self.font = load_font(int(font_size * FONT_SIZE_SCALE * SCALE_UP))
+        self.glyphs = {}
+
+    def glyph(self, char):
+        """ Texture for a character, rendered the first time it is asked for """
+        texture = self.glyphs.get(char)
+        if texture is None:
+            texture = self.render(char)
+            self.glyphs[char] = texture
+        return texture
+
+    def render(self, char):
+        """ Rasterize one character """
+        return render_text(self.font, char, f"glyph-{self.font_size}-{ord(char)}")
+
+
+class Label:
+    """
+    A line of text on the HUD, made of one sprite per character slot.
+    set_text() does nothing when the text is the same as last time.
+    """
+
+    def __init__(self, sprite_list, atlas, x, y, color, max_chars):
+        self.sprite_list = sprite_list
+        self.atlas = atlas
+        self.x = x
+        self.y = y
+        self.text = None
+
+        self.sprites = []
+        for i in range(max_chars):
+            sprite = arcade.Sprite()
+            sprite.texture = atlas.glyph(" ")
+            sprite.color = color
+            sprite.alpha = 0
+            sprite_list.append(sprite)
+            self.sprites.append(sprite)
+
+    def set_text(self, text):
+        """ Show new text. Returns True if anything changed. """
+        if text == self.text:
+            return False
+
+        old_text = self.text or ""
+        self.text = text
+        glyphs = {i: self.atlas.glyph(char) for i, char in enumerate(text[:len(self.sprites)])
+                  if i >= len(old_text) or old_text[i] != char}
+        if any(self.sprites[i].texture is not glyph for i, glyph in glyphs.items()):
+            # The next draw rebuilds the buffer, once
+            self.sprite_list.vao = None
+
+        for i, sprite in enumerate(self.sprites):
+            if i in glyphs:
+                sprite.texture = glyphs[i]
+                sprite.alpha = 255
+            elif len(text) <= i < len(old_text):
+                sprite.alpha = 0
+        self.layout()
+        return True
+
+    def move_to(self, x, y):
+        """ Move the label so its bottom left corner is at x, y """
+        if (x, y) == (self.x, self.y):
+            return
+        self.x = x
+        self.y = y
+        self.layout()
+
+    def layout(self):
+        """ Place the characters one after the other """
+        left = self.x
+        for sprite in self.sprites[:len(self.text or "")]:
+            sprite.set_position(left + sprite.width / 2, self.y + sprite.height / 2)
+            left += sprite.width
+
+
+class Hud:
+    """ All the labels, drawn with a single SpriteList """
+
+    def __init__(self):
+        self.sprite_list = arcade.SpriteList()
+        self.atlases = {}
+        self.labels = {}
+        self.origin = (0, 0)
+
+    def add_label(self, name, x, y, color, font_size, max_chars):
+        """ Make a label. x and y are relative to the HUD's origin. """
+        atlas = self.atlases.get(font_size)
+        if atlas is None:
+            atlas = self.atlases[font_size] = GlyphAtlas(font_size)
+
+        label = Label(self.sprite_list, atlas, x + self.origin[0], y + self.origin[1],
+                      color, max_chars)
+        label.offset = (x, y)
+        self.labels[name] = label
+        return label
+
+    def set_text(self, name, text):
+        """ Change a label's text, if it is different """
+        return self.labels[name].set_text(text)
+
+    def set_origin(self, x, y):
+        """ Move the whole HUD, e.g. when the view scrolls """
+        if (x, y) == self.origin:
+            return
+        self.origin = (x, y)
+        for label in self.labels.values():
+            label.move_to(label.offset[0] + x, label.offset[1] + y)
+
+    def draw(self):
+        """ Draw every label """
+        self.sprite_list.draw()
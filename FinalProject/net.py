@@ -0,0 +1,793 @@
+"""
+LAN multiplayer.
+
+One machine runs the server, which plays the only real copy of the race:
+every player's car, the traffic and the coins, at the fixed step rate of
+the game. Players run a thin client that sends the keys it is holding and
+draws whatever the server says is on the road.
+
+    python -m FinalProject.net server --players 2
+    python -m FinalProject.net client --host 192.168.1.10
+
+Everything goes over UDP. Clients send their keys every frame, as a bitmask
+of what is held, so a lost packet is fixed by the next one. The server
+sends a snapshot every SNAPSHOT_STEPS steps. Positions in a snapshot are
+rounded to a quarter pixel and sent as small integers, and only what
+changed since the last snapshot the client said it got (its ack) is sent:
+
+    removed   slot                             cars and coins that went away
+    moved     slot, x, change in y             ones that moved a little
+    full      slot, x, y, texture              new ones, and big jumps
+
+with the players in full every time. The server keeps the last HISTORY
+snapshots to diff against; a client whose ack is older than that gets a
+full snapshot.
+
+Clients draw INTERPOLATION_DELAY behind the newest snapshot, sliding every
+car between the two snapshots around that time, so the road moves smoothly
+even though snapshots come less often than frames.
+
+    python -m FinalProject.net bench --players 2 4 8
+
+plays races on localhost with bots for 2 to 8 players, checks every
+snapshot decodes to what the server had, and reports the server's cost
+per step and the bandwidth to and from each client.
+
+Only the client's window (net_client.py) imports arcade, so the server and
+the bench run without pyglet and OpenGL.
+"""
+import argparse
+import collections
+import random
+import socket
+import struct
+import time
+
+import numpy as np
+
+from . import hitboxes
+from .entities import half_size
+from .world import lane_centers
+from .rules import (GameLogic, GAME_RUNNING, GAME_OVER, ROAD_SPEED, FIXED_TIME_STEP,
+                    STARTING_LIVES, BUDDY_IMAGES, CAR_IMAGES, COIN_CHUNKS_ON_SCREEN, PARKING_X, PARKING_Y,
+                    ROAD_LEFT, ROAD_RIGHT, COIN_POINTS, KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN, KEY_SPACE,
+                    MAX_INTERPOLATE_DISTANCE, press_key, release_key)
+
+PORT = 5005
+MAX_PLAYERS = 8
+
+# A snapshot goes out every this many steps (30 a second)
+SNAPSHOT_STEPS = 2
+
+# Snapshots the server keeps to diff against, and clients keep to decode
+HISTORY = 64
+
+# Clients draw this many seconds behind the newest snapshot
+INTERPOLATION_DELAY = 0.1
+
+# Positions are sent in quarter pixels
+QUANTUM = 4
+
+# A client that has not been heard from for this long lets go of its keys
+CLIENT_TIMEOUT = 2.0
+
+# Biggest UDP packet we read
+MAX_PACKET = 65536
+
+# Message types, the first byte of every packet
+JOIN = 1
+WELCOME = 2
+INPUT = 3
+SNAPSHOT = 4
+FULL = 5
+
+# Keys a client can hold, one bit each
+KEY_BITS = (KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN, KEY_SPACE)
+
+WELCOME_FORMAT = struct.Struct("<BBBIHH")          # type, player id, players, seed,
+                                                   # car slots, all slots
+INPUT_FORMAT = struct.Struct("<BIBI")              # type, sequence, keys, ack tick
+SNAPSHOT_HEADER = struct.Struct("<BIIqBHHH")       # type, tick, baseline tick (0 is
+                                                   # none), view bottom, players,
+                                                   # removed, moved, full
+
+PLAYER_DTYPE = np.dtype([("id", "u1"), ("lives", "u1"), ("score", "<u4"),
+                         ("x", "<i2"), ("y", "<i8")])
+REMOVED_DTYPE = np.dtype("<u2")
+MOVED_DTYPE = np.dtype([("slot", "<u2"), ("x", "<i2"), ("dy", "<i2")])
+FULL_DTYPE = np.dtype([("slot", "<u2"), ("x", "<i2"), ("y", "<i8"), ("texture", "u1")])
+
+# The biggest change in y that fits in a "moved" record
+MAX_DY = 2 ** 15 - 1
+
+
+def unpack(packet_format, kind, packet):
+    """
+    The fields of a fixed-size packet, or None if it is the wrong size or
+    not of this kind. Anything can turn up on a UDP port, so a bad packet
+    is dropped, never raised.
+    """
+    if len(packet) != packet_format.size or packet[0] != kind:
+        return None
+    try:
+        return packet_format.unpack(packet)
+    except struct.error:
+        return None
+
+
+def keys_to_bits(keys):
+    """ Bitmask of a set of held keys """
+    bits = 0
+    for i, key in enumerate(KEY_BITS):
+        if key in keys:
+            bits |= 1 << i
+    return bits
+
+
+def quantize(values):
+    return np.round(np.asarray(values) * QUANTUM).astype(np.int64)
+
+
+class Snapshot:
+    """
+    Everything a client needs to draw one step, rounded. Cars come first in
+    the slots, then coins.
+    """
+
+    def __init__(self, tick, view_bottom, slots, players):
+        self.tick = tick
+        self.view_bottom = view_bottom
+        self.active = np.zeros(slots, dtype=bool)
+        self.x = np.zeros(slots, dtype=np.int64)
+        self.y = np.zeros(slots, dtype=np.int64)
+        self.texture = np.zeros(slots, dtype=np.uint8)
+        self.players = players
+
+    def copy(self, tick):
+        snapshot = Snapshot(tick, self.view_bottom, len(self.active), self.players.copy())
+        snapshot.active[:] = self.active
+        snapshot.x[:] = self.x
+        snapshot.y[:] = self.y
+        snapshot.texture[:] = self.texture
+        return snapshot
+
+    def same_as(self, other):
+        """ Whether two snapshots hold the same things in the same places """
+        active = self.active
+        return (self.view_bottom == other.view_bottom
+                and np.array_equal(active, other.active)
+                and np.array_equal(self.x[active], other.x[active])
+                and np.array_equal(self.y[active], other.y[active])
+                and np.array_equal(self.texture[active], other.texture[active])
+                and np.array_equal(self.players, other.players))
+
+
+def encode(snapshot, baseline=None):
+    """ A snapshot as a packet, with only what changed since the baseline """
+    active = snapshot.active
+    if baseline is None:
+        removed = np.zeros(0, dtype=np.int64)
+        moved = np.zeros(0, dtype=np.int64)
+        full = np.flatnonzero(active)
+        baseline_tick = 0
+    else:
+        dy = snapshot.y - baseline.y
+        kept = active & baseline.active
+        jumped = (snapshot.texture != baseline.texture) | (np.abs(dy) > MAX_DY)
+        removed = np.flatnonzero(baseline.active & ~active)
+        moved = np.flatnonzero(kept & ~jumped & ((snapshot.x != baseline.x) | (dy != 0)))
+        full = np.flatnonzero(active & ~(kept & ~jumped))
+        baseline_tick = baseline.tick
+
+    moved_records = np.zeros(len(moved), dtype=MOVED_DTYPE)
+    moved_records["slot"] = moved
+    moved_records["x"] = snapshot.x[moved]
+    if len(moved):
+        moved_records["dy"] = snapshot.y[moved] - baseline.y[moved]
+
+    full_records = np.zeros(len(full), dtype=FULL_DTYPE)
+    full_records["slot"] = full
+    full_records["x"] = snapshot.x[full]
+    full_records["y"] = snapshot.y[full]
+    full_records["texture"] = snapshot.texture[full]
+
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT, snapshot.tick, baseline_tick, snapshot.view_bottom,
+                                  len(snapshot.players), len(removed), len(moved), len(full))
+    return b"".join((header, snapshot.players.tobytes(),
+                     removed.astype(REMOVED_DTYPE).tobytes(),
+                     moved_records.tobytes(), full_records.tobytes()))
+
+
+def decode(packet, slots, baselines):
+    """
+    Rebuild a snapshot from a packet and the snapshots we already have, by
+    tick. Returns None if its baseline is one we don't have, or if it isn't
+    a snapshot we can read.
+    """
+    if len(packet) < SNAPSHOT_HEADER.size or packet[0] != SNAPSHOT:
+        return None
+    try:
+        (kind, tick, baseline_tick, view_bottom,
+         players, removed, moved, full) = SNAPSHOT_HEADER.unpack_from(packet)
+    except struct.error:
+        return None
+
+    # The records have to fill the rest of the packet exactly
+    size = (SNAPSHOT_HEADER.size + players * PLAYER_DTYPE.itemsize
+            + removed * REMOVED_DTYPE.itemsize + moved * MOVED_DTYPE.itemsize
+            + full * FULL_DTYPE.itemsize)
+    if len(packet) != size:
+        return None
+
+    offset = SNAPSHOT_HEADER.size
+    players = np.frombuffer(packet, PLAYER_DTYPE, players, offset).copy()
+    offset += players.nbytes
+    removed_slots = np.frombuffer(packet, REMOVED_DTYPE, removed, offset)
+    offset += removed_slots.nbytes
+    moved_records = np.frombuffer(packet, MOVED_DTYPE, moved, offset)
+    offset += moved_records.nbytes
+    full_records = np.frombuffer(packet, FULL_DTYPE, full, offset)
+
+    # Every record has to be for a slot there is
+    slots_moved = moved_records["slot"]
+    slots_full = full_records["slot"]
+    if any(len(records) and int(records.max()) >= slots
+           for records in (removed_slots, slots_moved, slots_full)):
+        return None
+
+    if baseline_tick:
+        baseline = baselines.get(baseline_tick)
+        if baseline is None:
+            return None
+        snapshot = baseline.copy(tick)
+    else:
+        snapshot = Snapshot(tick, view_bottom, slots, None)
+    snapshot.view_bottom = view_bottom
+    snapshot.players = players
+
+    snapshot.active[removed_slots] = False
+
+    snapshot.x[slots_moved] = moved_records["x"]
+    snapshot.y[slots_moved] += moved_records["dy"]
+
+    snapshot.active[slots_full] = True
+    snapshot.x[slots_full] = full_records["x"]
+    snapshot.y[slots_full] = full_records["y"]
+    snapshot.texture[slots_full] = full_records["texture"]
+    return snapshot
+
+
+class ServerGame(GameLogic):
+    """
+    The race with several players. Each player's car keeps its own score
+    and lives; the road scrolls the same for everyone. The race is over
+    when every player is out of lives.
+    """
+
+    def __init__(self, player_count):
+        self.player_count = player_count
+        self.players = []
+        super().__init__()
+
+    def setup(self, seed=None):
+        super().setup(seed)
+
+        # Image each car wears, as a number in BUDDY_IMAGES, for the
+        # snapshots. A car always wears the same one.
+        self.car_textures = np.zeros(self.traffic.capacity, dtype=np.uint8)
+        for image, (start, stop) in self.car_pools.items():
+            self.car_textures[start:stop] = BUDDY_IMAGES.index(image)
+
+        # Start side by side, one player in each lane
+        lanes = lane_centers(ROAD_LEFT, ROAD_RIGHT, self.player_count)
+        self.players = []
+        for i in range(self.player_count):
+            if i == 0:
+                player = self.player_sprite
+            else:
+                player = self.make_player()
+                player.angle = 90
+                hitboxes.apply(player)
+                self.all_sprites_list.append(player)
+            player.center_x = lanes[i]
+            player.id = i
+            player.score = 0
+            player.lives = STARTING_LIVES
+            player.keys = 0
+            self.players.append(player)
+
+    def racers(self):
+        """ Players that still have lives """
+        return [player for player in self.players if player.lives > 0]
+
+    def set_keys(self, player_id, keys):
+        """ Press and let go of keys so the player holds exactly these """
+        player = self.players[player_id]
+        for i, key in enumerate(KEY_BITS):
+            bit = 1 << i
+            if keys & bit and not player.keys & bit:
+                press_key(player, key)
+            elif player.keys & bit and not keys & bit:
+                release_key(player, key)
+        player.keys = keys
+
+    def move_all(self):
+        """ Scroll the road and move every player and everything else on it """
+        self.steps += 1
+
+        self.view_bottom += ROAD_SPEED
+        racers = self.racers()
+        for player in racers:
+            player.start_step()
+            player.center_y += ROAD_SPEED
+            player.view_bottom = self.view_bottom
+        self.stream_world()
+
+        obstacles = []
+        for player in racers:
+            player_y = player.center_y
+            player.update()
+            half_width, half_height = half_size(player)
+            obstacles.append((player.center_x, player.center_y,
+                              player.center_y - player_y + ROAD_SPEED,
+                              half_width, half_height))
+        self.traffic.set_obstacles(obstacles)
+        self.traffic.update()
+        self.coins.update()
+
+        self.total_time += FIXED_TIME_STEP
+
+    def check_crashes(self):
+        """
+        Take a life from each player for every competitor it hits. A car
+        two players hit in the same step crashes into whoever got there
+        first.
+        """
+        racers = self.racers()
+        for time, i, car in self.sweep(self.traffic, racers):
+            if car.active:
+                self.traffic.kill(car.index)
+                racers[i].lives -= 1
+
+        for player in racers:
+            if player.lives < 1:
+                # Out of the race, off the road
+                player.center_x = PARKING_X
+                player.center_y = PARKING_Y
+
+        if not self.racers():
+            self.current_state = GAME_OVER
+
+    def collect_coins(self):
+        """ Score each coin for the first player to drive over it """
+        racers = self.racers()
+        for time, i, coin in self.sweep(self.coins, racers):
+            if coin.active:
+                self.coins.kill(coin.index)
+                racers[i].score += COIN_POINTS
+
+    def sweep(self, store, players):
+        """ Everything in a store each player touched this step, as (time, player number, sprite), soonest first """
+        hits = []
+        for i, player in enumerate(players):
+            for sprite, time in store.sweep_for_collision(player, player.start_x, player.start_y):
+                hits.append((time, i, sprite))
+        hits.sort(key=lambda hit: (hit[0], hit[1]))
+        return hits
+
+    def snapshot(self):
+        """ Where everything is now, rounded for sending """
+        traffic = self.traffic
+        coins = self.coins
+        cars = traffic.capacity
+        snapshot = Snapshot(self.steps, int(quantize(self.view_bottom)),
+                            cars + coins.capacity, None)
+
+        snapshot.active[:traffic.count] = traffic.active[:traffic.count]
+        snapshot.x[:traffic.count] = quantize(traffic.x[:traffic.count])
+        snapshot.y[:traffic.count] = quantize(traffic.y[:traffic.count])
+        snapshot.texture[:cars] = self.car_textures
+
+        end = cars + coins.count
+        snapshot.active[cars:end] = coins.active[:coins.count]
+        snapshot.x[cars:end] = quantize(coins.x[:coins.count])
+        snapshot.y[cars:end] = quantize(coins.y[:coins.count])
+
+        # Rows that are not in the game are sent as nothing
+        snapshot.x[~snapshot.active] = 0
+        snapshot.y[~snapshot.active] = 0
+        snapshot.texture[~snapshot.active] = 0
+
+        players = np.zeros(len(self.players), dtype=PLAYER_DTYPE)
+        for i, player in enumerate(self.players):
+            players[i] = (player.id, max(player.lives, 0), player.score,
+                          round(player.center_x * QUANTUM), round(player.center_y * QUANTUM))
+        snapshot.players = players
+        return snapshot
+
+
+class ClientInfo:
+    """ What the server knows about one client """
+
+    def __init__(self, player_id, now):
+        self.player_id = player_id
+        self.keys = 0
+        self.sequence = 0
+        self.ack = 0
+        self.last_heard = now
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.snapshots_sent = 0
+
+
+class GameServer:
+    """
+    Waits for the players to join, then runs the race and sends snapshots.
+    Call poll() and tick() in a loop, or run() to do it in real time.
+    """
+
+    def __init__(self, players, host="0.0.0.0", port=PORT, seed=None, cars=None, coins=None):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.setblocking(False)
+        self.address = self.socket.getsockname()
+
+        self.player_count = players
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.game = ServerGame(players)
+        if cars is not None:
+            self.game.objects_count = cars
+        if coins is not None:
+            self.game.coin_count = coins
+
+        self.clients = {}
+        self.history = collections.OrderedDict()
+        self.started = False
+
+        # Packets that were the wrong size or kind, or from no one who joined
+        self.dropped = 0
+
+        # Seconds each step took, without and with making and sending snapshots
+        self.step_times = []
+        self.tick_times = []
+
+    def slots(self):
+        """ How many slots of a snapshot are cars, and how many there are in all """
+        cars = self.game.objects_count * len(CAR_IMAGES)
+        return cars, cars + self.game.coin_count * COIN_CHUNKS_ON_SCREEN
+
+    def send(self, packet, address):
+        self.socket.sendto(packet, address)
+
+    def poll(self):
+        """ Read every packet waiting """
+        now = time.perf_counter()
+        while True:
+            try:
+                packet, address = self.socket.recvfrom(MAX_PACKET)
+            except (BlockingIOError, InterruptedError):
+                break
+            client = self.clients.get(address)
+            if packet == bytes((JOIN,)):
+                if client is None:
+                    if self.started or len(self.clients) == self.player_count:
+                        self.send(bytes((FULL,)), address)
+                        continue
+                    client = self.clients[address] = ClientInfo(len(self.clients), now)
+                # Say it again, in case the last welcome got lost
+                self.send(WELCOME_FORMAT.pack(WELCOME, client.player_id, self.player_count,
+                                              self.seed, *self.slots()), address)
+                continue
+
+            fields = unpack(INPUT_FORMAT, INPUT, packet)
+            if client is None or fields is None:
+                self.dropped += 1
+                continue
+            kind, sequence, keys, ack = fields
+            client.bytes_received += len(packet)
+            client.last_heard = now
+            # Packets can come out of order, only the newest counts
+            if sequence > client.sequence:
+                client.sequence = sequence
+                client.keys = keys
+                client.ack = max(client.ack, ack)
+
+        if not self.started and len(self.clients) == self.player_count:
+            self.start()
+
+    def start(self):
+        """ Everyone is here, start the race """
+        self.game.setup(self.seed)
+        self.game.current_state = GAME_RUNNING
+        self.started = True
+
+    def tick(self):
+        """ Run one step and send snapshots when one is due """
+        if not self.started:
+            return
+        start_time = time.perf_counter()
+
+        game = self.game
+        for client in self.clients.values():
+            keys = client.keys
+            if start_time - client.last_heard > CLIENT_TIMEOUT:
+                keys = 0
+            game.set_keys(client.player_id, keys)
+        game.step()
+        step_time = time.perf_counter()
+
+        if game.steps % SNAPSHOT_STEPS == 0 or game.current_state == GAME_OVER:
+            snapshot = game.snapshot()
+            self.history[snapshot.tick] = snapshot
+            while len(self.history) > HISTORY:
+                self.history.popitem(last=False)
+
+            # Clients that got the same snapshot last share one packet
+            packets = {}
+            for address, client in self.clients.items():
+                if client.ack not in packets:
+                    packets[client.ack] = encode(snapshot, self.history.get(client.ack))
+                packet = packets[client.ack]
+                self.send(packet, address)
+                client.bytes_sent += len(packet)
+                client.snapshots_sent += 1
+
+        end_time = time.perf_counter()
+        self.step_times.append(step_time - start_time)
+        self.tick_times.append(end_time - start_time)
+
+    def run(self):
+        """ Serve in real time until the race is over """
+        print(f"Waiting for {self.player_count} players on port {self.address[1]}")
+        next_step = time.perf_counter()
+        while not self.started or self.game.current_state != GAME_OVER:
+            self.poll()
+            now = time.perf_counter()
+            if now < next_step:
+                time.sleep(min(next_step - now, 0.002))
+                continue
+            self.tick()
+            next_step += FIXED_TIME_STEP
+            if now - next_step > 1:
+                # Fell far behind, don't try to catch up
+                next_step = now
+
+        # Send the end a few more times, in case the last one got lost
+        for i in range(30):
+            self.tick()
+            time.sleep(FIXED_TIME_STEP)
+
+        for player in self.game.players:
+            print(f"Player {player.id + 1}: {player.score} points")
+
+
+class GameClient:
+    """ Sends keys to the server and keeps the snapshots it sends back """
+
+    def __init__(self, host, port=PORT):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.connect((host, port))
+        self.socket.setblocking(False)
+
+        self.player_id = None
+        self.players = 0
+        self.seed = None
+        self.cars = 0
+        self.slots = None
+        self.sequence = 0
+        self.full = False
+
+        # Decoded snapshots by tick, and the newest one's tick
+        self.snapshots = collections.OrderedDict()
+        self.latest = 0
+
+        # Our guess of the server's tick: the newest snapshot's tick at
+        # this time
+        self.clock_tick = 0
+        self.clock_time = None
+
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+        # Packets we couldn't use: bad ones, and snapshots whose baseline
+        # we no longer have
+        self.dropped = 0
+
+    def join(self):
+        """ Ask to join. Keep calling poll() until player_id is set """
+        self.socket.send(bytes((JOIN,)))
+
+    def send_keys(self, keys):
+        """ Tell the server which keys are held, and the newest snapshot we have """
+        self.sequence += 1
+        packet = INPUT_FORMAT.pack(INPUT, self.sequence, keys, self.latest)
+        try:
+            self.socket.send(packet)
+            self.bytes_sent += len(packet)
+        except ConnectionRefusedError:
+            pass
+
+    def poll(self):
+        """ Read every packet waiting """
+        while True:
+            try:
+                packet = self.socket.recv(MAX_PACKET)
+            except (BlockingIOError, InterruptedError, ConnectionRefusedError):
+                break
+            self.bytes_received += len(packet)
+
+            welcome = unpack(WELCOME_FORMAT, WELCOME, packet)
+            if welcome is not None:
+                kind, self.player_id, self.players, self.seed, self.cars, self.slots = welcome
+            elif packet == bytes((FULL,)):
+                self.full = True
+            elif packet[:1] == bytes((SNAPSHOT,)) and self.slots is not None:
+                self.receive(packet)
+            else:
+                self.dropped += 1
+
+    def receive(self, packet):
+        """ Decode a snapshot and keep it """
+        snapshot = decode(packet, self.slots, self.snapshots)
+        if snapshot is None or snapshot.tick in self.snapshots:
+            self.dropped += 1
+            return
+
+        self.snapshots[snapshot.tick] = snapshot
+        self.snapshots = collections.OrderedDict(sorted(self.snapshots.items())[-HISTORY:])
+        if snapshot.tick > self.latest:
+            self.latest = snapshot.tick
+            self.clock_tick = snapshot.tick
+            self.clock_time = time.perf_counter()
+
+    def server_tick(self, now):
+        """ Our guess of the tick the server is on """
+        if self.clock_time is None:
+            return 0.0
+        return self.clock_tick + (now - self.clock_time) / FIXED_TIME_STEP
+
+    def sample(self, now):
+        """
+        The road as it was INTERPOLATION_DELAY ago, between the two
+        snapshots around that time. Returns (view_bottom, active, x, y,
+        texture, players) with positions in pixels, or None before the
+        first snapshot.
+        """
+        if not self.snapshots:
+            return None
+        tick = self.server_tick(now) - INTERPOLATION_DELAY / FIXED_TIME_STEP
+
+        ticks = list(self.snapshots)
+        newer_index = int(np.searchsorted(ticks, tick))
+        if newer_index == 0 or newer_index == len(ticks):
+            snapshot = self.snapshots[ticks[min(newer_index, len(ticks) - 1)]]
+            return (snapshot.view_bottom / QUANTUM, snapshot.active,
+                    snapshot.x / QUANTUM, snapshot.y / QUANTUM,
+                    snapshot.texture, snapshot.players)
+
+        older = self.snapshots[ticks[newer_index - 1]]
+        newer = self.snapshots[ticks[newer_index]]
+        blend = (tick - older.tick) / (newer.tick - older.tick)
+
+        x = newer.x / QUANTUM
+        y = newer.y / QUANTUM
+        older_x = older.x / QUANTUM
+        older_y = older.y / QUANTUM
+        smooth = (older.active & newer.active & (older.texture == newer.texture)
+                  & (np.abs(x - older_x) <= MAX_INTERPOLATE_DISTANCE)
+                  & (np.abs(y - older_y) <= MAX_INTERPOLATE_DISTANCE))
+        x = np.where(smooth, older_x + (x - older_x) * blend, x)
+        y = np.where(smooth, older_y + (y - older_y) * blend, y)
+        view_bottom = (older.view_bottom + (newer.view_bottom - older.view_bottom) * blend) / QUANTUM
+
+        players = newer.players.copy()
+        if len(older.players) == len(players):
+            players_x = older.players["x"] + (players["x"] - older.players["x"]) * blend
+            players_y = older.players["y"] + (players["y"] - older.players["y"]) * blend
+            players["x"] = np.round(players_x)
+            players["y"] = np.round(players_y)
+        return (view_bottom, newer.active, x, y, newer.texture, players)
+
+
+def bench(players, ticks, seed=1, cars=None, coins=None):
+    """
+    Race bots on localhost for a number of steps, as fast as possible.
+    Returns numbers about the server's cost and the traffic.
+    """
+    server = GameServer(players, "127.0.0.1", 0, seed, cars, coins)
+    clients = [GameClient("127.0.0.1", server.address[1]) for i in range(players)]
+
+    while not server.started:
+        for client in clients:
+            client.join()
+        server.poll()
+        for client in clients:
+            client.poll()
+
+    # Nobody runs out of lives during the bench
+    for player in server.game.players:
+        player.lives = 255
+
+    rng = random.Random(seed)
+    held = [0] * players
+    mismatches = 0
+    for step in range(ticks):
+        for i, client in enumerate(clients):
+            # Bots change keys about four times a second
+            if rng.randrange(15) == 0:
+                held[i] = rng.randrange(32)
+            client.send_keys(held[i])
+        server.poll()
+        server.tick()
+        for client in clients:
+            client.poll()
+            snapshot = client.snapshots.get(client.latest)
+            if snapshot is not None and snapshot.tick == server.game.steps:
+                if not snapshot.same_as(server.history[snapshot.tick]):
+                    mismatches += 1
+
+    seconds = ticks * FIXED_TIME_STEP
+    step_ms = np.array(server.step_times) * 1000
+    tick_ms = np.array(server.tick_times) * 1000
+    sent = [client.bytes_sent for client in server.clients.values()]
+    snapshots = sum(client.snapshots_sent for client in server.clients.values())
+    full_size = len(encode(server.game.snapshot()))
+    result = {
+        "players": players,
+        "step_p50": float(np.percentile(step_ms, 50)),
+        "tick_p50": float(np.percentile(tick_ms, 50)),
+        "tick_p99": float(np.percentile(tick_ms, 99)),
+        "down_kbps": sum(sent) / len(sent) / seconds / 1024,
+        "up_kbps": sum(client.bytes_sent for client in clients) / len(clients) / seconds / 1024,
+        "snapshot_bytes": sum(sent) / snapshots,
+        "full_bytes": full_size,
+        "dropped": sum(client.dropped for client in clients),
+        "mismatches": mismatches,
+    }
+    server.socket.close()
+    for client in clients:
+        client.socket.close()
+    return result
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Race other players on the network.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    server_parser = commands.add_parser("server", help="run the race for everyone")
+    server_parser.add_argument("--players", type=int, default=2,
+                               choices=range(1, MAX_PLAYERS + 1))
+    server_parser.add_argument("--port", type=int, default=PORT)
+    server_parser.add_argument("--seed", type=int, default=None)
+
+    client_parser = commands.add_parser("client", help="join a race")
+    client_parser.add_argument("--host", default="127.0.0.1")
+    client_parser.add_argument("--port", type=int, default=PORT)
+
+    bench_parser = commands.add_parser("bench", help="race bots on localhost and measure")
+    bench_parser.add_argument("--players", type=int, nargs="+", default=[2, 4, 8])
+    bench_parser.add_argument("--ticks", type=int, default=3600)
+    bench_parser.add_argument("--cars", type=int, default=None)
+    bench_parser.add_argument("--coins", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.command == "server":
+        GameServer(args.players, port=args.port, seed=args.seed).run()
+    elif args.command == "client":
+        # Only the client draws, so only it loads arcade
+        from .net_client import play
+        play(GameClient(args.host, args.port))
+    else:
+        print(f"{'players':>7} {'step ms':>8} {'tick p50':>9} {'tick p99':>9} "
+              f"{'down KB/s':>10} {'up KB/s':>8} {'snapshot':>9} {'full':>6} {'errors':>7}")
+        for players in args.players:
+            result = bench(players, args.ticks, cars=args.cars, coins=args.coins)
+            print(f"{result['players']:7} {result['step_p50']:8.3f} {result['tick_p50']:9.3f} "
+                  f"{result['tick_p99']:9.3f} {result['down_kbps']:10.2f} "
+                  f"{result['up_kbps']:8.2f} {result['snapshot_bytes']:8.0f}B "
+                  f"{result['full_bytes']:5}B {result['mismatches'] + result['dropped']:7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+LAN multiplayer client window.
+
+The thin client of net.py: it sends the keys it is holding to the server
+and draws the road the server's snapshots describe. It is the only part of
+the multiplayer game that opens a window, so the server and the bench
+(in net.py) never import arcade.
+
+    python -m FinalProject.net client --host 192.168.1.10
+"""
+import time
+
+import arcade
+import numpy as np
+
+from . import textures
+from .hud import Hud
+from .net import MAX_PLAYERS, KEY_BITS, QUANTUM, keys_to_bits
+from .rules import (SCREEN_WIDTH, SCREEN_HEIGHT, CHARACTER_SCALING, SPRITE_SCALING_COIN,
+                    BUDDY_IMAGES, PARKING_X, PARKING_Y)
+from .RacingGame import OthersSprite, Coin, SCREEN_TITLE, make_sprite
+
+
+class ClientWindow(arcade.Window):
+    """ A thin client: sends keys, draws the snapshots """
+
+    def __init__(self, client):
+        super().__init__(SCREEN_WIDTH, SCREEN_HEIGHT, SCREEN_TITLE)
+        self.client = client
+        self.held = set()
+        textures.load_atlas()
+        self.background = textures.get_texture("background-1_0 (1).png")
+
+        self.hud = Hud()
+        for i in range(MAX_PLAYERS):
+            self.hud.add_label(f"player{i}", 10, 10 + 30 * i, arcade.color.WHITE, 18, 40)
+        self.hud.add_label("status", SCREEN_WIDTH // 2 - 150, SCREEN_HEIGHT // 2,
+                           arcade.color.WHITE, 24, 24)
+
+        # Sprites are made as slots first show up and then reused
+        self.sprite_list = arcade.SpriteList()
+        self.slot_sprites = {}
+        self.player_sprites = {}
+
+    def slot_sprite(self, slot, texture):
+        """ The sprite that draws a slot, made the first time """
+        sprite = self.slot_sprites.get(slot)
+        is_car = slot < self.client.cars
+        if sprite is None:
+            # A slot's car always wears the same image, so its sprite
+            # never has to change it
+            if is_car:
+                sprite = make_sprite(OthersSprite, [BUDDY_IMAGES[int(texture)]], CHARACTER_SCALING)
+                sprite.angle = 90
+            else:
+                sprite = make_sprite(Coin, ["coin_01.png"], SPRITE_SCALING_COIN)
+            self.slot_sprites[slot] = sprite
+            self.sprite_list.append(sprite)
+        return sprite
+
+    def on_key_press(self, key, modifiers):
+        if key in KEY_BITS:
+            self.held.add(key)
+
+    def on_key_release(self, key, modifiers):
+        self.held.discard(key)
+
+    def on_update(self, delta_time):
+        client = self.client
+        if client.player_id is None:
+            client.join()
+        else:
+            client.send_keys(keys_to_bits(self.held))
+        client.poll()
+
+    def on_draw(self):
+        arcade.start_render()
+        client = self.client
+        state = client.sample(time.perf_counter())
+        if state is None:
+            self.hud.set_text("status", "Server is full" if client.full
+                              else "Waiting for players")
+            self.hud.draw()
+            return
+        view_bottom, active, x, y, texture, players = state
+
+        arcade.set_viewport(0, SCREEN_WIDTH, view_bottom, view_bottom + SCREEN_HEIGHT)
+        line_start = view_bottom % (SCREEN_HEIGHT // 2)
+        for center_y in (view_bottom + SCREEN_HEIGHT // 2 - line_start,
+                         view_bottom + SCREEN_HEIGHT - line_start):
+            arcade.draw_texture_rectangle(SCREEN_WIDTH // 2, center_y,
+                                          SCREEN_WIDTH, SCREEN_HEIGHT, self.background)
+
+        for slot, sprite in self.slot_sprites.items():
+            sprite.set_position(PARKING_X, PARKING_Y)
+        for slot in np.flatnonzero(active).tolist():
+            self.slot_sprite(slot, texture[slot]).set_position(x[slot], y[slot])
+
+        for player in players:
+            sprite = self.player_sprites.get(int(player["id"]))
+            if sprite is None:
+                sprite = make_sprite(arcade.Sprite, ["bugatti.png"], CHARACTER_SCALING)
+                sprite.angle = 90
+                if player["id"] != client.player_id:
+                    sprite.color = arcade.color.LIGHT_GRAY
+                self.player_sprites[int(player["id"])] = sprite
+                self.sprite_list.append(sprite)
+            sprite.set_position(player["x"] / QUANTUM, player["y"] / QUANTUM)
+        self.sprite_list.draw()
+
+        arcade.set_viewport(0, SCREEN_WIDTH, 0, SCREEN_HEIGHT)
+        for player in players:
+            you = " (you)" if player["id"] == client.player_id else ""
+            self.hud.set_text(f"player{player['id']}",
+                              f"P{player['id'] + 1}{you}  Score: {player['score']:05d}  "
+                              f"Lives: {player['lives']}")
+        racing = any(player["lives"] > 0 for player in players)
+        self.hud.set_text("status", "" if racing else "Race over")
+        self.hud.draw()
+
+
+def play(client):
+    """ Open the window for a GameClient and play until it is closed """
+    ClientWindow(client)
+    arcade.run()
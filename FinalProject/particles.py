@@ -0,0 +1,253 @@
+"""
+Particles.
+
+Nitrous exhaust and the debris of a crash are small coloured squares that
+fly, slow down and fade out. There can be thousands of them, so none of
+them is a Python object: they are rows of fixed-size NumPy arrays, used as
+a ring. New particles go in after the last ones and, once the arrays are
+full, write over the oldest, so a big pile-up can never make more work
+than CAPACITY particles.
+
+update() moves all of them with a few array operations. ParticleBatch
+draws the live ones as squares, all in one instanced draw call, after
+copying them to the GPU in one go.
+
+Particles are only for show. They have their own random numbers, so they
+never change how a game plays or replays.
+"""
+import numpy as np
+
+# Most particles alive at once
+CAPACITY = 8192
+
+# Speed a particle keeps from one step to the next
+DRAG = 0.92
+
+# Nitrous exhaust: particles per step, how long they last in steps, how
+# fast they shoot out of the back of the car and how big they are, in pixels
+EXHAUST_COUNT = 12
+EXHAUST_LIFE = 18
+EXHAUST_SPEED = (3.0, 7.0)
+EXHAUST_SPREAD = 0.35
+EXHAUST_SIZE = (4.0, 8.0)
+EXHAUST_COLORS = ((255, 240, 160, 255), (255, 160, 40, 230), (90, 170, 255, 200))
+
+# Crash debris
+DEBRIS_COUNT = 400
+DEBRIS_LIFE = 45
+DEBRIS_SPEED = (1.0, 9.0)
+DEBRIS_SIZE = (3.0, 8.0)
+DEBRIS_COLORS = ((59, 122, 87, 255), (120, 120, 120, 255), (255, 200, 60, 255),
+                 (40, 40, 40, 230))
+
+# The corners of a particle's square, drawn as a triangle strip, in half
+# sizes from its middle
+CORNERS = np.array([(-1, -1), (1, -1), (-1, 1), (1, 1)], dtype=np.float32)
+
+# Every particle is the same square, moved, sized and coloured. The square
+# is one small buffer; the middle, half size and colour of each particle
+# are another two, read once per particle (instanced).
+VERTEX_SHADER = """
+    #version 330
+    uniform mat4 Projection;
+    in vec2 in_corner;
+    in vec3 in_place;
+    in vec4 in_color;
+    out vec4 v_color;
+    void main() {
+        gl_Position = Projection * vec4(in_place.xy + in_corner * in_place.z, 0.0, 1.0);
+        v_color = in_color;
+    }
+"""
+
+FRAGMENT_SHADER = """
+    #version 330
+    in vec4 v_color;
+    out vec4 f_color;
+    void main() {
+        f_color = v_color;
+    }
+"""
+
+
+class ParticleStore:
+    """ Every particle, in a ring of fixed-size arrays """
+
+    def __init__(self, capacity=CAPACITY, seed=None):
+        self.capacity = capacity
+        self.rng = np.random.default_rng(seed)
+
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.change_x = np.zeros(capacity)
+        self.change_y = np.zeros(capacity)
+        self.size = np.zeros(capacity)
+        self.color = np.zeros((capacity, 4), dtype=np.uint8)
+
+        # Steps each one has lived and will live. An empty row has a life
+        # of 0, so it is never alive.
+        self.age = np.zeros(capacity)
+        self.life = np.zeros(capacity)
+
+        # Where the next particle goes
+        self.next = 0
+
+        # Steps until the last particle is gone, so update() can do nothing
+        # when there are none
+        self.busy_steps = 0
+
+        # Share of the particles the effects make, turned down on slow
+        # machines
+        self.amount = 1.0
+
+    def reset(self):
+        """ Get rid of every particle """
+        self.life[:] = 0
+        self.age[:] = 0
+        self.next = 0
+        self.busy_steps = 0
+
+    def emit(self, count, x, y, change_x, change_y, life, size, color):
+        """
+        Add 'count' particles. Each of the other arguments is one number
+        for all of them or an array with one for each.
+        """
+        count = min(count, self.capacity)
+        rows = (self.next + np.arange(count)) % self.capacity
+        self.next = (self.next + count) % self.capacity
+
+        self.x[rows] = x
+        self.y[rows] = y
+        self.change_x[rows] = change_x
+        self.change_y[rows] = change_y
+        self.size[rows] = size
+        self.color[rows] = color
+        self.age[rows] = 0
+        self.life[rows] = life
+        self.busy_steps = max(self.busy_steps, int(np.max(life)))
+
+    def exhaust(self, x, y, change_y):
+        """
+        One step of nitrous flames out of the back of a car at x, y, going
+        up the road at change_y
+        """
+        rng = self.rng
+        count = round(EXHAUST_COUNT * self.amount)
+        if not count:
+            return
+        angle = -np.pi / 2 + rng.uniform(-EXHAUST_SPREAD, EXHAUST_SPREAD, count)
+        speed = rng.uniform(*EXHAUST_SPEED, count)
+        colors = np.array(EXHAUST_COLORS, dtype=np.uint8)
+        self.emit(count,
+                  x + rng.uniform(-4, 4, count), y,
+                  np.cos(angle) * speed, change_y + np.sin(angle) * speed,
+                  rng.integers(EXHAUST_LIFE // 2, EXHAUST_LIFE + 1, count),
+                  rng.uniform(*EXHAUST_SIZE, count),
+                  colors[rng.integers(len(colors), size=count)])
+
+    def burst(self, x, y, change_y):
+        """ Debris flying every way from a crash at x, y, moving up the road at change_y """
+        rng = self.rng
+        count = round(DEBRIS_COUNT * self.amount)
+        if not count:
+            return
+        angle = rng.uniform(0, 2 * np.pi, count)
+        speed = rng.uniform(*DEBRIS_SPEED, count)
+        colors = np.array(DEBRIS_COLORS, dtype=np.uint8)
+        self.emit(count,
+                  x, y,
+                  np.cos(angle) * speed, change_y + np.sin(angle) * speed,
+                  rng.integers(DEBRIS_LIFE // 2, DEBRIS_LIFE + 1, count),
+                  rng.uniform(*DEBRIS_SIZE, count),
+                  colors[rng.integers(len(colors), size=count)])
+
+    def update(self):
+        """ Move, slow down and age every particle """
+        if not self.busy_steps:
+            return
+        self.busy_steps -= 1
+
+        self.x += self.change_x
+        self.y += self.change_y
+        self.change_x *= DRAG
+        self.change_y *= DRAG
+        self.age += 1
+
+    def live_count(self):
+        """ How many particles are alive """
+        return int(np.count_nonzero(self.age < self.life))
+
+    def fill(self, place, color):
+        """
+        Write where each live particle is and its half size into the rows
+        of 'place' (float32, three columns), and its colour into 'color'
+        (four bytes). They shrink and fade as they get old. Returns how
+        many were written.
+        """
+        if not self.busy_steps:
+            return 0
+        alive = np.flatnonzero(self.age < self.life)
+        count = len(alive)
+        if not count:
+            return 0
+
+        fade = 1 - self.age[alive] / self.life[alive]
+        place[:count, 0] = self.x[alive]
+        place[:count, 1] = self.y[alive]
+        place[:count, 2] = self.size[alive] * (0.5 + 0.5 * fade) / 2
+        color[:count] = self.color[alive]
+        color[:count, 3] = color[:count, 3] * fade
+        return count
+
+
+class ParticleBatch:
+    """
+    Draws a ParticleStore in one call. The buffers on the GPU are made
+    once, big enough for every particle, and only the live ones are written
+    to them each frame.
+    """
+
+    def __init__(self, store):
+        # Only the window draws, so only it pays for importing arcade
+        from arcade import shader
+
+        self.store = store
+        self.place = np.zeros((store.capacity, 3), dtype=np.float32)
+        self.color = np.zeros((store.capacity, 4), dtype=np.uint8)
+
+        self.program = shader.program(vertex_shader=VERTEX_SHADER,
+                                      fragment_shader=FRAGMENT_SHADER)
+        # Buffers are freed when their Python object goes, and the vertex
+        # array doesn't hold on to them, so we do
+        self.corners = shader.buffer(CORNERS.tobytes())
+        self.place_buffer = shader.buffer(self.place.tobytes(), usage="stream")
+        self.color_buffer = shader.buffer(self.color.tobytes(), usage="stream")
+        self.vao = shader.vertex_array(self.program, [
+            shader.BufferDescription(self.corners, "2f", ("in_corner",)),
+            shader.BufferDescription(self.place_buffer, "3f", ("in_place",), instanced=True),
+            shader.BufferDescription(self.color_buffer, "4B", ("in_color",),
+                                     normalized=["in_color"], instanced=True),
+        ])
+
+    def draw(self):
+        """ Draw every live particle where the camera is pointing """
+        import pyglet.gl as gl
+        from arcade.window_commands import get_projection
+
+        count = self.store.fill(self.place, self.color)
+        if not count:
+            return
+
+        self.place_buffer.write(self.place[:count].tobytes())
+        self.color_buffer.write(self.color[:count].tobytes())
+
+        gl.glEnable(gl.GL_BLEND)
+        gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
+        with self.vao:
+            self.program["Projection"] = get_projection().flatten()
+            self.vao.render(gl.GL_TRIANGLE_STRIP, instances=count)
+
+        # Let the GPU keep what it is drawing from while next frame's copy
+        # goes into fresh memory, as arcade's sprite lists do
+        self.place_buffer.orphan()
+        self.color_buffer.orphan()
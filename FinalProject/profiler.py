@@ -0,0 +1,105 @@
+"""
+Frame profiler.
+
+Times each phase of a frame: the parts of every game step, and the parts
+of drawing. The game calls start() before a group of phases and mark(name)
+at the end of each one, which adds the time since the last mark to that
+phase. end_frame() closes the frame and keeps its row of times.
+
+When the profiler is off, start() and mark() return straight away, so the
+calls can stay in the game for good.
+
+    python -m FinalProject.RacingGame --profile frames.csv
+"""
+import csv
+import json
+import time
+
+import numpy as np
+
+# Phases of a frame, in the order they happen
+PHASES = ("stream", "move", "crashes", "coins", "particles",
+          "background", "sprites", "effects", "hud")
+
+# Rolling averages are over this many frames
+AVERAGE_FRAMES = 60
+
+# Keep at most this many frames for saving, the oldest are dropped
+MAX_FRAMES = 100000
+
+
+class FrameProfiler:
+    """ Adds up the time spent in each phase, frame by frame """
+
+    def __init__(self, phases=PHASES, max_frames=MAX_FRAMES):
+        self.enabled = False
+        self.phases = phases
+        self.columns = {phase: i for i, phase in enumerate(phases)}
+
+        # One row per frame, in seconds, used as a ring. Only made once
+        # there is a frame to keep.
+        self.max_frames = max_frames
+        self.frames = None
+        self.frame_count = 0
+
+        self.current = [0.0] * len(phases)
+        self.last_time = 0.0
+
+    def start(self):
+        """ Start timing from now """
+        if not self.enabled:
+            return
+        self.last_time = time.perf_counter()
+
+    def mark(self, phase):
+        """ The phase that just finished took the time since the last mark """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.current[self.columns[phase]] += now - self.last_time
+        self.last_time = now
+
+    def end_frame(self):
+        """ Keep this frame's times and start a new frame """
+        if not self.enabled:
+            return
+        if self.frames is None:
+            self.frames = np.zeros((self.max_frames, len(self.phases)))
+        self.frames[self.frame_count % self.max_frames] = self.current
+        self.frame_count += 1
+        self.current = [0.0] * len(self.phases)
+
+    def recent(self, count):
+        """ The last 'count' frames, oldest first """
+        count = min(count, self.frame_count, self.max_frames)
+        if count == 0:
+            return np.zeros((0, len(self.phases)))
+        end = self.frame_count % self.max_frames
+        rows = np.arange(end - count, end) % self.max_frames
+        return self.frames[rows]
+
+    def averages(self, count=AVERAGE_FRAMES):
+        """ Average milliseconds per frame for each phase """
+        rows = self.recent(count)
+        if len(rows) == 0:
+            return {phase: 0.0 for phase in self.phases}
+        means = rows.mean(axis=0) * 1000
+        return {phase: float(means[i]) for i, phase in enumerate(self.phases)}
+
+    def save(self, path):
+        """ Write every kept frame, in milliseconds, to a .csv or .json file """
+        rows = self.recent(self.max_frames) * 1000
+        first = self.frame_count - len(rows)
+
+        if path.endswith(".json"):
+            with open(path, "w") as file:
+                json.dump({"phases": list(self.phases),
+                           "first_frame": first,
+                           "frames_ms": rows.round(4).tolist()}, file)
+            return
+
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(("frame",) + self.phases)
+            for i, row in enumerate(rows.round(4).tolist()):
+                writer.writerow([first + i] + row)
@@ -0,0 +1,204 @@
+"""
+Input recording and replay.
+
+Every game is set up from a seed, and the game logic only moves in fixed
+steps, so a game is decided by its seed and which keys were pressed and
+released before which step. InputRecorder writes exactly that to a small
+text file, one line per game and one line per key event:
+
+    game <seed> <cars> <coins>
+    <step> + <key>
+    <step> - <key>
+    <step> traffic <share>
+    end <steps> <score> <lives> <total_time>
+
+A traffic line is the frame-time governor letting a different share of
+the road's traffic through, which changes the game as much as a key does.
+
+Replaying runs the same steps without a window, as fast as it can, and
+checks that every game ends with the same score, lives and time.
+
+    python -m FinalProject.sim --seed 1 --record run.txt
+    python -m FinalProject.replay run.txt
+"""
+import argparse
+import sys
+import time
+
+from .rules import GameLogic, GAME_RUNNING
+
+
+class GameRecording:
+    """ One recorded game """
+
+    def __init__(self, seed, cars, coins):
+        self.seed = seed
+        self.cars = cars
+        self.coins = coins
+
+        # (step, pressed, key)
+        self.events = []
+
+        # (step, share of the traffic)
+        self.traffic = []
+
+        # Set when the game is over, or the window closed
+        self.steps = None
+        self.score = None
+        self.lives = None
+        self.total_time = None
+
+    def finish(self, game):
+        """ Write down how the game ended """
+        self.steps = game.steps
+        self.score = game.score
+        self.lives = game.lives
+        self.total_time = game.total_time
+
+    def result(self):
+        return (self.steps, self.score, self.lives, self.total_time)
+
+
+class InputRecorder:
+    """
+    Listens to a game and keeps every game it plays. The game calls
+    start_game(), key() and end_game(); save() writes it all out.
+    """
+
+    def __init__(self):
+        self.games = []
+        self.current = None
+
+    def start_game(self, game):
+        """ A new game was set up. One that never got played is forgotten. """
+        self.current = GameRecording(game.run_seed, game.objects_count, game.coin_count)
+        if game.traffic_share != 1.0:
+            self.current.traffic.append((0, game.traffic_share))
+
+    def key(self, game, pressed, key):
+        """ A key went down (pressed is True) or up before the next step """
+        if self.current is not None:
+            self.current.events.append((game.steps, pressed, key))
+
+    def traffic(self, game, share):
+        """ The share of the traffic changed before the next step """
+        if self.current is not None:
+            self.current.traffic.append((game.steps, share))
+
+    def end_game(self, game):
+        """ The game is over, or we are stopping """
+        if self.current is None:
+            return
+        self.current.finish(game)
+        self.games.append(self.current)
+        self.current = None
+
+    def save(self, path):
+        """ Write every finished game to a file """
+        with open(path, "w") as file:
+            for recording in self.games:
+                file.write(f"game {recording.seed} {recording.cars} {recording.coins}\n")
+                for step, pressed, key in recording.events:
+                    file.write(f"{step} {'+' if pressed else '-'} {key}\n")
+                for step, share in recording.traffic:
+                    file.write(f"{step} traffic {share!r}\n")
+                file.write(f"end {recording.steps} {recording.score} "
+                           f"{recording.lives} {recording.total_time!r}\n")
+
+
+def load_recording(path):
+    """ Read the games back from a file made by InputRecorder.save() """
+    games = []
+    with open(path) as file:
+        for line in file:
+            fields = line.split()
+            if not fields:
+                continue
+            if fields[0] == "game":
+                games.append(GameRecording(int(fields[1]), int(fields[2]), int(fields[3])))
+            elif fields[0] == "end":
+                recording = games[-1]
+                recording.steps = int(fields[1])
+                recording.score = int(fields[2])
+                recording.lives = int(fields[3])
+                recording.total_time = float(fields[4])
+            elif fields[1] == "traffic":
+                games[-1].traffic.append((int(fields[0]), float(fields[2])))
+            else:
+                games[-1].events.append((int(fields[0]), fields[1] == "+", int(fields[2])))
+    return games
+
+
+class ReplayGame(GameLogic):
+    """ Plays recorded games back without a window """
+
+    def play(self, recording):
+        """ Play one game and return how it ended """
+        self.objects_count = recording.cars
+        self.coin_count = recording.coins
+        self.traffic_share = 1.0
+        self.restart(recording.seed)
+        self.current_state = GAME_RUNNING
+
+        events = recording.events
+        next_event = 0
+        changes = recording.traffic
+        next_change = 0
+        while self.steps < recording.steps:
+            while next_change < len(changes) and changes[next_change][0] <= self.steps:
+                self.set_traffic_share(changes[next_change][1])
+                next_change += 1
+            while next_event < len(events) and events[next_event][0] <= self.steps:
+                step, pressed, key = events[next_event]
+                if pressed:
+                    self.on_key_press(key, 0)
+                else:
+                    self.on_key_release(key, 0)
+                next_event += 1
+
+            if self.current_state != GAME_RUNNING:
+                break
+            self.step()
+
+        return (self.steps, self.score, self.lives, self.total_time)
+
+
+def replay(games):
+    """ Replay recorded games. Returns a list of (recording, result) that differ. """
+    game = ReplayGame()
+    mismatches = []
+    for recording in games:
+        result = game.play(recording)
+        if result != recording.result():
+            mismatches.append((recording, result))
+    return mismatches
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Replay a recorded run and check it.")
+    parser.add_argument("recording", help="file written with --record")
+    args = parser.parse_args()
+
+    games = load_recording(args.recording)
+
+    start_time = time.perf_counter()
+    mismatches = replay(games)
+    elapsed = time.perf_counter() - start_time
+
+    steps = sum(recording.steps for recording in games)
+    print(f"Games:   {len(games)}")
+    print(f"Steps:   {steps} in {elapsed:.2f} s")
+
+    for recording, result in mismatches:
+        print(f"Game with seed {recording.seed} differs:")
+        print(f"  recorded steps/score/lives/time: {recording.result()}")
+        print(f"  replayed steps/score/lives/time: {result}")
+
+    if mismatches:
+        sys.exit(1)
+    print("All games match")
+
+
+if __name__ == "__main__":
+    main()
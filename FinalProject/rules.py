@@ -0,0 +1,789 @@
+"""
+Rules of the racing game.
+
+Everything that decides how a game plays out: the constants, how the
+player's car and the pooled competitors and coins behave, spawning,
+crashes and scoring. None of it imports arcade, so tools that only play
+the game (the headless sim, replay, batch runs, the training environment)
+start without loading pyglet and OpenGL.
+
+Without a window the game is played on Bodies, which have the parts of a
+sprite the rules use. The window (RacingGame.py) plays the same rules on
+arcade sprites, so it can draw them. Both make the same game from the same
+seed and keys.
+"""
+import random
+
+from . import hitboxes
+from .textures import image_file, texture_name
+from .entities import EntityStore, half_size
+from .traffic import TrafficStore
+from .world import WorldStreamer, road_chunks, lane_centers
+from .profiler import FrameProfiler
+
+# Constants
+SCREEN_WIDTH = 1280
+SCREEN_HEIGHT = 720
+MOVEMENT_SPEED = 5
+SCALE = 0.25
+
+INSTRUCTIONS_PAGE = 0
+GAME_RUNNING = 1
+GAME_OVER = 2
+
+OFFSCREEN_SPACE = 50
+LEFT_LIMIT = -OFFSCREEN_SPACE
+RIGHT_LIMIT = SCREEN_WIDTH + OFFSCREEN_SPACE
+BOTTOM_LIMIT = -OFFSCREEN_SPACE
+TOP_LIMIT = SCREEN_HEIGHT + OFFSCREEN_SPACE
+
+STARTING_OBJECTS_COUNT = 7
+STARTING_LIVES = 4
+OBJECTS_SPEED = 3
+
+SPRITE_SCALING_COIN = 0.2
+COIN_COUNT = 6
+
+# How far the road scrolls past each step
+ROAD_SPEED = 1
+
+# Cars come through a chunk of road faster than the camera goes over it, so
+# a chunk sends this many times the cars that can be on the road at once.
+# Coins sit still, and up to this many chunks' worth can be on the screen.
+CARS_PER_CHUNK = 3
+COIN_CHUNKS_ON_SCREEN = 3
+
+# Images the competitors can use. Pick one at random, so doubles are more likely.
+BUDDY_IMAGES = ("police.png", "police.png", "police.png",
+                "lambo.png", "lambo.png", "lambo.png")
+
+# Each car image once. Every image has its own pool of cars, so a car never
+# has to change its image (which makes arcade rebuild every sprite list the
+# car is in).
+CAR_IMAGES = tuple(dict.fromkeys(BUDDY_IMAGES))
+
+# Where sprites that are not in use wait, well away from the road
+PARKING_X = -1000
+PARKING_Y = -1000
+
+# Constants used to scale our sprites from their original size
+CHARACTER_SCALING = 0.25
+TILE_SCALING = 1.6
+COIN_SCALING = 0.5
+
+# Movement speed of player, in pixels per frame
+PLAYER_MOVEMENT_SPEED = 5
+
+# The game logic always moves in steps of this many seconds, no matter how
+# fast we draw. All the speeds above are in pixels per step.
+FIXED_TIME_STEP = 1 / 60
+
+# If drawing falls far behind, only catch up this many steps per frame.
+# The rest of the lost time is dropped so the game slows down instead of
+# getting stuck trying to catch up.
+MAX_STEPS_PER_FRAME = 5
+
+# Moves bigger than this between two steps are teleports (wrapping around
+# the screen), so we don't slide the sprite across the screen when drawing.
+MAX_INTERPOLATE_DISTANCE = SCREEN_HEIGHT // 2
+
+# The road the player drives on, between the grass on either side
+ROAD_LEFT = 250
+ROAD_RIGHT = SCREEN_WIDTH - 250
+
+# Points for each coin picked up
+COIN_POINTS = 10
+
+# The keys the game listens to. The same numbers as arcade.key, which we
+# don't import here.
+KEY_LEFT = 65361
+KEY_UP = 65362
+KEY_RIGHT = 65363
+KEY_DOWN = 65364
+KEY_SPACE = 32
+
+# The player's colour, and the colour it flashes after a crash. The same
+# as arcade.color.WHITE and arcade.color.AMAZON.
+PLAYER_COLOR = (255, 255, 255)
+CRASH_COLOR = (59, 122, 87)
+
+
+class Body:
+    """
+    The parts of a sprite the rules use: where it is, how it moves and
+    which image it wears, by name. Games without a window are played on
+    these. arcade.Sprite has all the same parts.
+    """
+
+    def __init__(self, image, scale=1):
+        self.textures = [texture_name(image)]
+        self.texture = self.textures[0]
+        self.scale = scale
+        self.angle = 0
+        self.center_x = 0
+        self.center_y = 0
+        self.change_x = 0
+        self.change_y = 0
+        self.change_angle = 0
+        self.alpha = 255
+        self.color = PLAYER_COLOR
+
+    def set_position(self, center_x, center_y):
+        self.center_x = center_x
+        self.center_y = center_y
+
+    def append_texture(self, image):
+        """ Another image it can wear """
+        self.textures.append(texture_name(image))
+
+    def set_texture(self, texture_no):
+        """ Wear one of its images """
+        self.texture = self.textures[texture_no]
+
+    def update(self):
+        """ Move one step, the same as arcade.Sprite.update() """
+        self.center_x = self.center_x + self.change_x
+        self.center_y = self.center_y + self.change_y
+        self.angle += self.change_angle
+
+
+class VehicleRules:
+    """
+    Vehicle class
+    How the player's car moves. VehicleBody and the window's VehicleSprite
+    are it on a Body and on an arcade.Sprite.
+    """
+
+    def __init__(self, image, scale):
+        """ Set up the Vehicle """
+
+        # Call the parent init
+        super().__init__(image, scale)
+
+        # Create a variable to hold our speed. 'angle' is created by the parent
+        # The put vehicle to init position
+        self.speed = 0
+        self.max_speed = 5
+        self.respawning = 0
+
+        # Bottom of the screen in the world, the game keeps it up to date
+        self.view_bottom = 0
+
+        # Mark that we are respawning.
+        self.respawn()
+
+    def respawn(self):
+        """
+        Called when we die and need to make a new vehicle.
+        'respawning' is an invulnerability timer.
+        """
+        # If we are in the middle of respawning, this is non-zero.
+        self.respawning = 1
+        self.center_x = SCREEN_WIDTH / 2
+        self.center_y = 600
+        self.start_step()
+
+    def start_step(self):
+        """ Remember where a step starts, so crashes can be looked for along the way """
+        self.start_x = self.center_x
+        self.start_y = self.center_y
+
+    def update(self):
+
+        # Acceleration
+        if self.speed > self.max_speed:
+            self.speed = self.max_speed
+        self.change_y = self.change_y + self.speed
+
+        # print("X: %s" % self.change_x)
+        # print("Y: %s" % self.change_y)
+        self.center_x += self.change_x
+        self.center_y += self.change_y
+
+        # DEBUG:
+        # See if the obj hit the edge of the screen.
+        # If so, change direction
+        if self.center_x < ROAD_LEFT:
+            self.center_x = ROAD_LEFT
+        if self.center_x > ROAD_RIGHT:
+            self.center_x = ROAD_RIGHT
+        if self.center_y < self.view_bottom + 1:
+            self.center_y = self.view_bottom + 1
+        if self.center_y > self.view_bottom + SCREEN_HEIGHT - 1:
+            self.center_y = self.view_bottom + SCREEN_HEIGHT - 1
+
+        """ Call the parent class. """
+        super().update()
+
+
+def press_key(vehicle, key):
+    """ What pressing a driving key does to a vehicle """
+    if key == KEY_LEFT:
+        vehicle.change_x = -MOVEMENT_SPEED
+    elif key == KEY_RIGHT:
+        vehicle.change_x = MOVEMENT_SPEED
+    elif key == KEY_UP:
+        vehicle.change_y = MOVEMENT_SPEED
+    elif key == KEY_DOWN:
+        vehicle.change_y = -MOVEMENT_SPEED
+    elif key == KEY_SPACE:
+        vehicle.speed = vehicle.speed + 1
+
+
+def release_key(vehicle, key):
+    """ What letting go of a driving key does to a vehicle """
+    if key == KEY_LEFT or key == KEY_RIGHT:
+        vehicle.change_x = 0
+    elif key == KEY_UP or key == KEY_DOWN:
+        vehicle.change_y = 0
+    elif key == KEY_SPACE:
+        vehicle.speed = 0
+
+
+class PooledRules:
+    """
+    A sprite that is made once and then reused. Instead of removing it from
+    the sprite lists when it is hit or left behind, we hide it and park it
+    off the road until the road needs it again.
+    """
+
+    def __init__(self, image, scale):
+        super().__init__(image, scale=scale)
+        self.active = False
+
+        # Row in the entity store that moves this sprite
+        self.index = None
+
+    def activate(self):
+        """ Put the sprite back in the game """
+        self.active = True
+        self.alpha = 255
+
+    def deactivate(self):
+        """ Take the sprite out of the game and hide it """
+        self.active = False
+        self.alpha = 0
+        self.change_x = 0
+        self.change_y = 0
+        self.center_x = PARKING_X
+        self.center_y = PARKING_Y
+
+
+class VehicleBody(VehicleRules, Body):
+    """ The player's car, without a window """
+
+
+class PooledBody(PooledRules, Body):
+    """ A competitor or coin, without a window """
+
+
+class OthersBody(PooledBody):
+    """ A competitor, without a window. TrafficStore drives them. """
+
+    def __init__(self, image, scale):
+        super().__init__(image, scale=scale)
+        self.size = 0
+
+
+class CoinStore(EntityStore):
+    """
+    All the coins. They lie still on the road and the camera drives past
+    them, so there is nothing to move.
+    """
+
+
+def lives_lost(lives):
+    """ Lives a game has lost, counting every crash even below zero """
+    return STARTING_LIVES - lives
+
+
+class GameLogic:
+    """
+    The rules of the game: sprites, movement, collisions and scoring.
+    Nothing in here opens a window, so it can also run headless. The
+    make_* methods make the sprites and lists; the window makes arcade ones.
+    """
+
+    def __init__(self, *args, **kwargs):
+
+        # Pass any window arguments along to the next class
+        super().__init__(*args, **kwargs)
+
+        # Decode every image once, and read any saved hit boxes
+        self.load_assets()
+        hitboxes.load_cache()
+
+        self.current_state = INSTRUCTIONS_PAGE
+
+        # All the game's random numbers come from here. Seed it to play
+        # the same games again; each game gets its own seed from it.
+        self.rng = random.Random()
+        self.run_seed = None
+
+        # Steps played in this game, so recorded keys know when they happened
+        self.steps = 0
+
+        # Gets told about every game and key press, to record them
+        self.recorder = None
+
+        # Keeps the best runs, if there is somewhere to save them, and
+        # where the last run came in (None if it didn't make the list)
+        self.high_scores = None
+        self.high_score_rank = None
+
+        # Times each phase of a frame, when it is turned on
+        self.profiler = FrameProfiler()
+
+        # Nitrous exhaust and crash debris. Only the window makes them;
+        # without one there is nothing to see.
+        self.particles = None
+
+        # Turns the traffic and effects down when frames take too long, if
+        # there is one. How much of the road's traffic shows up, and how
+        # far along the next car to let through is.
+        self.governor = None
+        self.traffic_share = 1.0
+        self.spawn_credit = 0.0
+
+        self.total_time = 0.0
+        self.lives = None
+        self.collision_time = None
+
+        # How many competitors can be on the road at once, and how many
+        # coins go on each chunk of road
+        self.objects_count = STARTING_OBJECTS_COUNT
+        self.coin_count = COIN_COUNT
+
+        # All Sprites
+        self.all_sprites_list = None
+
+        # These are 'lists' that keep track of our sprites. Each sprite should
+        # go into a list.
+        self.coin_list = None
+        self.wall_list = None
+        self.player_list = None
+        self.myobject_list = None
+        self.coin_list = None
+
+        # Separate variable that holds the player sprite
+        self.player_sprite = None
+
+        # Our physics engine
+        self.physics_engine = None
+
+        # Positions and speeds of the competitors and coins, and the rows
+        # of the cars wearing each image
+        self.traffic = None
+        self.coins = None
+        self.car_pools = None
+
+        # The chunks of road around the camera
+        self.world = None
+
+        # Where we have scrolled to, and where we were one step ago
+        self.view_left = 0
+        self.view_bottom = 0
+        self.last_view_bottom = 0
+
+        # Time that has passed but not been simulated yet
+        self.time_accumulator = 0.0
+
+    def load_assets(self):
+        """
+        Nothing to decode without a window. The hit boxes are read from
+        the image files the first time they are needed.
+        """
+
+    def make_sprite_list(self):
+        """ Something to keep sprites in. Without a window it is never drawn. """
+        return []
+
+    def make_player(self):
+        """ The player's car """
+        return VehicleBody(image_file("bugatti.png"), CHARACTER_SCALING)
+
+    def make_car(self, image):
+        """ A competitor wearing one of the car images """
+        return OthersBody(image_file(image), CHARACTER_SCALING)
+
+    def make_coin(self):
+        """ A coin """
+        # Coin image from kenney.nl
+        return PooledBody(image_file("coin_01.png"), SPRITE_SCALING_COIN)
+
+    # Make the enemies
+    def create_buddies(self):
+        """
+        Make the pools of competitors, one for each car image, each big
+        enough to fill the road on its own. The road sends them out.
+        """
+        self.traffic = TrafficStore(self.objects_count * len(CAR_IMAGES),
+                                    lane_centers(ROAD_LEFT, ROAD_RIGHT))
+
+        # First and last row + 1 of the cars wearing each image
+        self.car_pools = {}
+        for image in CAR_IMAGES:
+            start = self.traffic.count
+            for i in range(self.objects_count):
+                enemy_sprite = self.make_car(image)
+                enemy_sprite.guid = "Competitors"
+
+                enemy_sprite.angle = 90
+                hitboxes.apply(enemy_sprite)
+
+                self.all_sprites_list.append(enemy_sprite)
+                self.myobject_list.append(enemy_sprite)
+                self.traffic.add(enemy_sprite)
+            self.car_pools[image] = (start, self.traffic.count)
+
+    def spawn_buddy(self, car):
+        """
+        Bring a competitor up from behind the screen, if the pool for its
+        image has one free and its lane has room. If not, the car never
+        shows up.
+        """
+        # With the traffic turned down, only some of the cars the road
+        # sends show up, and fewer of them are on the road at once
+        self.spawn_credit += self.traffic_share
+        if self.spawn_credit < 1:
+            return
+        self.spawn_credit -= 1
+        if self.traffic.active_count() >= max(1, round(self.objects_count * self.traffic_share)):
+            return
+
+        center_y = self.view_bottom + BOTTOM_LIMIT
+        index = self.traffic.free_index(*self.car_pools[BUDDY_IMAGES[car.texture]])
+        if index is None or not self.traffic.lane_clear(car.lane, center_y):
+            return
+
+        self.traffic.sprites[index].size = 0
+
+        self.traffic.spawn_car(index, car.lane, center_y, car.speed)
+
+    # Make treasure
+    def create_treasure(self):
+        """ Make the pool of coins. The road puts them down. """
+        self.coins = CoinStore(self.coin_count * COIN_CHUNKS_ON_SCREEN)
+
+        for i in range(self.coins.capacity):
+            # Create the coin instance
+            coin_sprite = self.make_coin()
+            hitboxes.apply(coin_sprite)
+
+            # Add the coin to the lists
+            self.all_sprites_list.append(coin_sprite)
+            self.coin_list.append(coin_sprite)
+            self.coins.add(coin_sprite)
+
+    def spawn_coin(self, center_x, center_y):
+        """ Put a coin on the road, if the pool has one free """
+        index = self.coins.free_index()
+        if index is not None:
+            self.coins.spawn(index, center_x, center_y)
+
+    def create_world(self):
+        """ Start a new road at the bottom of the world """
+        # Cars drive up the screen, so in the world they also go as fast
+        # as the road scrolls
+        speeds = (OBJECTS_SPEED + ROAD_SPEED, 3 * OBJECTS_SPEED + ROAD_SPEED)
+        chunks = road_chunks(self.rng, lane_centers(ROAD_LEFT, ROAD_RIGHT),
+                             self.objects_count * CARS_PER_CHUNK, self.coin_count,
+                             speeds, len(BUDDY_IMAGES))
+        self.world = WorldStreamer(chunks)
+        self.stream_world()
+
+    def stream_world(self):
+        """ Keep the road going ahead of the camera and drop what is behind """
+        cars, coins = self.world.advance(self.view_bottom,
+                                         self.view_bottom + SCREEN_HEIGHT)
+        for car in cars:
+            self.spawn_buddy(car)
+        for center_x, center_y in coins:
+            self.spawn_coin(center_x, center_y)
+
+        # Give back the sprites that went off the screen
+        self.traffic.retire_outside(self.view_bottom + BOTTOM_LIMIT,
+                                    self.view_bottom + TOP_LIMIT)
+        self.coins.retire_outside(self.view_bottom)
+
+    def setup(self, seed=None):
+        """
+        Set up the game here, making every sprite and list. restart() is
+        the quick way to play again.
+        The same seed and the same keys make the same game.
+        """
+        self.reset_run(seed)
+
+        # Create the Sprite lists
+        self.all_sprites_list = self.make_sprite_list()
+        self.player_list = self.make_sprite_list()
+        self.wall_list = self.make_sprite_list()
+        self.coin_list = self.make_sprite_list()
+        self.myobject_list = self.make_sprite_list()
+
+        # Set up the player
+        self.player_sprite = self.make_player()
+        self.player_sprite.angle = 90
+        hitboxes.apply(self.player_sprite)
+        # self.player_sprite.change_y = 1
+        self.all_sprites_list.append(self.player_sprite)
+
+        # Set the viewport boundaries
+        # These numbers set where we have 'scrolled' to.
+        self.view_left = 0
+        self.view_bottom = 0
+        self.last_view_bottom = 0
+
+        self.create_buddies()
+        self.create_treasure()
+        self.create_world()
+
+        # Set up the player, specifically placing it at these coordinates.
+        # self.player_sprite = arcade.Sprite("images\\carcar.png", CHARACTER_SCALING)
+        # self.player_sprite.center_x = 500
+        # self.player_sprite.center_y = 110
+        # self.player_sprite.angle = 90
+        # self.player_sprite.change_y = 1
+        # self.player_list.append(self.player_sprite)
+
+        self.time_accumulator = 0.0
+
+        if self.recorder is not None:
+            self.recorder.start_game(self)
+
+    def reset_run(self, seed):
+        """ Seed the dice and start the clock, score and lives again """
+        if seed is None:
+            seed = self.rng.getrandbits(32)
+        self.run_seed = seed
+        self.rng.seed(seed)
+
+        self.total_time = 0.0
+        self.steps = 0
+
+        self.score = 0
+        self.lives = STARTING_LIVES
+        self.collision_time = 0
+        self.high_score_rank = None
+        self.spawn_credit = 0.0
+
+        if self.particles is not None:
+            self.particles.reset()
+
+    def restart(self, seed=None):
+        """
+        Play again on the sprites, lists and stores of the last game. Only
+        the state is set back, nothing is made again, so the lists draw
+        with the GPU buffers they already have. The same seed and keys
+        make the same game as setup() does.
+        """
+        if (self.traffic is None or self.traffic.capacity != self.objects_count * len(CAR_IMAGES)
+                or self.coins.capacity != self.coin_count * COIN_CHUNKS_ON_SCREEN):
+            # The pools are the wrong size for this game
+            self.setup(seed)
+            return
+
+        self.reset_run(seed)
+
+        # Back to the start line, standing still
+        player = self.player_sprite
+        player.respawn()
+        player.change_x = 0
+        player.change_y = 0
+        player.speed = 0
+        player.view_bottom = 0
+        player.color = PLAYER_COLOR
+        player.last_x = player.center_x
+        player.last_y = player.center_y
+
+        self.view_left = 0
+        self.view_bottom = 0
+        self.last_view_bottom = 0
+
+        # Park everything and start a new road
+        self.traffic.reset()
+        self.coins.reset()
+        self.create_world()
+
+        self.time_accumulator = 0.0
+
+        if self.recorder is not None:
+            self.recorder.start_game(self)
+
+    def on_key_press(self, key, modifiers):
+        """ Called whenever the user presses a key. """
+        if self.current_state == GAME_RUNNING:
+            if self.recorder is not None:
+                self.recorder.key(self, True, key)
+
+            press_key(self.player_sprite, key)
+
+    def on_key_release(self, key, modifiers):
+        """ Called whenever a user releases a key. """
+        if self.current_state == GAME_RUNNING:
+            if self.recorder is not None:
+                self.recorder.key(self, False, key)
+
+            release_key(self.player_sprite, key)
+
+    def update(self, delta_time):
+        """
+        Called by the window with however much time passed since the last
+        frame. Runs as many fixed steps as fit into that time.
+        """
+        self.time_accumulator += delta_time
+
+        steps = 0
+        while self.time_accumulator >= FIXED_TIME_STEP:
+            if steps == MAX_STEPS_PER_FRAME:
+                # Too far behind, forget about the rest
+                self.time_accumulator = 0.0
+                break
+
+            self.remember_positions()
+            self.step()
+            self.time_accumulator -= FIXED_TIME_STEP
+            steps += 1
+
+    def govern(self, seconds):
+        """ Tell the governor how long a frame took, and change the load if it says so """
+        if self.governor is None:
+            return
+        if self.governor.add_frame(seconds) is not None:
+            self.apply_load()
+
+    def apply_load(self):
+        """ Set the traffic and effects to the governor's level """
+        traffic_share, effects_share = self.governor.settings()
+        self.set_traffic_share(traffic_share)
+        if self.particles is not None:
+            self.particles.amount = effects_share
+
+    def set_traffic_share(self, share):
+        """
+        Let only this share of the road's traffic through, from the next
+        step on. It changes how the game plays, so it is recorded like a key.
+        """
+        self.traffic_share = share
+        if self.recorder is not None:
+            self.recorder.traffic(self, share)
+
+    def remember_positions(self):
+        """ Save where everything is, so drawing can blend between steps """
+        if self.all_sprites_list is None:
+            return
+
+        self.player_sprite.last_x = self.player_sprite.center_x
+        self.player_sprite.last_y = self.player_sprite.center_y
+        self.traffic.remember()
+        self.coins.remember()
+        self.last_view_bottom = self.view_bottom
+
+    def step(self):
+
+        """ Movement and game logic for one fixed time step """
+        if self.current_state == GAME_RUNNING:
+            profiler = self.profiler
+            profiler.start()
+            self.move_all()
+            self.check_crashes()
+            profiler.mark("crashes")
+            self.collect_coins()
+            profiler.mark("coins")
+            self.update_particles()
+            profiler.mark("particles")
+
+            if self.current_state == GAME_OVER:
+                self.end_run()
+
+    def end_run(self):
+        """ The game is over: keep its keys and its score """
+        if self.recorder is not None:
+            self.recorder.end_game(self)
+        if self.high_scores is not None:
+            self.high_score_rank = self.high_scores.add(
+                self.score, self.total_time, lives_lost(self.lives), self.run_seed)
+
+    def move_all(self):
+        """ Scroll the road and move everything on it """
+        self.steps += 1
+        self.player_sprite.start_step()
+
+        # Scroll the road, taking the player along
+        self.view_bottom += ROAD_SPEED
+        self.player_sprite.center_y += ROAD_SPEED
+        self.player_sprite.view_bottom = self.view_bottom
+        self.stream_world()
+        self.profiler.mark("stream")
+
+        player_y = self.player_sprite.center_y
+        self.player_sprite.update()
+
+        # The competitors drive around the player, so they need to know
+        # where it is and how fast it is going
+        half_width, half_height = half_size(self.player_sprite)
+        self.traffic.set_obstacle(self.player_sprite.center_x, self.player_sprite.center_y,
+                                  self.player_sprite.center_y - player_y + ROAD_SPEED,
+                                  half_width, half_height)
+        self.traffic.update()
+        self.coins.update()
+
+        # Game Clock
+        self.total_time += FIXED_TIME_STEP
+
+        # flick if it was collision
+        if self.collision_time:
+            if self.collision_time % 2:
+                self.player_sprite.color = CRASH_COLOR
+            else:
+                self.player_sprite.color = PLAYER_COLOR
+
+        # Call update on all sprites (The sprites don't do much in this
+        # example though.)
+        # self.physics_engine.update()
+        self.profiler.mark("move")
+
+    def update_particles(self):
+        """ Flames out of the back while the nitrous is on, then move every particle """
+        if self.particles is None:
+            return
+        player = self.player_sprite
+        if player.speed > 0:
+            half_width, half_height = half_size(player)
+            self.particles.exhaust(player.center_x, player.center_y - half_height,
+                                   player.center_y - player.start_y)
+        self.particles.update()
+
+    def check_crashes(self):
+        """ Take a life for every competitor the player hits """
+        # Generate a list of all enemies the player touched during the
+        # step, even ones it went straight through on nitrous
+        player = self.player_sprite
+        ene_hit_list = self.traffic.sweep_for_collision(player, player.start_x, player.start_y)
+
+        # Loop through each colliding sprite, park it, and take a life.
+        for myobject, time in ene_hit_list:
+            if not myobject.active:
+                continue
+            self.traffic.kill(myobject.index)
+            self.lives -= 1
+            self.collision_time = 50
+            self.player_sprite.color = CRASH_COLOR
+            if self.particles is not None:
+                self.particles.burst(myobject.center_x, myobject.center_y, ROAD_SPEED)
+
+        if self.lives < 1:
+            self.current_state = GAME_OVER
+
+    def collect_coins(self):
+        """ Score every coin the player drives over """
+        # Generate a list of coins the player went over during the step.
+        player = self.player_sprite
+        coin_hit_list = self.coins.sweep_for_collision(player, player.start_x, player.start_y)
+        for coin, time in coin_hit_list:
+            if not coin.active:
+                continue
+            self.coins.kill(coin.index)
+            self.score += COIN_POINTS
+
+
@@ -0,0 +1,242 @@
+"""
+High scores.
+
+Every finished run is added to a log file, one line per run, and never
+changed after that:
+
+    <score> <seconds> <lives lost> <seed> <checksum>
+
+A line is only written whole, followed by a flush and an fsync, and the
+checksum is over the rest of the line. If the game dies part way through a
+write, the last line is torn or its checksum is wrong, and loading skips it
+(and cuts it off the file, so the next run starts on a fresh line).
+
+The log only ever grows, so once it has COMPACT_LINES lines more than it
+needs, it is rewritten with just the best KEEP runs: written to a new file,
+synced, then swapped in with os.replace(). A crash at any point leaves
+either the old log or the new one, never half of each.
+
+The best KEEP runs are also kept in memory, best first, so top() is just a
+slice. Writing happens on a background thread: add() puts the run in the
+list and on a queue and returns straight away, so the game loop never
+waits for the disk.
+
+    python -m FinalProject.scores
+
+prints the best runs.
+"""
+import argparse
+import bisect
+import os
+import queue
+import threading
+import zlib
+
+SCORES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "highscores.log")
+
+# Best runs kept in memory and in the compacted log, and how many of them
+# the game over screen shows
+KEEP = 100
+SHOWN = 5
+
+# Rewrite the log once it has this many more lines than KEEP
+COMPACT_LINES = 400
+
+
+class Run:
+    """ One finished run """
+
+    def __init__(self, score, seconds, lives_lost, seed):
+        self.score = score
+        self.seconds = seconds
+        self.lives_lost = lives_lost
+        self.seed = seed
+
+        # Set once it is in the log, so compacting doesn't write a run the
+        # queue is still going to append
+        self.written = False
+
+    def sort_key(self):
+        # Higher score first, then the one that lasted longer
+        return (-self.score, -self.seconds)
+
+    def line(self):
+        """ The run as a line of the log, with its checksum """
+        fields = f"{self.score} {self.seconds:.3f} {self.lives_lost} {self.seed}"
+        return f"{fields} {zlib.crc32(fields.encode()):08x}\n"
+
+
+def parse_line(line):
+    """ The run on a line of the log, or None if the line is torn or damaged """
+    if not line.endswith("\n"):
+        return None
+    fields, _, checksum = line.rstrip("\n").rpartition(" ")
+    try:
+        if int(checksum, 16) != zlib.crc32(fields.encode()):
+            return None
+        score, seconds, lives_lost, seed = fields.split()
+        return Run(int(score), float(seconds), int(lives_lost),
+                   None if seed == "None" else int(seed))
+    except ValueError:
+        return None
+
+
+def read_log(path):
+    """
+    Every good run in a log, how many lines it has and where the last whole
+    line ends
+    """
+    runs = []
+    lines = 0
+    good_end = 0
+    if not os.path.exists(path):
+        return runs, lines, good_end
+
+    with open(path, "rb") as file:
+        for raw in file:
+            lines += 1
+            run = parse_line(raw.decode("utf-8", "replace"))
+            if run is not None:
+                runs.append(run)
+            if raw.endswith(b"\n"):
+                good_end = file.tell()
+    return runs, lines, good_end
+
+
+class HighScores:
+    """
+    The best runs, best first, and the log they are saved in. add() is
+    called from the game; the log is written by a background thread.
+    """
+
+    def __init__(self, path=SCORES_FILE, keep=KEEP, compact_lines=COMPACT_LINES):
+        self.path = path
+        self.keep = keep
+        self.compact_lines = compact_lines
+
+        # Best first. The keys are kept alongside for bisect.
+        self.runs = []
+        self.keys = []
+        self.lock = threading.Lock()
+
+        runs, self.log_lines, good_end = read_log(path)
+        for run in runs:
+            run.written = True
+            self.insert(run)
+
+        # Cut off a torn last line, so the next run is not glued onto it
+        if os.path.exists(path) and os.path.getsize(path) != good_end:
+            with open(path, "r+b") as file:
+                file.truncate(good_end)
+                file.flush()
+                os.fsync(file.fileno())
+
+        self.queue = queue.Queue()
+        self.writer = threading.Thread(target=self.write_loop, name="high-scores", daemon=True)
+        self.writer.start()
+
+    def insert(self, run):
+        """ Put a run in its place in the list. Returns its rank, or None. """
+        with self.lock:
+            key = run.sort_key()
+            rank = bisect.bisect_right(self.keys, key)
+            if rank >= self.keep:
+                return None
+            self.keys.insert(rank, key)
+            self.runs.insert(rank, run)
+            del self.keys[self.keep:]
+            del self.runs[self.keep:]
+            return rank
+
+    def add(self, score, seconds, lives_lost, seed):
+        """
+        Save a finished run. Returns its rank (0 is the best) or None if it
+        is not in the top KEEP. Never waits for the disk.
+        """
+        run = Run(score, seconds, lives_lost, seed)
+        rank = self.insert(run)
+        self.queue.put(run)
+        return rank
+
+    def top(self, count=SHOWN):
+        """ The best runs, best first """
+        with self.lock:
+            return self.runs[:count]
+
+    def write_loop(self):
+        """ The background thread: append each run, compact when it is time """
+        while True:
+            run = self.queue.get()
+            try:
+                if run is None:
+                    return
+                self.append(run)
+                if self.log_lines > self.keep + self.compact_lines:
+                    self.compact()
+            finally:
+                self.queue.task_done()
+
+    def append(self, run):
+        """ Add one line to the log and make sure it is on the disk """
+        with open(self.path, "a") as file:
+            file.write(run.line())
+            file.flush()
+            os.fsync(file.fileno())
+        run.written = True
+        self.log_lines += 1
+
+    def compact(self):
+        """ Rewrite the log with only the runs worth keeping """
+        runs = [run for run in self.top(self.keep) if run.written]
+        new_path = self.path + ".new"
+        with open(new_path, "w") as file:
+            for run in runs:
+                file.write(run.line())
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(new_path, self.path)
+
+        # Make the rename itself stick, where the system lets us
+        try:
+            directory = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_RDONLY)
+        except OSError:
+            pass
+        else:
+            try:
+                os.fsync(directory)
+            except OSError:
+                pass
+            os.close(directory)
+        self.log_lines = len(runs)
+
+    def flush(self):
+        """ Wait until every run added so far is on the disk """
+        self.queue.join()
+
+    def close(self):
+        """ Write what is left and stop the background thread """
+        self.queue.put(None)
+        self.writer.join()
+
+
+def format_run(rank, run):
+    """ One row of the high score table """
+    minutes, seconds = divmod(int(run.seconds), 60)
+    return f"{rank + 1:2d}. {run.score:05d}  {minutes:02d}:{seconds:02d}"
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Print the best runs.")
+    parser.add_argument("path", nargs="?", default=SCORES_FILE)
+    parser.add_argument("--count", type=int, default=10, help="how many to print")
+    args = parser.parse_args()
+
+    scores = HighScores(args.path)
+    for rank, run in enumerate(scores.top(args.count)):
+        print(f"{format_run(rank, run)}  lives lost {run.lives_lost}  seed {run.seed}")
+    scores.close()
+
+
+if __name__ == "__main__":
+    main()
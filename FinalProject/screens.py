@@ -0,0 +1,60 @@
+"""
+Static screens.
+
+The instructions page and the game over box never change, so their
+rectangles go into a ShapeElementList (uploaded to the GPU once) and their
+text into a SpriteList of pre-rendered strings. Drawing a screen is then a
+single draw() instead of redoing every rectangle and string each frame.
+"""
+import arcade
+
+from .hud import text_sprite
+
+
+class StaticScreen:
+    """ Rectangles and text that are built once and drawn many times """
+
+    def __init__(self):
+        self.shapes = arcade.ShapeElementList()
+        self.text = arcade.SpriteList()
+
+    def add_rectangle(self, center_x, center_y, width, height, color):
+        """ Add a filled rectangle """
+        self.shapes.append(arcade.create_rectangle_filled(center_x, center_y,
+                                                          width, height, color))
+
+    def add_text(self, text, start_x, start_y, color, font_size):
+        """ Add a line of text, bottom left corner at start_x, start_y """
+        self.text.append(text_sprite(text, start_x, start_y, color, font_size))
+
+    def draw(self):
+        """ Draw the rectangles, then the text on top """
+        self.shapes.draw()
+        self.text.draw()
+
+
+class FrozenFrame:
+    """
+    A copy of what was on the screen, drawn back as one texture. Used to
+    keep the last frame of the race under the game over box without
+    drawing the whole game again every frame.
+    """
+
+    def __init__(self):
+        self.texture = None
+
+    def capture(self):
+        """ Copy the screen as it is right now """
+        window = arcade.get_window()
+        image = arcade.get_image(0, 0, window.width, window.height)
+        self.texture = arcade.Texture(f"frozen-frame-{id(image)}", image)
+
+    def clear(self):
+        """ Forget the copy """
+        self.texture = None
+
+    def draw(self):
+        """ Draw the copy over the whole window """
+        window = arcade.get_window()
+        arcade.draw_texture_rectangle(window.width // 2, window.height // 2,
+                                      window.width, window.height, self.texture)
@@ -0,0 +1,168 @@
+"""
+Headless simulation of the racing game.
+
+Runs the same GameLogic as the window, just without a window, as fast as the
+CPU allows. Good for soak tests and benchmarks on machines with no display.
+
+    python -m FinalProject.sim --ticks 100000
+
+With --seed the same games are played every time, and --record saves them
+so FinalProject.replay can check they still come out the same. --scores
+adds every finished game to a high score log, the same as the window does.
+--budget turns on the frame-time governor with each tick as a frame, to
+see what it decides (a tiny budget stands in for a slow machine).
+"""
+import argparse
+import random
+import time
+
+from .governor import FrameGovernor
+
+from .rules import (GameLogic, GAME_RUNNING, GAME_OVER,
+                    KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN, KEY_SPACE)
+from .replay import InputRecorder
+from .scores import HighScores, format_run
+
+# Keys a driver can hold down
+DRIVER_KEYS = (KEY_LEFT, KEY_RIGHT, KEY_UP, KEY_DOWN, KEY_SPACE)
+
+
+class HeadlessGame(GameLogic):
+    """
+    The game without a window. Each tick is one fixed time step, with no
+    waiting in between. Restarts itself when the player runs out of lives,
+    so a long run keeps playing game after game.
+    """
+
+    def __init__(self, driver="idle", cars=None, coins=None, seed=None):
+        super().__init__()
+        self.rng.seed(seed)
+
+        # The driver has its own dice, so replays (which have no driver)
+        # get the same random numbers as the game that was recorded
+        self.driver_rng = random.Random(seed)
+
+        if cars is not None:
+            self.objects_count = cars
+        if coins is not None:
+            self.coin_count = coins
+
+        self.driver = driver
+        self.held_key = None
+        self.ticks = 0
+        self.games_played = 0
+        self.total_score = 0
+
+    def start(self):
+        """ Start a new game """
+        self.restart()
+        self.current_state = GAME_RUNNING
+        self.held_key = None
+
+    def drive(self):
+        """ Let the driver press and release keys like a player would """
+        if self.driver != "random":
+            return
+
+        # Change what we are doing about four times a second
+        if self.driver_rng.randrange(15):
+            return
+        if self.held_key is not None:
+            self.on_key_release(self.held_key, 0)
+        self.held_key = self.driver_rng.choice(DRIVER_KEYS)
+        self.on_key_press(self.held_key, 0)
+
+    def tick(self):
+        """ Run one frame of the game """
+        if self.current_state == GAME_OVER:
+            self.games_played += 1
+            self.total_score += self.score
+            self.start()
+
+        start_time = time.perf_counter()
+        self.drive()
+        self.step()
+        self.profiler.end_frame()
+        self.ticks += 1
+        self.govern(time.perf_counter() - start_time)
+
+
+def run(ticks, driver="idle", cars=None, coins=None, seed=None):
+    """ Run the game for a number of ticks and return the finished game """
+    game = HeadlessGame(driver, cars, coins, seed)
+    game.start()
+
+    for i in range(ticks):
+        game.tick()
+
+    return game
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Run the racing game without a window.")
+    parser.add_argument("--ticks", type=int, default=10000,
+                        help="number of frames to simulate")
+    parser.add_argument("--driver", choices=("idle", "random"), default="random",
+                        help="who is at the wheel")
+    parser.add_argument("--cars", type=int, default=None,
+                        help="competitors on the road at once")
+    parser.add_argument("--coins", type=int, default=None,
+                        help="coins on each chunk of road")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="play the same games every time")
+    parser.add_argument("--record", metavar="FILE",
+                        help="save every game's keys to FILE, to replay later")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="time every tick and save the times to FILE (.csv or .json)")
+    parser.add_argument("--scores", metavar="FILE",
+                        help="add every finished game to the high scores in FILE")
+    parser.add_argument("--budget", type=float, metavar="MS",
+                        help="turn the load down when ticks take longer than this")
+    parser.add_argument("--governor-log", metavar="FILE",
+                        help="save the governor's decisions to FILE (.csv)")
+    args = parser.parse_args()
+
+    game = HeadlessGame(args.driver, args.cars, args.coins, args.seed)
+    if args.record:
+        game.recorder = InputRecorder()
+    if args.scores:
+        game.high_scores = HighScores(args.scores)
+    if args.budget:
+        game.governor = FrameGovernor(args.budget, log_path=args.governor_log)
+    game.profiler.enabled = bool(args.profile)
+    game.start()
+
+    start_time = time.perf_counter()
+    for i in range(args.ticks):
+        game.tick()
+    elapsed = time.perf_counter() - start_time
+
+    if game.recorder is not None:
+        game.recorder.end_game(game)
+        game.recorder.save(args.record)
+
+    if args.profile:
+        game.profiler.save(args.profile)
+        averages = game.profiler.averages(game.ticks)
+        print("Average ms:   " + "  ".join(f"{phase} {time_ms:.4f}"
+                                            for phase, time_ms in averages.items()
+                                            if time_ms))
+
+    print(f"Ticks:        {game.ticks}")
+    print(f"Time:         {elapsed:.2f} s")
+    print(f"Ticks/second: {game.ticks / elapsed:.0f}")
+    print(f"Games over:   {game.games_played}")
+    print(f"Score now:    {game.score}  Lives: {game.lives}")
+    if game.governor is not None:
+        print(f"Load level:   {game.governor.level} after "
+              f"{len(game.governor.decisions)} changes")
+
+    if game.high_scores is not None:
+        game.high_scores.close()
+        for rank, run in enumerate(game.high_scores.top(3)):
+            print(f"High score:   {format_run(rank, run)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Startup budget.
+
+The tools that only play the game (the sim, replay, batch runs, the
+training environment, the frame benchmark, the multiplayer server) import
+rules.py, which doesn't import arcade, so they start without loading
+pyglet and OpenGL. This checks it stays that way: it imports each of them
+in a fresh Python, a few times, and fails if one of them loads the
+window's libraries or takes longer than the budget.
+
+    python -m FinalProject.startup
+
+exits with 1 if anything is over. The window itself is timed too, to
+compare, but it has no budget.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Modules that have to start quickly, and how long they may take, in ms
+HEADLESS_MODULES = ("rules", "sim", "replay", "batch", "env", "scores", "bench", "net")
+BUDGET_MS = 250
+
+# Modules none of them may load
+WINDOW_MODULES = ("arcade", "pyglet")
+
+# Import each one this many times and keep the fastest, as the first run
+# also pays for reading the files off the disk
+REPEATS = 3
+
+# Runs in the fresh Python: import one module, say how long it took and
+# which of the window's modules came along
+PROBE = """
+import json, sys, time
+start_time = time.perf_counter()
+import FinalProject.{module}
+elapsed = time.perf_counter() - start_time
+print(json.dumps({{"ms": elapsed * 1000,
+                  "loaded": [name for name in {window_modules!r} if name in sys.modules]}}))
+"""
+
+
+def time_import(module, repeats=REPEATS):
+    """ Fastest import of FinalProject.<module> in a fresh Python, and what it loaded """
+    top = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = PROBE.format(module=module, window_modules=WINDOW_MODULES)
+    best = None
+    for i in range(repeats):
+        output = subprocess.run([sys.executable, "-c", code], cwd=top, check=True,
+                                capture_output=True, text=True).stdout
+        result = json.loads(output.splitlines()[-1])
+        if best is None or result["ms"] < best["ms"]:
+            best = result
+    return best
+
+
+def check(modules=HEADLESS_MODULES, budget_ms=BUDGET_MS):
+    """ Lines describing every module that is over budget or loads the window """
+    problems = []
+    for module in modules:
+        result = time_import(module)
+        over = result["ms"] > budget_ms
+        print(f"{module:12} {result['ms']:7.1f} ms"
+              + (f"  loads {', '.join(result['loaded'])}" if result["loaded"] else "")
+              + ("  OVER" if over else ""))
+        if result["loaded"]:
+            problems.append(f"{module} loads {', '.join(result['loaded'])}")
+        if over:
+            problems.append(f"{module} took {result['ms']:.1f} ms, budget {budget_ms} ms")
+    return problems
+
+
+def main():
+    """ Main method """
+    parser = argparse.ArgumentParser(description="Check the headless tools start quickly.")
+    parser.add_argument("--budget", type=float, default=BUDGET_MS,
+                        help="milliseconds each import may take")
+    args = parser.parse_args()
+
+    problems = check(budget_ms=args.budget)
+    window = time_import("RacingGame")
+    print(f"{'RacingGame':12} {window['ms']:7.1f} ms  (the window, no budget)")
+
+    for line in problems:
+        print("FAILED", line)
+    if problems:
+        sys.exit(1)
+    print("All within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Tests for the entity store's collision sweep: looking only at the rows
+sorted near the player finds the same hits as looking at every row.
+"""
+import numpy as np
+import pytest
+
+from FinalProject.entities import EntityStore, overlap_times
+from FinalProject.hitboxes import HitBox
+
+
+class Box:
+    """ Just enough of a sprite for the store """
+
+    def __init__(self, half_width, half_height):
+        self.hit_box = HitBox([(-half_width, -half_height), (half_width, -half_height),
+                               (half_width, half_height), (-half_width, half_height)])
+        self.center_x = self.center_y = 0.0
+        self.angle = 0
+
+    def set_position(self, x, y):
+        self.center_x, self.center_y = x, y
+
+    def activate(self):
+        pass
+
+    def deactivate(self):
+        self.center_x, self.center_y = -1000.0, -1000.0
+
+
+def every_hit(store, sprite, start_x, start_y):
+    """ The hits from timing every active row, without the sorted rows """
+    count = store.count
+    half_width, half_height = sprite.hit_box.half_width, sprite.hit_box.half_height
+    move_x = sprite.center_x - start_x
+    move_y = sprite.center_y - start_y
+    x, y = store.x[:count], store.y[:count]
+    change_x, change_y = store.change_x[:count], store.change_y[:count]
+    enter_x, leave_x = overlap_times(start_x - (x - change_x), move_x - change_x,
+                                     store.half_width[:count] + half_width)
+    enter_y, leave_y = overlap_times(start_y - (y - change_y), move_y - change_y,
+                                     store.half_height[:count] + half_height)
+    enter = np.maximum(enter_x, enter_y)
+    leave = np.minimum(leave_x, leave_y)
+    hit = store.active[:count] & (enter < leave) & (enter < 1) & (leave > 0)
+    return sorted(np.flatnonzero(hit).tolist())
+
+
+@pytest.mark.parametrize("count", [30, 2000])
+def test_sweep_matches_every_row(count):
+    """ A store too small to keep sorted, and one that is """
+    rng = np.random.default_rng(2)
+    road = count * 25
+    store = EntityStore(count)
+    for i in range(count):
+        index = store.add(Box(10, 20))
+        store.spawn(index, rng.uniform(0, 500), rng.uniform(0, road), 0.0, rng.uniform(0, 8))
+
+    player = Box(10, 20)
+    hits = 0
+    for step in range(300):
+        store.move()
+        # Some cars leave, some come back, between the moves
+        for index in rng.choice(count, count // 100 + 1, replace=False).tolist():
+            if store.active[index]:
+                store.kill(index)
+            else:
+                store.spawn(index, rng.uniform(0, 500), rng.uniform(0, road), 0.0, 3.0)
+
+        start_x, start_y = rng.uniform(0, 500), rng.uniform(0, road)
+        player.set_position(start_x + rng.uniform(-10, 10), start_y + rng.uniform(0, 60))
+        found = sorted(sprite.index for sprite, time in
+                       store.sweep_for_collision(player, start_x, start_y))
+        assert found == every_hit(store, player, start_x, start_y)
+        hits += len(found)
+    assert hits > 0
+
+
+def test_sweep_looks_at_few_rows():
+    store = EntityStore(10000)
+    for i in range(10000):
+        store.spawn(store.add(Box(10, 20)), 250.0, i * 50.0, 0.0, 3.0)
+    store.move()
+    assert len(store.rows_near(25000, 25010, 20)) < 10
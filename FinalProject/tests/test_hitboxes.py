@@ -0,0 +1,63 @@
+"""
+Tests for the hit boxes: the shapes worked out from the images, and the
+polygon test that says whether two of them overlap.
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from FinalProject import hitboxes
+
+
+def square(center_x, center_y, half):
+    return [(center_x - half, center_y - half), (center_x + half, center_y - half),
+            (center_x + half, center_y + half), (center_x - half, center_y + half)]
+
+
+def diamond(center_x, center_y, half):
+    return [(center_x, center_y - half), (center_x + half, center_y),
+            (center_x, center_y + half), (center_x - half, center_y)]
+
+
+def test_polygons_intersect():
+    assert hitboxes.polygons_intersect(square(0, 0, 10), square(15, 5, 10))
+    assert hitboxes.polygons_intersect(square(0, 0, 10), square(0, 0, 2))
+    assert not hitboxes.polygons_intersect(square(0, 0, 10), square(25, 0, 10))
+    # Only touching is not a hit
+    assert not hitboxes.polygons_intersect(square(0, 0, 10), square(20, 0, 10))
+
+
+def test_diamond_corner_gap():
+    """ The bounding boxes overlap but the shapes don't """
+    assert not hitboxes.polygons_intersect(diamond(0, 0, 10), diamond(14, 14, 10))
+    assert hitboxes.polygons_intersect(diamond(0, 0, 10), diamond(9, 9, 10))
+    assert not hitboxes.polygons_intersect(diamond(0, 0, 10), square(12, 12, 3))
+
+
+def test_same_answers_as_arcade():
+    arcade = pytest.importorskip("arcade")
+    rng = np.random.default_rng(4)
+    for i in range(300):
+        first = hitboxes.convex_hull([tuple(point) for point in rng.uniform(-20, 20, (6, 2))])
+        second = hitboxes.convex_hull([tuple(point) for point in rng.uniform(-10, 30, (6, 2))])
+        assert hitboxes.polygons_intersect(first, second) == \
+            arcade.are_polygons_intersecting(first, second)
+
+
+def test_image_box_skips_transparent_edges():
+    pixels = np.zeros((40, 20, 4), dtype=np.uint8)
+    # Solid from columns 5 to 14 and rows 10 to 29, counted from the top
+    pixels[10:30, 5:15, 3] = 255
+    image = Image.fromarray(pixels, "RGBA")
+
+    assert hitboxes.image_outline(image, "box") == [(-5, -10), (5, -10), (5, 10), (-5, 10)]
+    points = hitboxes.image_outline(image, "outline")
+    assert len(points) <= hitboxes.MAX_POINTS
+    assert sorted(points) == [(-5, -10), (-5, 10), (5, -10), (5, 10)]
+
+
+def test_turned_box_is_still_a_box():
+    box = hitboxes.HitBox([hitboxes.rotate(x, y, 90) for x, y in square(3, 0, 10)])
+    assert box.is_box
+    assert (box.half_width, box.half_height) == (10, 13)
+    assert not hitboxes.HitBox(diamond(0, 0, 10)).is_box
@@ -0,0 +1,79 @@
+"""
+Tests for the cached HUD: a label only touches the characters that changed,
+and changes never make arcade rebuild the sprite buffer more than once per
+draw. Nothing here draws, so it runs without a display.
+"""
+import arcade
+
+from FinalProject.hud import Hud
+
+
+def make_hud():
+    hud = Hud()
+    hud.add_label("time", 12, 12, arcade.color.WHITE_SMOKE, 24, 16)
+    hud.add_label("score", 10, 45, arcade.color.AZURE, 24, 16)
+    hud.set_text("time", "Time: 00:09")
+    hud.set_text("score", "Score: 00000")
+    return hud
+
+
+def textures(hud):
+    return [sprite.texture for sprite in hud.sprite_list]
+
+
+def pretend_drawn(hud, monkeypatch):
+    """
+    Make the list look like it has been drawn, so arcade keeps its buffer
+    up to date, and count the whole-buffer rebuilds and single-row updates
+    """
+    calls = {"rebuild": 0, "row": 0}
+
+    def rebuild():
+        calls["rebuild"] += 1
+
+    def row(sprite):
+        calls["row"] += 1
+
+    hud.sprite_list.vao = "drawn"
+    monkeypatch.setattr(hud.sprite_list, "_calculate_sprite_buffer", rebuild)
+    monkeypatch.setattr(hud.sprite_list, "update_position", row)
+    return calls
+
+
+def test_same_text_changes_nothing(monkeypatch):
+    hud = make_hud()
+    before = textures(hud)
+    calls = pretend_drawn(hud, monkeypatch)
+    assert not hud.set_text("time", "Time: 00:09")
+    assert textures(hud) == before
+    assert calls == {"rebuild": 0, "row": 0}
+    assert hud.sprite_list.vao == "drawn"
+
+
+def test_only_changed_characters_swap():
+    hud = make_hud()
+    before = textures(hud)
+    assert hud.set_text("time", "Time: 00:10")
+    changed = [i for i, (old, new) in enumerate(zip(before, textures(hud))) if old is not new]
+    assert changed == [9, 10]
+
+
+def test_swaps_rebuild_once_on_draw(monkeypatch):
+    hud = make_hud()
+    calls = pretend_drawn(hud, monkeypatch)
+    hud.set_text("time", "Time: 01:23")
+    hud.set_text("score", "Score: 00450")
+    # Nothing rebuilt yet; the next draw builds the buffer once
+    assert calls["rebuild"] == 0
+    assert hud.sprite_list.vao is None
+
+
+def test_hiding_characters_keeps_the_buffer(monkeypatch):
+    """ Shorter text only hides sprites, which updates their rows """
+    hud = make_hud()
+    calls = pretend_drawn(hud, monkeypatch)
+    hud.set_text("time", "Time: 00")
+    assert calls["rebuild"] == 0
+    assert calls["row"] > 0
+    assert hud.sprite_list.vao == "drawn"
+    assert [sprite.alpha for sprite in hud.labels["time"].sprites[8:11]] == [0, 0, 0]
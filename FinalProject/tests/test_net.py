@@ -0,0 +1,162 @@
+"""
+Tests for the LAN multiplayer: the snapshot codec, and that bad packets
+are dropped instead of taking the server or a client down.
+"""
+import socket
+import time
+
+import numpy as np
+
+from FinalProject import net
+
+
+def play(server, steps):
+    """ Run the server's game for some steps with nobody pressing anything """
+    for i in range(steps):
+        server.game.step()
+
+
+def make_server(players=1):
+    return net.GameServer(players, "127.0.0.1", 0, seed=7)
+
+
+def start(server):
+    """ Start the race and play a step, as tick 0 means no baseline """
+    server.start()
+    play(server, 1)
+    return server.slots()[1]
+
+
+def send_all(packets, address):
+    """ Send raw packets to an address from a socket of their own """
+    sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    for packet in packets:
+        sender.sendto(packet, address)
+    return sender
+
+
+def wait_for_packets():
+    """ Give localhost a moment to deliver what was sent """
+    time.sleep(0.05)
+
+
+GARBAGE = [
+    b"",
+    bytes([net.INPUT, 0, 0]),
+    bytes([net.INPUT]) + bytes(net.INPUT_FORMAT.size),
+    bytes([net.JOIN, 1]),
+    bytes([net.WELCOME]) * 3,
+    bytes([net.SNAPSHOT]) * 7,
+    bytes([255]) * 64,
+    np.random.default_rng(1).bytes(500),
+]
+
+
+def test_snapshot_round_trip():
+    """ Full and delta snapshots decode to what the server had """
+    server = make_server()
+    slots = start(server)
+    try:
+        first = server.game.snapshot()
+        decoded = net.decode(net.encode(first), slots, {})
+        assert decoded.same_as(first)
+
+        baselines = {decoded.tick: decoded}
+        for i in range(5):
+            play(server, 30)
+            snapshot = server.game.snapshot()
+            delta = net.encode(snapshot, first)
+            decoded = net.decode(delta, slots, baselines)
+            assert decoded is not None and decoded.same_as(snapshot)
+            assert len(delta) <= len(net.encode(snapshot))
+    finally:
+        server.socket.close()
+
+
+def test_decode_needs_its_baseline():
+    server = make_server()
+    slots = start(server)
+    try:
+        first = server.game.snapshot()
+        play(server, 10)
+        delta = net.encode(server.game.snapshot(), first)
+        assert net.decode(delta, slots, {}) is None
+    finally:
+        server.socket.close()
+
+
+def test_decode_drops_bad_snapshots():
+    """ Cut short, padded, or naming slots that aren't there """
+    server = make_server()
+    slots = start(server)
+    try:
+        play(server, 60)
+        packet = net.encode(server.game.snapshot())
+        for bad in (packet[:5], packet[:-1], packet + b"\0", bytes([net.INPUT]) + packet[1:]):
+            assert net.decode(bad, slots, {}) is None
+        assert net.decode(packet, 1, {}) is None
+        for bad in GARBAGE:
+            assert net.decode(bad, slots, {}) is None
+    finally:
+        server.socket.close()
+
+
+def test_server_drops_short_and_garbage_packets():
+    server = make_server()
+    client = net.GameClient("127.0.0.1", server.address[1])
+    try:
+        # From someone who never joined
+        stranger = send_all(GARBAGE, server.address)
+        wait_for_packets()
+        server.poll()
+        assert not server.started
+        assert not server.clients
+
+        # From a player who did
+        client.join()
+        wait_for_packets()
+        server.poll()
+        assert server.started
+        client.socket.send(bytes([net.INPUT, 0, 0]))
+        client.socket.send(bytes([net.INPUT]) * (net.INPUT_FORMAT.size + 1))
+        wait_for_packets()
+        server.poll()
+        assert server.dropped == len(GARBAGE) + 2
+
+        # and the race goes on
+        client.send_keys(1)
+        wait_for_packets()
+        server.poll()
+        server.tick()
+        assert server.clients[client.socket.getsockname()].keys == 1
+        stranger.close()
+    finally:
+        server.socket.close()
+        client.socket.close()
+
+
+def test_client_drops_garbage():
+    fake_server = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    fake_server.bind(("127.0.0.1", 0))
+    client = net.GameClient("127.0.0.1", fake_server.getsockname()[1])
+    try:
+        client.join()
+        packet, address = fake_server.recvfrom(net.MAX_PACKET)
+        fake_server.sendto(net.WELCOME_FORMAT.pack(net.WELCOME, 0, 1, 7, 14, 32), address)
+        for packet in GARBAGE:
+            fake_server.sendto(packet, address)
+        wait_for_packets()
+        client.poll()
+        assert client.player_id == 0 and client.slots == 32
+        assert not client.snapshots
+        assert client.dropped == len(GARBAGE)
+    finally:
+        fake_server.close()
+        client.socket.close()
+
+
+def test_bench_snapshots_match():
+    """ A short race of bots on localhost: every snapshot decodes right """
+    result = net.bench(2, 120)
+    assert result["mismatches"] == 0
+    assert result["dropped"] == 0
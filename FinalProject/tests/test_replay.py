@@ -0,0 +1,55 @@
+"""
+Tests for recording and replaying games: the same seed and keys always
+make the same game.
+"""
+from FinalProject.governor import FrameGovernor
+from FinalProject.replay import InputRecorder, load_recording, replay
+from FinalProject.sim import HeadlessGame
+
+
+def record(path, ticks, seed, game=None):
+    """ Play a random driver for some ticks, save the games and return them """
+    game = game or HeadlessGame("random", seed=seed)
+    game.recorder = InputRecorder()
+    game.start()
+    for i in range(ticks):
+        game.tick()
+    game.recorder.end_game(game)
+    game.recorder.save(path)
+    return load_recording(path)
+
+
+def test_recorded_games_replay_the_same(tmp_path):
+    games = record(tmp_path / "run.txt", 6000, seed=3)
+    assert len(games) > 1
+    assert any(recording.events for recording in games)
+    assert replay(games) == []
+
+
+def test_same_seed_same_games(tmp_path):
+    first = record(tmp_path / "first.txt", 3000, seed=11)
+    second = record(tmp_path / "second.txt", 3000, seed=11)
+    assert [recording.result() for recording in first] == \
+        [recording.result() for recording in second]
+    assert (tmp_path / "first.txt").read_text() == (tmp_path / "second.txt").read_text()
+
+
+def test_changed_result_is_caught(tmp_path):
+    games = record(tmp_path / "run.txt", 2000, seed=5)
+    games[0].score += 10
+    mismatches = replay(games)
+    assert [recording for recording, result in mismatches] == [games[0]]
+
+
+def test_governed_traffic_replays_the_same(tmp_path):
+    """
+    The governor turns the traffic down by how long frames take, which no
+    replay can time the same, so the recording has to carry its changes
+    """
+    game = HeadlessGame("random", seed=8)
+    # Every tick is over a budget this small, so it keeps turning it down
+    game.governor = FrameGovernor(budget_ms=1e-6, verbose=False)
+    games = record(tmp_path / "run.txt", 4000, seed=8, game=game)
+    assert any(recording.traffic for recording in games)
+    assert game.traffic_share < 1.0
+    assert replay(games) == []
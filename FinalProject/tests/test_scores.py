@@ -0,0 +1,78 @@
+"""
+Tests for the high score log: torn and damaged lines are skipped, and the
+log keeps working after a crash part way through a write.
+"""
+from FinalProject.scores import HighScores, Run, parse_line
+
+
+def write_runs(path, runs):
+    """ Add runs to a log and close it """
+    scores = HighScores(str(path))
+    for score, seconds, lives_lost, seed in runs:
+        scores.add(score, seconds, lives_lost, seed)
+    scores.close()
+
+
+def best(path, count=10):
+    """ (score, seed) of the best runs in a log, loaded afresh """
+    scores = HighScores(str(path))
+    runs = [(run.score, run.seed) for run in scores.top(count)]
+    scores.close()
+    return runs
+
+
+def test_line_round_trip():
+    run = parse_line(Run(120, 31.5, 2, 77).line())
+    assert (run.score, run.seconds, run.lives_lost, run.seed) == (120, 31.5, 2, 77)
+    assert parse_line(Run(5, 1.0, 0, None).line()).seed is None
+
+
+def test_damaged_lines_are_rejected():
+    line = Run(120, 31.5, 2, 77).line()
+    assert parse_line(line[:-1]) is None
+    assert parse_line(line[:10] + "\n") is None
+    assert parse_line(line.replace("120", "920")) is None
+    assert parse_line("\n") is None
+
+
+def test_torn_tail_is_skipped_and_cut_off(tmp_path):
+    path = tmp_path / "scores.log"
+    write_runs(path, [(50, 10.0, 4, 1), (90, 20.0, 4, 2)])
+
+    # The game died half way through writing a third run
+    whole = path.read_bytes()
+    with open(path, "ab") as file:
+        file.write(Run(500, 99.0, 4, 3).line().encode()[:9])
+
+    assert best(path) == [(90, 2), (50, 1)]
+    assert path.read_bytes() == whole
+
+    # The next run starts on a line of its own
+    write_runs(path, [(70, 15.0, 4, 4)])
+    assert best(path) == [(90, 2), (70, 4), (50, 1)]
+
+
+def test_bad_checksum_is_skipped(tmp_path):
+    path = tmp_path / "scores.log"
+    write_runs(path, [(50, 10.0, 4, 1), (90, 20.0, 4, 2)])
+
+    # A whole line whose bytes went bad on the disk
+    lines = path.read_text().splitlines(keepends=True)
+    lines[1] = lines[1].replace("90", "99", 1)
+    path.write_text("".join(lines))
+
+    assert best(path) == [(50, 1)]
+    write_runs(path, [(70, 15.0, 4, 4)])
+    assert best(path) == [(70, 4), (50, 1)]
+
+
+def test_compacting_keeps_the_best(tmp_path):
+    path = tmp_path / "scores.log"
+    scores = HighScores(str(path), keep=5, compact_lines=10)
+    for i in range(40):
+        scores.add(i, float(i), 4, i)
+    scores.close()
+
+    assert len(path.read_text().splitlines()) <= 5 + 10
+    assert best(path, 5) == [(39, 39), (38, 38), (37, 37), (36, 36), (35, 35)]
+    assert not (tmp_path / "scores.log.new").exists()
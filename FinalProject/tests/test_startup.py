@@ -0,0 +1,22 @@
+"""
+Tests that the tools that only play the game never load the window's
+libraries and start within the budget, each checked in a Python of its
+own.
+"""
+import pytest
+
+from FinalProject import startup
+
+
+@pytest.mark.parametrize("module", startup.HEADLESS_MODULES)
+def test_headless_module_starts_quickly(module):
+    """ The fastest of a few imports, as python -m FinalProject.startup checks it """
+    result = startup.time_import(module)
+    assert result["loaded"] == []
+    assert result["ms"] < startup.BUDGET_MS
+
+
+def test_window_is_noticed():
+    """ The check isn't passing just because it can't see arcade """
+    pytest.importorskip("arcade")
+    assert "arcade" in startup.time_import("RacingGame", repeats=1)["loaded"]
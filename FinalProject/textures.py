@@ -0,0 +1,270 @@
+"""
+Texture registry.
+
+Every image in the images folder is decoded once, when the game starts, and
+kept here. Sprites and the background then come out of this registry, so
+restarting the game or spawning a new wave never touches the disk.
+
+preload() decodes everything before returning. load_in_background() hands
+the images to a pool of threads instead, so the window can show something
+while they load; get_texture() and wait() block only until the images they
+need are ready. Decoding doesn't touch OpenGL, so any thread can do it.
+
+arcade is only imported once a texture is loaded. Games without a window
+never load one: get_image() reads the pixels straight from the file.
+
+The sprites are drawn much smaller than their images. load_atlas() reads
+the sprite atlas made by FinalProject.atlas, which has them already scaled
+down to the size they are drawn at, and from then on those textures come
+out of it instead of their files. A texture from the atlas still says it
+is as big as its image, so sprites come out the same size and hit boxes
+(which are worked out from the full images) don't change; only the pixels
+the GPU keeps and samples are fewer. Images whose file has changed since
+the atlas was built are loaded from their files, as before.
+
+    python -m FinalProject.textures
+
+prints how long each texture took to load and how much memory it uses.
+"""
+import concurrent.futures
+import hashlib
+import json
+import os
+import time
+
+# Images live next to this file, so we don't depend on the working directory
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+
+# Kinds of files we treat as textures
+IMAGE_EXTENSIONS = (".png", ".jpg")
+
+# The sprite atlas and what is in it. Not in the images folder, so it is
+# never loaded as a texture of its own.
+ATLAS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "atlas")
+ATLAS_IMAGE = os.path.join(ATLAS_DIR, "sprites.png")
+ATLAS_MANIFEST = os.path.join(ATLAS_DIR, "sprites.json")
+
+# name -> Texture, and name -> (seconds to load, bytes in memory)
+_textures = {}
+_stats = {}
+
+# id of a Texture -> its name, to go back from a sprite's texture to its image
+_names = {}
+
+# name -> PIL image, for images read without making a texture
+_images = {}
+
+# name -> Future, for images being loaded in the background
+_futures = {}
+_executor = None
+
+# name -> where it is in the atlas, and the atlas image, once loaded
+_atlas = {}
+_atlas_image = None
+
+
+def texture_name(path):
+    """
+    Turn any way of writing an image path into one name, relative to the
+    images folder. "images\\police.png", "images//police.png" and
+    "police.png" all become "police.png".
+    """
+    name = path.replace("\\", "/")
+    if os.path.isabs(name) and name.startswith(IMAGE_DIR.replace("\\", "/")):
+        name = name[len(IMAGE_DIR):]
+    name = "/".join(part for part in name.split("/") if part)
+    if name.startswith("images/"):
+        name = name[len("images/"):]
+    return name
+
+
+def image_file(name):
+    """ Full path of an image in the images folder """
+    return os.path.join(IMAGE_DIR, *texture_name(name).split("/"))
+
+
+def file_hash(name):
+    """ SHA-256 of an image file, to tell if the atlas was built from it """
+    with open(image_file(name), "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def load_atlas(manifest_path=ATLAS_MANIFEST, image_path=ATLAS_IMAGE):
+    """
+    Read the sprite atlas, if it has been built, so its sprites are loaded
+    from it. Returns the names it will be used for.
+    """
+    global _atlas_image
+    if not (os.path.exists(manifest_path) and os.path.exists(image_path)):
+        print("No sprite atlas, loading every image on its own "
+              "(python -m FinalProject.atlas builds it)")
+        return []
+
+    with open(manifest_path) as file:
+        manifest = json.load(file)
+
+    stale = []
+    for name, entry in manifest["sprites"].items():
+        if not os.path.exists(image_file(name)) or entry["hash"] != file_hash(name):
+            stale.append(name)
+        elif name not in _textures:
+            _atlas[name] = entry
+    if stale:
+        print(f"Sprite atlas is out of date for {', '.join(stale)}, loading them "
+              f"on their own (python -m FinalProject.atlas rebuilds it)")
+
+    if _atlas:
+        import PIL.Image
+        _atlas_image = PIL.Image.open(image_path)
+        _atlas_image.load()
+    return sorted(_atlas)
+
+
+def load(name):
+    """ Decode one image, or cut it out of the atlas, and add it to the registry """
+    name = texture_name(name)
+    if name in _textures:
+        return _textures[name]
+
+    import arcade
+
+    start_time = time.perf_counter()
+    entry = _atlas.get(name)
+    if entry is None:
+        texture = arcade.load_texture(image_file(name))
+        # PIL only reads the pixels when asked, so make it happen now
+        texture.image.load()
+    else:
+        x, y, width, height = entry["x"], entry["y"], entry["width"], entry["height"]
+        texture = arcade.Texture(f"atlas:{name}", _atlas_image.crop((x, y, x + width, y + height)))
+        # Sprites size themselves by the texture, so say it is as big as
+        # the image it stands for
+        texture.width = entry["source_width"]
+        texture.height = entry["source_height"]
+    load_time = time.perf_counter() - start_time
+
+    image = texture.image
+    _textures[name] = texture
+    _names[id(texture)] = name
+    _stats[name] = (load_time, image.width * image.height * len(image.getbands()))
+    return texture
+
+
+def image_names():
+    """ Name of every image in the images folder """
+    names = []
+    for folder, folders, files in os.walk(IMAGE_DIR):
+        folders.sort()
+        for file_name in sorted(files):
+            if file_name.lower().endswith(IMAGE_EXTENSIONS):
+                names.append(texture_name(os.path.join(folder, file_name)))
+    return names
+
+
+def preload():
+    """ Decode every image in the images folder """
+    for name in image_names():
+        load(name)
+
+
+def load_in_background(first=(), workers=None):
+    """
+    Start decoding every image in the images folder on a thread pool and
+    return straight away. The images in 'first' are started first.
+    """
+    global _executor
+    if _executor is None:
+        _executor = concurrent.futures.ThreadPoolExecutor(workers, "texture-loader")
+
+    first = [texture_name(name) for name in first]
+    for name in first + [name for name in image_names() if name not in first]:
+        if name not in _futures and name not in _textures:
+            _futures[name] = _executor.submit(load, name)
+
+
+def progress():
+    """ How many background loads are done, out of how many """
+    done = sum(1 for future in _futures.values() if future.done())
+    return done, len(_futures)
+
+
+def wait(names=None):
+    """ Wait for some images (or all of them) to finish loading in the background """
+    if names is None:
+        futures = list(_futures.values())
+    else:
+        futures = [_futures[name] for name in map(texture_name, names) if name in _futures]
+    for future in futures:
+        future.result()
+
+
+def get_texture(name):
+    """ A texture from the registry, loading it if nothing else has yet """
+    name = texture_name(name)
+    texture = _textures.get(name)
+    if texture is None:
+        if name in _futures:
+            return _futures[name].result()
+        texture = load(name)
+    return texture
+
+
+def get_image(name):
+    """
+    The pixels of an image, at full size. From its texture if it has one
+    (and it isn't a scaled down one from the atlas), otherwise read from
+    the file once, without arcade.
+    """
+    name = texture_name(name)
+    if (name in _textures or name in _futures) and name not in _atlas:
+        return get_texture(name).image
+
+    image = _images.get(name)
+    if image is None:
+        import PIL.Image
+        image = PIL.Image.open(image_file(name))
+        image.load()
+        _images[name] = image
+    return image
+
+
+def names():
+    """ Names of every texture in the registry """
+    return sorted(_textures)
+
+
+def name_of(texture):
+    """
+    Name of a texture from the registry, or None if it isn't one. Sprites
+    without a window wear their image's name, which is its own answer.
+    """
+    if isinstance(texture, str):
+        return texture_name(texture)
+    return _names.get(id(texture))
+
+
+def report():
+    """ Lines describing every loaded texture, biggest first """
+    lines = []
+    total_time = 0.0
+    total_bytes = 0
+    for name, (load_time, size) in sorted(_stats.items(),
+                                          key=lambda item: -item[1][1]):
+        lines.append(f"{name:40s} {load_time * 1000:8.2f} ms {size / 1024:10.1f} KiB")
+        total_time += load_time
+        total_bytes += size
+    lines.append(f"{len(_stats)} textures {total_time * 1000:8.2f} ms "
+                 f"{total_bytes / 1024 / 1024:8.1f} MiB")
+    return lines
+
+
+def main():
+    """ Main method """
+    load_atlas()
+    preload()
+    for line in report():
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
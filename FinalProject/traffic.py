@@ -0,0 +1,254 @@
+"""
+Traffic.
+
+Every competitor keeps to a lane and follows the car in front of it with
+the Intelligent Driver Model: it speeds up towards the speed it would like
+to go, and brakes harder the closer it gets to its leader and the faster it
+is closing in. A car that is held up looks at the lanes next to it and
+moves over when it would go faster there and the car it cuts in front of
+would not have to brake hard (a simple version of MOBIL).
+
+All of it is worked out for every car at once with NumPy. The cars are
+sorted by lane and then by how far up the road they are, so the leader of
+each car is the next one in the sorted order, and the cars around a spot
+in another lane are found with one searchsorted.
+
+The player is not driven by the model, but the competitors treat it like
+any other car in the lanes it covers, so they queue behind it instead of
+driving through it.
+
+Speeds are in pixels per step and accelerations in pixels per step per step.
+"""
+import numpy as np
+
+from .entities import EntityStore
+
+# Fastest a car speeds up, and how hard it likes to brake at most
+MAX_ACCELERATION = 0.05
+COMFORTABLE_BRAKING = 0.15
+
+# Braking no car may be made to do by someone changing lanes in front of it
+SAFE_BRAKING = 0.3
+
+# Steps of driving a car keeps between itself and its leader, and the
+# smallest gap in pixels, even when standing still
+TIME_HEADWAY = 15
+MIN_GAP = 20
+
+# How sharply a car eases off as it nears the speed it wants
+ACCELERATION_EXPONENT = 4
+
+# A lane change has to be worth at least this much acceleration
+LANE_CHANGE_GAIN = 0.02
+
+# Cars think about changing lanes this often, in steps, not every step
+LANE_CHANGE_STEPS = 10
+
+# How fast a car slides across to its lane, in pixels per step
+LANE_CHANGE_SPEED = 4
+
+# Lanes far enough apart in the sort key that no car's y reaches the next one
+LANE_KEY = 1e9
+
+# Lane of the rows that are not in the game, so they are nobody's leader
+NO_LANE = -1
+
+BRAKING_TERM = 2 * (MAX_ACCELERATION * COMFORTABLE_BRAKING) ** 0.5
+
+
+def idm_acceleration(speed, desired_speed, gap, closing_speed):
+    """
+    Intelligent Driver Model. How much each car speeds up (or brakes, if
+    negative) this step, given its gap to the car in front and how much
+    faster than that car it is going. No car in front is an infinite gap.
+    """
+    wanted_gap = MIN_GAP + np.maximum(0.0, speed * (TIME_HEADWAY + closing_speed / BRAKING_TERM))
+    gap = np.maximum(gap, 1.0)
+    return MAX_ACCELERATION * (1 - (speed / desired_speed) ** ACCELERATION_EXPONENT
+                               - (wanted_gap / gap) ** 2)
+
+
+class TrafficStore(EntityStore):
+    """ Drives all the competitors at once """
+
+    def __init__(self, capacity, lane_x):
+        super().__init__(capacity)
+
+        # Middle of each lane
+        self.lane_x = np.array(lane_x, dtype=float)
+        self.lane_width = (lane_x[-1] - lane_x[0]) / max(len(lane_x) - 1, 1)
+
+        # Lane each car is in (or moving over to) and the speed it would
+        # like to go
+        self.lane = np.full(capacity, NO_LANE)
+        self.desired_speed = np.ones(capacity)
+
+        # Steps driven, to know when to think about lane changes
+        self.steps = 0
+
+        # The players, one entry for each lane one covers: lane, y, speed
+        # and half height
+        self.obstacle_lane = np.zeros(0, dtype=int)
+        self.obstacle_y = []
+        self.obstacle_speed = []
+        self.obstacle_half_height = []
+
+    def spawn_car(self, index, lane, center_y, speed):
+        """ Put a car into the game in the middle of a lane """
+        self.spawn(index, float(self.lane_x[lane]), center_y, 0.0, speed)
+        self.lane[index] = lane
+        self.desired_speed[index] = speed
+
+    def lane_clear(self, lane, center_y):
+        """ Whether a car put at center_y in this lane would have room """
+        count = self.count
+        reach = self.half_height[:count] * 2 + MIN_GAP
+        return not ((self.lane[:count] == lane)
+                    & (np.abs(self.y[:count] - center_y) < reach)).any()
+
+    def kill(self, index):
+        super().kill(index)
+        self.lane[index] = NO_LANE
+
+    def reset(self):
+        super().reset()
+        self.steps = 0
+        self.set_obstacles([])
+
+    def set_obstacle(self, center_x, center_y, speed, half_width, half_height):
+        """ Tell the cars where the player is this step """
+        self.set_obstacles([(center_x, center_y, speed, half_width, half_height)])
+
+    def set_obstacles(self, obstacles):
+        """
+        Tell the cars where the players are this step, as (x, y, speed,
+        half width, half height). Each is in every lane it reaches into.
+        """
+        lanes = []
+        self.obstacle_y = []
+        self.obstacle_speed = []
+        self.obstacle_half_height = []
+        for center_x, center_y, speed, half_width, half_height in obstacles:
+            for lane, lane_x in enumerate(self.lane_x.tolist()):
+                if abs(lane_x - center_x) < half_width + self.lane_width / 2:
+                    lanes.append(lane)
+                    self.obstacle_y.append(float(center_y))
+                    self.obstacle_speed.append(float(speed))
+                    self.obstacle_half_height.append(float(half_height))
+        self.obstacle_lane = np.array(lanes, dtype=int)
+
+    def move(self):
+        """ Follow, change lanes, then move """
+        if self.count:
+            self.drive()
+        self.steps += 1
+        super().move()
+
+    def drive(self):
+        """ Work out the new speed and lane of every car in the game """
+        count = self.count
+        active = self.active[:count]
+        lane = self.lane[:count]
+        y = self.y[:count]
+        speed = self.change_y[:count]
+        desired_speed = self.desired_speed[:count]
+        half_height = self.half_height[:count]
+
+        # Everything in the lanes: the cars, then the player. It brakes for
+        # no one, so as a follower it wants the speed it is going.
+        all_lane = np.concatenate((lane, self.obstacle_lane))
+        all_y = np.concatenate((y, self.obstacle_y))
+        all_speed = np.concatenate((speed, self.obstacle_speed))
+        all_half_height = np.concatenate((half_height, self.obstacle_half_height))
+
+        # Sort by lane, then up the road
+        keys = all_lane * LANE_KEY + all_y
+        order = np.argsort(keys, kind="stable")
+        sorted_lane = all_lane[order]
+        rank = np.empty(len(order), dtype=int)
+        rank[order] = np.arange(len(order))
+        lanes = (order, sorted_lane, all_y, all_speed, all_half_height)
+
+        # Each car's leader is the next one up in its own lane
+        acceleration = self.follow(rank[:count] + 1, lane, y, speed, desired_speed,
+                                   half_height, lanes)
+
+        if self.steps % LANE_CHANGE_STEPS == 0:
+            self.change_lanes(active, acceleration, keys[order], lanes)
+
+        # Speed up or brake, never backwards
+        self.change_y[:count] = np.where(active, np.maximum(speed + acceleration, 0.0), 0.0)
+
+        # Slide towards the middle of the lane
+        offset = self.lane_x[self.lane[:count]] - self.x[:count]
+        self.change_x[:count] = np.where(
+            active, np.clip(offset, -LANE_CHANGE_SPEED, LANE_CHANGE_SPEED), 0.0)
+
+    def change_lanes(self, active, acceleration, sorted_keys, lanes):
+        """
+        Move held up cars over to the lane next to them where they would
+        go faster, if the car they cut in front of would not have to brake
+        hard. Only cars that are done sliding into their lane look.
+        """
+        count = self.count
+        order, sorted_lane, all_y, all_speed, all_half_height = lanes
+        lane = self.lane[:count]
+        y = self.y[:count]
+        speed = self.change_y[:count]
+        desired_speed = self.desired_speed[:count]
+        half_height = self.half_height[:count]
+
+        # The player wants to go as fast as it is going
+        all_desired = np.concatenate((desired_speed,
+                                      [max(obstacle_speed, 1.0)
+                                       for obstacle_speed in self.obstacle_speed]))
+
+        settled = active & (np.abs(self.x[:count] - self.lane_x[lane]) < 1)
+        best_gain = np.full(count, LANE_CHANGE_GAIN)
+        best_lane = lane.copy()
+        for side in (-1, 1):
+            target = lane + side
+            looking = settled & (target >= 0) & (target < len(self.lane_x))
+            if not looking.any():
+                continue
+
+            # The first thing in the target lane at or above the car is
+            # its new leader, the one before that its new follower
+            leader_rank = np.searchsorted(sorted_keys, target * LANE_KEY + y)
+            new_acceleration = self.follow(leader_rank, target, y, speed, desired_speed,
+                                           half_height, lanes)
+
+            follower_rank = np.maximum(leader_rank - 1, 0)
+            follower = order[follower_rank]
+            has_follower = (leader_rank > 0) & (sorted_lane[follower_rank] == target)
+            follower_gap = y - half_height - all_y[follower] - all_half_height[follower]
+            follower_acceleration = idm_acceleration(
+                all_speed[follower], all_desired[follower],
+                follower_gap, all_speed[follower] - speed)
+
+            safe = ((new_acceleration > -SAFE_BRAKING)
+                    & (~has_follower | ((follower_gap > MIN_GAP)
+                                       & (follower_acceleration > -SAFE_BRAKING))))
+            gain = new_acceleration - acceleration
+            better = looking & safe & (gain > best_gain)
+            best_gain = np.where(better, gain, best_gain)
+            best_lane = np.where(better, target, best_lane)
+
+        self.lane[:count] = best_lane
+
+    def follow(self, leader_rank, lane, y, speed, desired_speed, half_height, lanes):
+        """
+        Acceleration of each car if the one at leader_rank in the sorted
+        order were its leader. Ranks past the end, or in another lane, mean
+        an open road ahead.
+        """
+        order, sorted_lane, all_y, all_speed, all_half_height = lanes
+        clipped = np.minimum(leader_rank, len(order) - 1)
+        leader = order[clipped]
+        has_leader = (leader_rank < len(order)) & (sorted_lane[clipped] == lane)
+
+        gap = np.where(has_leader,
+                       all_y[leader] - all_half_height[leader] - y - half_height,
+                       np.inf)
+        closing_speed = np.where(has_leader, speed - all_speed[leader], 0.0)
+        return idm_acceleration(speed, desired_speed, gap, closing_speed)
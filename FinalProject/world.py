@@ -0,0 +1,157 @@
+"""
+Streaming road.
+
+The road is made of chunks, each a stretch of road CHUNK_LENGTH pixels long
+with its own lanes, the traffic that comes through it and the coins lying on
+it. road_chunks() makes them one after the other, forever. WorldStreamer keeps
+only the chunks near the camera: new ones are made just before they come into
+view and old ones are dropped once the camera has gone past. So however long
+a race goes on, only a handful of chunks exist at a time.
+
+Chunks only describe what should appear. The game puts cars and coins on the
+road with sprites from its pools, so the number of sprites never changes.
+"""
+import collections
+
+# How long one chunk of road is, in pixels
+CHUNK_LENGTH = 360
+
+# Make chunks this far above the top of the screen before we get to them
+LOOK_AHEAD = CHUNK_LENGTH
+
+# Drop chunks once the camera is this far past their end
+LEAVE_BEHIND = CHUNK_LENGTH // 2
+
+# The road is always this many lanes wide. Each chunk has some of them open.
+ROAD_LANES = 4
+
+
+class CarSpawn:
+    """ A car that catches up from behind once the camera reaches 'distance' """
+
+    def __init__(self, distance, lane, speed, texture):
+        self.distance = distance
+        self.lane = lane
+        self.speed = speed
+        self.texture = texture
+
+
+class Chunk:
+    """ One stretch of road: its open lanes, its traffic and its coins """
+
+    def __init__(self, number, start, length, lanes, lane_x):
+        self.number = number
+        self.start = start
+        self.length = length
+
+        # Numbers of the open lanes, and the middle of every lane
+        self.lanes = lanes
+        self.lane_x = lane_x
+
+        # Sorted by distance, so the next car due is always cars[next_car]
+        self.cars = []
+        self.next_car = 0
+
+        # (x, y) spots on the road, put down all at once
+        self.coins = []
+        self.coins_placed = False
+
+    @property
+    def end(self):
+        return self.start + self.length
+
+
+def lane_centers(road_left, road_right, lanes=ROAD_LANES):
+    """ The middle of each lane, spread evenly over the road """
+    lane_width = (road_right - road_left) / lanes
+    return [road_left + lane_width * (i + 0.5) for i in range(lanes)]
+
+
+def lane_layout(rng, lanes=ROAD_LANES):
+    """ Which 2 or more lanes of the road are open, left to right """
+    return sorted(rng.sample(range(lanes), rng.randint(2, lanes)))
+
+
+def coin_pattern(rng, chunk, count):
+    """ Where the coins go on a chunk: a line, a zigzag or scattered """
+    pattern = rng.choice(("line", "zigzag", "scatter"))
+    gap = chunk.length / count
+
+    spots = []
+    lane = rng.randrange(len(chunk.lanes))
+    for i in range(count):
+        y = chunk.start + gap * (i + 0.5)
+        if pattern == "line":
+            x = chunk.lane_x[chunk.lanes[lane]]
+        elif pattern == "zigzag":
+            x = chunk.lane_x[chunk.lanes[(lane + i) % len(chunk.lanes)]]
+        else:
+            x = chunk.lane_x[rng.choice(chunk.lanes)]
+        spots.append((x, y))
+    return spots
+
+
+def road_chunks(rng, lane_x, cars, coins, speeds, textures, length=CHUNK_LENGTH):
+    """
+    Make chunks of road forever.
+    'lane_x' is the middle of each lane, 'cars' and 'coins' are how many of
+    each go on one chunk, 'speeds' is the (slowest, fastest) speed of a car
+    and 'textures' how many car images there are to pick from.
+    """
+    number = 0
+    while True:
+        chunk = Chunk(number, number * length, length,
+                      lane_layout(rng, len(lane_x)), lane_x)
+
+        for i in range(rng.randint(cars // 2, cars)):
+            chunk.cars.append(CarSpawn(chunk.start + rng.uniform(0, length),
+                                       rng.choice(chunk.lanes),
+                                       rng.uniform(*speeds),
+                                       rng.randrange(textures)))
+        chunk.cars.sort(key=lambda car: car.distance)
+
+        chunk.coins = coin_pattern(rng, chunk, coins)
+
+        yield chunk
+        number += 1
+
+
+class WorldStreamer:
+    """ Keeps the chunks around the camera and says what is due to appear """
+
+    def __init__(self, chunks, look_ahead=LOOK_AHEAD, leave_behind=LEAVE_BEHIND):
+        self.chunks = chunks
+        self.look_ahead = look_ahead
+        self.leave_behind = leave_behind
+        self.live = collections.deque()
+
+    def advance(self, view_bottom, view_top):
+        """
+        Move the window of chunks along with the camera. Returns the cars
+        that should come up from behind now and the coins that should be
+        put on the road ahead now.
+        """
+        # Make chunks ahead of the camera
+        while not self.live or self.live[-1].end < view_top + self.look_ahead:
+            self.live.append(next(self.chunks))
+
+        # Forget the ones behind it
+        while self.live[0].end < view_bottom - self.leave_behind:
+            self.live.popleft()
+
+        cars = []
+        coins = []
+        for chunk in self.live:
+            if chunk.start > view_top + self.look_ahead:
+                break
+
+            while (chunk.next_car < len(chunk.cars)
+                   and chunk.cars[chunk.next_car].distance <= view_bottom):
+                cars.append(chunk.cars[chunk.next_car])
+                chunk.next_car += 1
+
+            if not chunk.coins_placed and chunk.start <= view_top:
+                coins.extend(chunk.coins)
+                chunk.coins_placed = True
+
+        return cars, coins